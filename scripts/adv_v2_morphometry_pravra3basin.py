@@ -229,6 +229,10 @@ pip_install(
     "earthpy",
     "tqdm",
     "openpyxl",
+    "numba",
+    "pyarrow",
+    "pyogrio",
+    "opencv-python-headless",
 )
 
 print("\n📚 Importing libraries...")
@@ -236,7 +240,10 @@ print("\n📚 Importing libraries...")
 import json
 
 # ── STANDARD ──────────────────────────────────────────────────────────────────
+import atexit
 import os
+import shutil
+import tempfile
 import traceback
 import warnings
 import zipfile
@@ -252,11 +259,12 @@ import fiona
 import geopandas as gpd
 import rasterio
 import rasterio.plot
+import shapely
 from pyproj import CRS, Transformer
-from rasterio.features import geometry_mask
-from rasterio.mask import mask as rio_mask
+from rasterio.features import geometry_mask, rasterize
 from rasterio.transform import rowcol, xy
 from rasterio.warp import Resampling, calculate_default_transform, reproject
+from rasterio.windows import Window
 from rasterstats import zonal_stats
 from shapely.geometry import (
     LineString,
@@ -264,7 +272,6 @@ from shapely.geometry import (
     MultiPolygon,
     Point,
     Polygon,
-    box,
 )
 from shapely.ops import linemerge, unary_union
 
@@ -297,6 +304,7 @@ import seaborn as sns
 
 # ── STATSMODELS ───────────────────────────────────────────────────────────────
 import statsmodels.api as sm
+from matplotlib.collections import LineCollection
 from matplotlib.colors import LightSource, LinearSegmentedColormap, Normalize
 from matplotlib.patches import FancyArrowPatch, FancyBboxPatch
 from mpl_toolkits.axes_grid1 import make_axes_locatable
@@ -336,6 +344,34 @@ try:
 except ImportError:
     RIOXARRAY_OK = False
 
+# Kernels are compiled with cache=True: machine code is stored next to this
+# script (__pycache__) and reused by later runs, so only the first run pays
+# the JIT compile.
+try:
+    from numba import njit, prange
+
+    NUMBA_OK = True
+except ImportError:
+    NUMBA_OK = False
+    print("  ⚠️  numba not available — raster composites use plain numpy")
+
+try:
+    import pyogrio
+
+    PYOGRIO_OK = True
+except ImportError:
+    PYOGRIO_OK = False
+# Vector writes go through pyogrio's bulk OGR writer when available
+VECTOR_ENGINE = "pyogrio" if PYOGRIO_OK else None
+
+try:
+    import cv2
+
+    CV2_OK = True
+except ImportError:
+    CV2_OK = False
+    print("  ⚠️  opencv not available — morphology filters use scipy.ndimage")
+
 # ── GLOBAL SETTINGS ───────────────────────────────────────────────────────────
 pd.set_option("display.max_columns", 30)
 pd.set_option("display.width", 200)
@@ -361,6 +397,10 @@ REPORT_DIR = os.path.join(OUT_DIR, "report/")
 for d in [OUT_DIR, MAPS_DIR, PLOTS_DIR, TABLES_DIR, SHAPES_DIR, REPORT_DIR]:
     os.makedirs(d, exist_ok=True)
 
+# Derived vector layers are written as GeoParquet; set PRAVARA_WRITE_SHP=1 to
+# also write an ESRI Shapefile copy for legacy GIS tools
+WRITE_LEGACY_SHP = os.environ.get("PRAVARA_WRITE_SHP", "0") == "1"
+
 print("\n✅ All libraries imported successfully.")
 print(f"📁 Output directory: {OUT_DIR}")
 
@@ -436,6 +476,18 @@ def get_raster_info(path):
         }
 
 
+def gtiff_write_options(dtype):
+    """Tiled DEFLATE GeoTIFF creation options (float predictor for floats)."""
+    return {
+        "driver": "GTiff",
+        "tiled": True,
+        "blockxsize": 256,
+        "blockysize": 256,
+        "compress": "deflate",
+        "predictor": 3 if np.issubdtype(np.dtype(dtype), np.floating) else 2,
+    }
+
+
 def reproject_raster(src_path, dst_path, target_crs):
     """Reproject a raster to target CRS and save."""
     with rasterio.open(src_path) as src:
@@ -449,6 +501,7 @@ def reproject_raster(src_path, dst_path, target_crs):
                 "transform": transform,
                 "width": width,
                 "height": height,
+                **gtiff_write_options(src.dtypes[0]),
             }
         )
         with rasterio.open(dst_path, "w", **kwargs) as dst:
@@ -477,6 +530,27 @@ def fix_geometries(gdf, layer_name="layer"):
     return gdf.reset_index(drop=True)
 
 
+def save_vector(gdf, name):
+    """
+    Write a derived vector layer to SHAPES_DIR as GeoParquet (<name>.parquet).
+    Falls back to GeoPackage when pyarrow is missing; WRITE_LEGACY_SHP adds a
+    .shp copy alongside. OGR writes use VECTOR_ENGINE (pyogrio if present).
+    """
+    stem = os.path.join(SHAPES_DIR, name)
+    written = []
+    try:
+        gdf.to_parquet(stem + ".parquet")
+        written.append(stem + ".parquet")
+    except ImportError:
+        print(f"  ⚠️  pyarrow not available — writing {name}.gpkg instead")
+        gdf.to_file(stem + ".gpkg", driver="GPKG", layer=name, engine=VECTOR_ENGINE)
+        written.append(stem + ".gpkg")
+    if WRITE_LEGACY_SHP:
+        gdf.to_file(stem + ".shp", engine=VECTOR_ENGINE)
+        written.append(stem + ".shp")
+    return written
+
+
 def explode_multipart(gdf, layer_name="layer"):
     """Explode multipart geometries to single-part."""
     before = len(gdf)
@@ -684,7 +758,9 @@ if os.path.exists(DATA_PATHS.get("pour_points", "")):
     print("  Snapping pour points to max flow accumulation...")
     gdf_pp = snap_pour_points(gdf_pp, RASTERS["flow_acc"], snap_distance_m=300)
     print(f"  Snap distances (m): {gdf_pp['snap_distance_m'].round(1).tolist()}")
-    gdf_pp.to_file(os.path.join(SHAPES_DIR, "pour_points_snapped.shp"))
+    gdf_pp.to_file(
+        os.path.join(SHAPES_DIR, "pour_points_snapped.shp"), engine=VECTOR_ENGINE
+    )
     POUR_POINTS_OK = True
 else:
     gdf_pp = None
@@ -729,6 +805,56 @@ print(
 print(f"  FDIR shape: {FDIR_ARR.shape}")
 print(f"  FACC shape: {FACC_ARR.shape}")
 
+# Inverse affine cached once; _xy_to_rc maps map coords → (row, col) arrays
+INV_AFFINE = ~DEM_TRANSFORM
+
+
+def _xy_to_rc(xs, ys, inv=INV_AFFINE):
+    """Vectorised rowcol(): floor(inv * (x, y)) as integer index arrays."""
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    cols = np.floor(inv.a * xs + inv.b * ys + inv.c)
+    rows = np.floor(inv.d * xs + inv.e * ys + inv.f)
+    return rows.astype(np.intp), cols.astype(np.intp)
+
+
+def nanpercentile_fast(arr, q):
+    """
+    np.nanpercentile(arr, q) via np.partition (O(N), no full sort); same
+    "linear" interpolation rule as numpy. A sequence of q is served from one
+    partition call and returned as a tuple.
+    """
+    qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    finite = np.asarray(arr).ravel()
+    finite = finite[~np.isnan(finite)]
+    if finite.size == 0:
+        res = np.full(qs.size, np.nan)
+    else:
+        pos = (finite.size - 1) * qs / 100.0
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, finite.size - 1)
+        part = np.partition(finite, np.unique(np.concatenate([lo, hi])))
+        res = part[lo] + (part[hi] - part[lo]) * (pos - lo)
+    if np.ndim(q) == 0:
+        return float(res[0])
+    return tuple(float(v) for v in res)
+
+
+# Percentiles reused across stats prints and map colour limits, keyed by
+# raster name (only for rasters that are not modified after first use)
+PCT_CACHE = {}
+
+
+def cached_percentiles(key, arr, *qs):
+    """Memoised nanpercentile_fast; uncached qs share one partition pass."""
+    missing = [q for q in qs if (key, q) not in PCT_CACHE]
+    if missing:
+        for q, v in zip(missing, nanpercentile_fast(arr, missing)):
+            PCT_CACHE[(key, q)] = v
+    vals = tuple(PCT_CACHE[(key, q)] for q in qs)
+    return vals[0] if len(vals) == 1 else vals
+
+
 # ── 6. Compute slope & aspect if not provided ─────────────────────────────────
 print("\n[6/6] Computing slope and aspect...")
 
@@ -778,13 +904,31 @@ else:
 
 
 # Save slope & aspect to disk
+def write_band_strips(dst, arr, band, nodata=-9999.0):
+    """
+    Write arr into band of an open dataset one tile-row strip at a time, so
+    the float32 / NaN → nodata conversion never copies the full raster.
+    """
+    step = dst.block_shapes[band - 1][0]
+    for r0 in range(0, arr.shape[0], step):
+        strip = np.array(arr[r0 : r0 + step], dtype=np.float32)
+        strip[np.isnan(strip)] = nodata
+        dst.write(strip, band, window=Window(0, r0, strip.shape[1], strip.shape[0]))
+
+
 def save_raster(arr, path, template_path):
     with rasterio.open(template_path) as src:
         meta = src.meta.copy()
-    meta.update({"dtype": "float32", "nodata": -9999.0, "count": 1})
-    arr_save = np.where(np.isnan(arr), -9999.0, arr)
+    meta.update(
+        {
+            "dtype": "float32",
+            "nodata": -9999.0,
+            "count": 1,
+            **gtiff_write_options(np.float32),
+        }
+    )
     with rasterio.open(path, "w", **meta) as dst:
-        dst.write(arr_save.astype(np.float32), 1)
+        write_band_strips(dst, arr, 1)
 
 
 save_raster(SLOPE_ARR, os.path.join(OUT_DIR, "slope.tif"), RASTERS["dem"])
@@ -792,12 +936,77 @@ save_raster(ASPECT_ARR, os.path.join(OUT_DIR, "aspect.tif"), RASTERS["dem"])
 RASTERS["slope"] = os.path.join(OUT_DIR, "slope.tif")
 RASTERS["aspect"] = os.path.join(OUT_DIR, "aspect.tif")
 
+# ── SHARED FLOAT32 GRIDS ──────────────────────────────────────────────────────
+# DEM / flow-acc / slope are persisted once as .npy and reopened read-only
+# memory-mapped, so later sections share one copy instead of re-reading TIFFs.
+# Kept outside OUT_DIR so the cache is not bundled into the export zip. Each
+# run gets its own directory (never truncating files another run still has
+# mapped) and removes it at interpreter exit.
+GRID_CACHE_DIR = tempfile.mkdtemp(prefix="pravara_grid_")
+atexit.register(shutil.rmtree, GRID_CACHE_DIR, ignore_errors=True)
+
+
+def _as_memmap(arr, name):
+    path = os.path.join(GRID_CACHE_DIR, f"{name}.npy")
+    np.save(path, np.ascontiguousarray(arr, dtype=np.float32))
+    return np.load(path, mmap_mode="r")
+
+
+DEM_ARR = _as_memmap(DEM_ARR, "dem")
+FACC_ARR = _as_memmap(FACC_ARR, "flow_acc")
+SLOPE_ARR = _as_memmap(SLOPE_ARR, "slope")
+
+# DEM nodata mask, computed once: DEM_ARR is read-only from here on, so every
+# later NaN fill-in / propagation reuses it instead of re-scanning the DEM
+DEM_NAN_MASK = np.isnan(DEM_ARR)
+
+
+def basin_mask(geom):
+    """Boolean in-basin mask on the DEM grid (same cell rule as rio_mask)."""
+    return geometry_mask(
+        [geom], out_shape=DEM_ARR.shape, transform=DEM_TRANSFORM, invert=True
+    )
+
+
+def basin_labels(geoms):
+    """Int32 label raster on the DEM grid: basin i → i + 1, outside → 0."""
+    return rasterize(
+        zip(geoms, range(1, len(geoms) + 1)),
+        out_shape=DEM_ARR.shape,
+        transform=DEM_TRANSFORM,
+        fill=0,
+        dtype="int32",
+    )
+
+
+def zonal_stats_labels(arr, labels, n, high=None):
+    """
+    NaN-aware per-label mean / max (and fraction of cells > high) for labels
+    1..n in one bincount pass. Labels without valid cells give NaN.
+    """
+    lab = labels.ravel()
+    vals = np.asarray(arr, dtype=np.float64).ravel()
+    ok = (lab > 0) & ~np.isnan(vals)
+    lab, vals = lab[ok], vals[ok]
+    cnt = np.bincount(lab, minlength=n + 1)[1:]
+    has = cnt > 0
+    mean = np.bincount(lab, weights=vals, minlength=n + 1)[1:]
+    mean = np.where(has, mean / np.maximum(cnt, 1), np.nan)
+    mx = np.full(n + 1, -np.inf)
+    np.maximum.at(mx, lab, vals)
+    stats = {"mean": mean, "max": np.where(has, mx[1:], np.nan)}
+    if high is not None:
+        n_high = np.bincount(lab, weights=vals > high, minlength=n + 1)[1:]
+        stats["high_frac"] = np.where(has, n_high / np.maximum(cnt, 1), np.nan)
+    return stats
+
+
 # ── HILLSHADE (used as background in all maps) ────────────────────────────────
 print("  Computing hillshade for map backgrounds...")
 ls = LightSource(azdeg=315, altdeg=45)
-dem_filled = np.where(np.isnan(DEM_ARR), np.nanmean(DEM_ARR), DEM_ARR)
+dem_filled = np.where(DEM_NAN_MASK, np.nanmean(DEM_ARR), DEM_ARR)
 HILLSHADE = ls.hillshade(dem_filled, vert_exag=1.5, dx=DEM_RES, dy=DEM_RES)
-HILLSHADE[np.isnan(DEM_ARR)] = np.nan
+HILLSHADE[DEM_NAN_MASK] = np.nan
 print("  ✅ Hillshade computed")
 
 # ── SPATIAL INDEX (for fast spatial joins) ────────────────────────────────────
@@ -1086,36 +1295,20 @@ save_raster(TRI_ARR, os.path.join(OUT_DIR, "tri.tif"), RASTERS["dem"])
 RELIEF = []
 HYPS = {}  # basin_id → (rel_area, rel_elev)
 
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = [row.geometry.__geo_interface__]
+# In-basin cell masks on the DEM grid, rasterised once and shared by every
+# per-basin statistic below (relief, TWI, GAI) instead of rio_mask-clipping
+# the DEM / slope / TRI GeoTIFFs for each basin
+BASIN_MASKS = {
+    bid: basin_mask(geom) for bid, geom in zip(gdf_sub["basin_id"], gdf_sub.geometry)
+}
 
-    # Mask DEM to subbasin
-    with rasterio.open(RASTERS["dem"]) as src:
-        try:
-            arr_masked, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            dem_clip = arr_masked[0].astype(np.float32)
-            dem_clip[dem_clip == src.nodata] = np.nan
-        except Exception:
-            dem_clip = DEM_ARR.copy()
-
-    # Mask slope to subbasin
-    with rasterio.open(RASTERS["slope"]) as src:
-        try:
-            s_masked, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            slope_clip = s_masked[0].astype(np.float32)
-            slope_clip[slope_clip == -9999.0] = np.nan
-        except Exception:
-            slope_clip = SLOPE_ARR.copy()
-
-    # Mask TRI
-    with rasterio.open(os.path.join(OUT_DIR, "tri.tif")) as src:
-        try:
-            t_masked, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            tri_clip = t_masked[0].astype(np.float32)
-            tri_clip[tri_clip == -9999.0] = np.nan
-        except Exception:
-            tri_clip = TRI_ARR.copy()
+for bid, m in BASIN_MASKS.items():
+    # Basin cells of each grid (whole grid if the basin misses the DEM)
+    if not m.any():
+        m = slice(None)
+    dem_clip = DEM_ARR[m]
+    slope_clip = SLOPE_ARR[m]
+    tri_clip = TRI_ARR[m]
 
     valid_dem = dem_clip[~np.isnan(dem_clip)]
     valid_slope = slope_clip[~np.isnan(slope_clip)]
@@ -1445,20 +1638,61 @@ def base_axes(title, figsize=(11, 9)):
     return fig, ax, utm_extent
 
 
+def _line_vertices(geoms):
+    """Split (multi)line geometries into one (N, 2) vertex array per part."""
+    parts = shapely.get_parts(np.asarray(geoms, dtype=object))
+    coords, idx = shapely.get_coordinates(parts, return_index=True)
+    return np.split(coords, np.flatnonzero(np.diff(idx)) + 1) if len(coords) else []
+
+
+# Basemap vertices are identical on every panel: extract them once and build a
+# fresh LineCollection per axes instead of re-running GeoPandas .plot()
+SUB_OUTLINE_VERTS = _line_vertices(gdf_sub.boundary.values)
+STREAM_VERTS = _line_vertices(gdf_streams.geometry.values)
+
+
+def _add_line_collection(ax, verts, **kwargs):
+    coll = LineCollection(verts, **kwargs)
+    ax.add_collection(coll, autolim=True)
+    ax.autoscale_view()
+    return coll
+
+
+def add_subbasin_outline(ax, edgecolor="black", linewidth=1.2, zorder=10, **kwargs):
+    """Draw the cached subbasin boundaries onto ax."""
+    return _add_line_collection(
+        ax,
+        SUB_OUTLINE_VERTS,
+        colors=edgecolor,
+        linewidths=linewidth,
+        zorder=zorder,
+        **kwargs,
+    )
+
+
+def add_stream_network(
+    ax, color="royalblue", linewidth=0.6, alpha=0.5, zorder=8, **kwargs
+):
+    """Draw the cached stream network onto ax."""
+    if not STREAM_VERTS or alpha == 0:
+        return None
+    return _add_line_collection(
+        ax,
+        STREAM_VERTS,
+        colors=color,
+        linewidths=linewidth,
+        alpha=alpha,
+        zorder=zorder,
+        **kwargs,
+    )
+
+
 def overlay_boundaries(ax, alpha_sub=0.9, alpha_str=0.5):
     """Overlay subbasin boundaries and stream network."""
-    gdf_sub.boundary.plot(
-        ax=ax, edgecolor="black", linewidth=1.2, zorder=10, label="Subbasin boundary"
+    add_subbasin_outline(ax, label="Subbasin boundary")
+    add_stream_network(
+        ax, linewidth=0.8, alpha=alpha_str, zorder=9, label="Stream network"
     )
-    if len(gdf_streams) > 0:
-        gdf_streams.plot(
-            ax=ax,
-            color="royalblue",
-            linewidth=0.8,
-            alpha=alpha_str,
-            zorder=9,
-            label="Stream network",
-        )
 
 
 def finalize_and_save(fig, ax, utm_extent, filename, n_ticks=5):
@@ -1484,6 +1718,12 @@ def raster_extent():
     return [b.left, b.right, b.bottom, b.top]
 
 
+# 1-D cell-axis coordinates of the DEM grid (origin="upper"), computed once and
+# passed straight to ax.contour — matplotlib broadcasts them, no dense meshgrid
+GRID_X = np.linspace(DEM_BOUNDS.left, DEM_BOUNDS.right, DEM_ARR.shape[1])
+GRID_Y = np.linspace(DEM_BOUNDS.bottom, DEM_BOUNDS.top, DEM_ARR.shape[0])[::-1]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  1. ELEVATION MAP
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1491,6 +1731,7 @@ def raster_extent():
 print("\n[1/9] Elevation map...")
 fig, ax, utm_ext = base_axes("Elevation Map — SRTM 30 m DEM")
 cmap_elev = plt.get_cmap("terrain")
+dem_p2, dem_p98 = cached_percentiles("dem", DEM_ARR, 2, 98)
 im = ax.imshow(
     DEM_ARR,
     extent=raster_extent(),
@@ -1498,8 +1739,8 @@ im = ax.imshow(
     cmap=cmap_elev,
     alpha=0.75,
     zorder=1,
-    vmin=np.nanpercentile(DEM_ARR, 2),
-    vmax=np.nanpercentile(DEM_ARR, 98),
+    vmin=dem_p2,
+    vmax=dem_p98,
 )
 overlay_boundaries(ax)
 divider = make_axes_locatable(ax)
@@ -1523,7 +1764,7 @@ im = ax.imshow(
     alpha=0.75,
     zorder=1,
     vmin=0,
-    vmax=np.nanpercentile(SLOPE_ARR, 98),
+    vmax=cached_percentiles("slope", SLOPE_ARR, 98),
 )
 overlay_boundaries(ax)
 divider = make_axes_locatable(ax)
@@ -1647,7 +1888,7 @@ for o in orders_list:
         label=f"Order {o}",
     )
 
-gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.2, zorder=15)
+add_subbasin_outline(ax, zorder=15)
 ax.legend(loc="lower left", fontsize=8, framealpha=0.85, title="Strahler Order")
 finalize_and_save(fig, ax, utm_ext, "06_stream_order.png")
 
@@ -1671,13 +1912,15 @@ gdf_dd.plot(
     edgecolor="black",
     linewidth=1.0,
 )
-# Basin labels
-for _, r in gdf_dd.iterrows():
-    cx, cy = r.geometry.centroid.x, r.geometry.centroid.y
+# Basin labels (centroids in one vectorised call)
+centroids = gdf_dd.geometry.centroid
+for bid, dd, cx, cy in zip(
+    gdf_dd["basin_id"], gdf_dd["Drainage_Density_Dd"], centroids.x, centroids.y
+):
     ax.text(
         cx,
         cy,
-        f"{r['basin_id']}\n{r['Drainage_Density_Dd']:.2f}",
+        f"{bid}\n{dd:.2f}",
         ha="center",
         va="center",
         fontsize=8,
@@ -1686,7 +1929,7 @@ for _, r in gdf_dd.iterrows():
         path_effects=[pe.withStroke(linewidth=2, foreground="black")],
     )
 
-gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.7, alpha=0.6, zorder=5)
+add_stream_network(ax, linewidth=0.7, alpha=0.6, zorder=5)
 finalize_and_save(fig, ax, utm_ext, "07_drainage_density.png")
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1696,14 +1939,9 @@ finalize_and_save(fig, ax, utm_ext, "07_drainage_density.png")
 print("[8/9] Contour map...")
 fig, ax, utm_ext = base_axes("Topographic Contour Map")
 
-b = DEM_BOUNDS
 dem_range = np.nanmax(DEM_ARR) - np.nanmin(DEM_ARR)
 interval = max(10, round(dem_range / 20, -1))  # smart interval
 
-x_c = np.linspace(b.left, b.right, DEM_ARR.shape[1])
-y_c = np.linspace(b.bottom, b.top, DEM_ARR.shape[0])[::-1]  # origin='upper'
-XX, YY = np.meshgrid(x_c, y_c)
-
 contour_levels = np.arange(
     round(np.nanmin(DEM_ARR) / interval) * interval,
     np.nanmax(DEM_ARR) + interval,
@@ -1711,10 +1949,10 @@ contour_levels = np.arange(
 )
 major_levels = contour_levels[::4]
 
-dem_filled_c = np.where(np.isnan(DEM_ARR), np.nanmean(DEM_ARR), DEM_ARR)
+dem_filled_c = np.where(DEM_NAN_MASK, np.nanmean(DEM_ARR), DEM_ARR)
 cs_minor = ax.contour(
-    XX,
-    YY,
+    GRID_X,
+    GRID_Y,
     dem_filled_c,
     levels=contour_levels,
     colors="saddlebrown",
@@ -1723,8 +1961,8 @@ cs_minor = ax.contour(
     zorder=3,
 )
 cs_major = ax.contour(
-    XX,
-    YY,
+    GRID_X,
+    GRID_Y,
     dem_filled_c,
     levels=major_levels,
     colors="saddlebrown",
@@ -1752,6 +1990,7 @@ finalize_and_save(fig, ax, utm_ext, "08_contour.png")
 
 print("[9/9] Pour points map...")
 fig, ax, utm_ext = base_axes("Pour Points (Snapped) on DEM")
+dem_p2, dem_p98 = cached_percentiles("dem", DEM_ARR, 2, 98)
 im = ax.imshow(
     DEM_ARR,
     extent=raster_extent(),
@@ -1759,8 +1998,8 @@ im = ax.imshow(
     cmap="terrain",
     alpha=0.65,
     zorder=1,
-    vmin=np.nanpercentile(DEM_ARR, 2),
-    vmax=np.nanpercentile(DEM_ARR, 98),
+    vmin=dem_p2,
+    vmax=dem_p98,
 )
 overlay_boundaries(ax)
 
@@ -2393,7 +2632,9 @@ df_kendall.to_csv(os.path.join(TABLES_DIR, "kendall_tau.csv"), index=False)
 
 # Save priority shapefile
 gdf_priority = gdf_sub.merge(ranking_table.reset_index(), on="basin_id", how="left")
-gdf_priority.to_file(os.path.join(SHAPES_DIR, "subbasins_priority.shp"))
+gdf_priority.to_file(
+    os.path.join(SHAPES_DIR, "subbasins_priority.shp"), engine=VECTOR_ENGINE
+)
 
 print(f"\n  ✅ Priority shapefile saved: {SHAPES_DIR}subbasins_priority.shp")
 print("\n✅ SECTION 6 complete.")
@@ -2859,7 +3100,7 @@ save_fig(fig, "11_priority_map")
 print("\n[12] Elevation profiles...")
 
 
-def extract_stream_profile(stream_gdf, dem_path, basin_id, n_points=200):
+def extract_stream_profile(stream_gdf, basin_id, n_points=200):
     """Sample DEM along the main river trunk (highest order stream segments) in a basin."""
     segs = stream_gdf[stream_gdf.get("basin_id", stream_gdf.index) == basin_id]
     if len(segs) == 0:
@@ -2883,21 +3124,22 @@ def extract_stream_profile(stream_gdf, dem_path, basin_id, n_points=200):
     if geom.geom_type != "LineString":
         return None, None, None
 
+    # All profile points in one shapely call, elevations gathered from the
+    # in-memory DEM (nodata already NaN); points off the grid stay NaN
     distances = np.linspace(0, geom.length, n_points)
-    pts = [geom.interpolate(d) for d in distances]
-
-    with rasterio.open(dem_path) as src:
-        elevations = []
-        for pt in pts:
-            r_idx, c_idx = rowcol(src.transform, pt.x, pt.y)
-            try:
-                elev = src.read(1)[r_idx, c_idx]
-                nodata = src.nodata if src.nodata else -9999
-                elevations.append(np.nan if elev == nodata else float(elev))
-            except IndexError:
-                elevations.append(np.nan)
+    pts = shapely.line_interpolate_point(geom, distances)
+    x, y = shapely.get_coordinates(pts).T
+    r_idx, c_idx = (np.asarray(a) for a in rowcol(DEM_TRANSFORM, x, y))
+    ok = (
+        (r_idx >= 0)
+        & (r_idx < DEM_ARR.shape[0])
+        & (c_idx >= 0)
+        & (c_idx < DEM_ARR.shape[1])
+    )
+    elevations = np.full(n_points, np.nan)
+    elevations[ok] = DEM_ARR[r_idx[ok], c_idx[ok]]
 
-    return np.array(distances / 1000), np.array(elevations), geom
+    return distances / 1000, elevations, geom
 
 
 fig_profiles = make_subplots(
@@ -2913,7 +3155,7 @@ for i, (_, row) in enumerate(gdf_sub.iterrows()):
     # Assign basin_id to stream order dataframe if not present
     if "basin_id" not in gdf_so_sub.columns:
         break
-    dist, elev, _ = extract_stream_profile(gdf_so_sub, RASTERS["dem"], bid)
+    dist, elev, _ = extract_stream_profile(gdf_so_sub, bid)
     if dist is None:
         continue
     valid = ~np.isnan(elev)
@@ -3322,16 +3564,23 @@ fig, ax, utm_ext = base_axes(
     "Index of Active Tectonics (IAT) — El Hamdouni et al., 2008"
 )
 
-for _, row in gdf_iat.iterrows():
-    color = iat_color_map.get(row["IAT_class"], "grey")
-    gpd.GeoDataFrame([row], geometry="geometry", crs=gdf_sub.crs).plot(
-        ax=ax, color=color, edgecolor="black", linewidth=1.2, alpha=0.75, zorder=3
-    )
-    cx, cy = row.geometry.centroid.x, row.geometry.centroid.y
+# One collection for all basins; only the labels need a per-basin loop
+gdf_iat.plot(
+    ax=ax,
+    color=gdf_iat["IAT_class"].map(iat_color_map).fillna("grey").tolist(),
+    edgecolor="black",
+    linewidth=1.2,
+    alpha=0.75,
+    zorder=3,
+)
+centroids = gdf_iat.geometry.centroid
+for bid, iat, cx, cy in zip(
+    gdf_iat["basin_id"], gdf_iat["IAT"], centroids.x, centroids.y
+):
     ax.text(
         cx,
         cy,
-        f"{row['basin_id']}\nIAT={row['IAT']:.2f}",
+        f"{bid}\nIAT={iat:.2f}",
         ha="center",
         va="center",
         fontsize=8,
@@ -3348,7 +3597,7 @@ ax.legend(
     title_fontsize=9,
     framealpha=0.9,
 )
-gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.6, alpha=0.5, zorder=5)
+add_stream_network(ax, linewidth=0.6, alpha=0.5, zorder=5)
 finalize_and_save(fig, ax, utm_ext, "10a_tectonic_IAT_map.png")
 
 # ── Plotly radar — tectonic scores ────────────────────────────────────────────
@@ -3443,8 +3692,8 @@ def compute_AF(basin_geom, stream_geom_longest):
     """
     try:
         # Project stream onto basin geometry: get bounding centroid axis
-        cx = basin_geom.centroid.x
-        cy = basin_geom.centroid.y
+        basin_c = basin_geom.centroid
+        cx, cy = basin_c.x, basin_c.y
         # Use stream bearing to define left/right
         coords = list(stream_geom_longest.coords)
         if len(coords) < 2:
@@ -3481,13 +3730,25 @@ def compute_AF(basin_geom, stream_geom_longest):
         return np.nan, np.nan, np.nan
 
 
+# Trunk stream of each basin — the longest segment within 50 m of its divide
+# (longest part if multi-part) — found once and shared by the AF and T loops
+SO_SEG_LENGTH = gdf_so.geometry.length
+BASIN_TRUNK = {}
+for bid, geom in zip(gdf_sub["basin_id"], gdf_sub.geometry):
+    inside = gdf_so.geometry.within(geom.buffer(50))
+    if not inside.any():
+        continue
+    longest = gdf_so.geometry.loc[SO_SEG_LENGTH[inside].idxmax()]
+    if longest.geom_type == "MultiLineString":
+        longest = max(longest.geoms, key=lambda g: g.length)
+    BASIN_TRUNK[bid] = longest
+
 AF_rows = []
 for _, row in gdf_sub.iterrows():
     bid = row["basin_id"]
     geom = row.geometry
-    # Longest stream in basin
-    segs = gdf_so[gdf_so.geometry.within(geom.buffer(50))]
-    if len(segs) == 0:
+    longest = BASIN_TRUNK.get(bid)
+    if longest is None:
         AF_rows.append(
             {
                 "basin_id": bid,
@@ -3497,9 +3758,6 @@ for _, row in gdf_sub.iterrows():
             }
         )
         continue
-    longest = segs.loc[segs.geometry.length.idxmax()].geometry
-    if longest.geom_type == "MultiLineString":
-        longest = max(longest.geoms, key=lambda g: g.length)
     AF_val, Ar, Al = compute_AF(geom, longest)
     AF_dev = abs(AF_val - 50) if not np.isnan(AF_val) else np.nan
     if np.isnan(AF_val):
@@ -3544,12 +3802,10 @@ def compute_T(basin_geom, trunk_stream_geom):
         stream_c = trunk_stream_geom.centroid
         Da = basin_c.distance(stream_c)
         # Dd: mean distance from centroid to boundary
-        boundary_pts = [
-            basin_geom.boundary.interpolate(basin_geom.boundary.length * f)
-            for f in np.linspace(0, 1, 200)
-        ]
-        dists_to_bdy = [basin_c.distance(p) for p in boundary_pts]
-        Dd = np.mean(dists_to_bdy)
+        boundary_pts = shapely.line_interpolate_point(
+            basin_geom.boundary, np.linspace(0, 1, 200), normalized=True
+        )
+        Dd = np.mean(shapely.distance(basin_c, boundary_pts))
         T = Da / Dd if Dd > 0 else np.nan
         return T, Da, Dd
     except Exception:
@@ -3560,13 +3816,10 @@ T_rows = []
 for _, row in gdf_sub.iterrows():
     bid = row["basin_id"]
     geom = row.geometry
-    segs = gdf_so[gdf_so.geometry.within(geom.buffer(50))]
-    if len(segs) == 0:
+    longest = BASIN_TRUNK.get(bid)
+    if longest is None:
         T_rows.append({"basin_id": bid, "T": np.nan, "T_class": "Unknown"})
         continue
-    longest = segs.loc[segs.geometry.length.idxmax()].geometry
-    if longest.geom_type == "MultiLineString":
-        longest = max(longest.geoms, key=lambda g: g.length)
     T_val, Da, Dd = compute_T(geom, longest)
     cls = (
         (
@@ -3605,57 +3858,73 @@ df_T = pd.DataFrame(T_rows).set_index("basin_id")
 print("\n[C] Valley Floor Width-to-Height Ratio (Vf)...")
 
 
-def compute_Vf_at_outlet(basin_geom, dem_path, n_transects=5, transect_frac=0.15):
+def compute_Vf_at_outlet(
+    basin_geoms,
+    dem_arr,
+    dem_transform,
+    n_transects=5,
+    transect_frac=0.15,
+    n_samples=100,
+):
     """
-    Sample cross-valley transects near the outlet.
-    Returns mean Vf across transects.
+    Sample cross-valley transects near the outlet of every basin at once.
+    All basins share the same (n_transects × n_samples) swath layout, so the
+    DEM is sampled with one fancy-index into a (N, n_transects, n_samples)
+    stack and Vf is reduced along the sample axis.
+    Returns an array with the mean Vf across transects for each basin.
     """
-    Vf_vals = []
-    bounds = basin_geom.bounds
+    bounds = np.array([g.bounds for g in basin_geoms], dtype=float)
+    x_min, y_min, x_max, y_max = bounds.T
     y_sample = np.linspace(
-        bounds[1] + (bounds[3] - bounds[1]) * 0.05,
-        bounds[1] + (bounds[3] - bounds[1]) * transect_frac,
+        y_min + (y_max - y_min) * 0.05,
+        y_min + (y_max - y_min) * transect_frac,
         n_transects,
+        axis=1,
     )
-    x_min, x_max = bounds[0], bounds[2]
-
-    with rasterio.open(dem_path) as src:
-        for y in y_sample:
-            # horizontal transect
-            pts_x = np.linspace(x_min, x_max, 100)
-            elevs = []
-            for px in pts_x:
-                try:
-                    r_i, c_i = rowcol(src.transform, px, y)
-                    e = src.read(1)[r_i, c_i]
-                    nd = src.nodata if src.nodata else -9999
-                    elevs.append(np.nan if e == nd else float(e))
-                except:
-                    elevs.append(np.nan)
-            elevs = np.array(elevs)
-            valid = ~np.isnan(elevs)
-            if valid.sum() < 10:
-                continue
-            Esc = np.nanmin(elevs)  # valley floor elevation
-            Eld = np.nanpercentile(elevs, 95)  # left wall (approx)
-            Erd = Eld  # symmetric approximation
-            # Vfw: width of cells within 10% above minimum
-            threshold = Esc + (Eld - Esc) * 0.10
-            Vfw_cells = np.sum(elevs[valid] <= threshold)
-            cell_size = (x_max - x_min) / 100
-            Vfw_m = Vfw_cells * cell_size
-            denom = (Eld - Esc) + (Erd - Esc)
-            if denom > 0:
-                Vf_vals.append((2 * Vfw_m) / denom)
-
-    return np.nanmean(Vf_vals) if Vf_vals else np.nan
-
+    pts_x = np.linspace(x_min, x_max, n_samples, axis=1)
+    xs = np.broadcast_to(pts_x[:, None, :], (len(bounds), n_transects, n_samples))
+    ys = np.broadcast_to(y_sample[:, :, None], xs.shape)
+
+    rows, cols = _xy_to_rc(xs, ys, ~dem_transform)
+    inside = (
+        (rows >= 0)
+        & (rows < dem_arr.shape[0])
+        & (cols >= 0)
+        & (cols < dem_arr.shape[1])
+    )
+    elevs = np.full(xs.shape, np.nan)
+    elevs[inside] = dem_arr[rows[inside], cols[inside]]
+
+    # NaNs sort to the end, so the first n_valid entries are the valid samples
+    n_valid = np.sum(~np.isnan(elevs), axis=2)
+    elevs_sorted = np.sort(elevs, axis=2)
+    Esc = elevs_sorted[..., 0]  # valley floor elevation
+    # 95th percentile (numpy "linear" rule) read straight off the sorted swath
+    pos = 0.95 * np.maximum(n_valid - 1, 0)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, np.maximum(n_valid - 1, 0))
+    e_lo = np.take_along_axis(elevs_sorted, lo[..., None], axis=2)[..., 0]
+    e_hi = np.take_along_axis(elevs_sorted, hi[..., None], axis=2)[..., 0]
+    Eld = e_lo + (e_hi - e_lo) * (pos - lo)  # left wall (approx)
+    Erd = Eld  # symmetric approximation
+
+    # Vfw: width of cells within 10% above minimum
+    threshold = Esc + (Eld - Esc) * 0.10
+    Vfw_cells = np.sum(elevs <= threshold[..., None], axis=2)
+    cell_size = (x_max - x_min) / n_samples
+    Vfw_m = Vfw_cells * cell_size[:, None]
+    denom = (Eld - Esc) + (Erd - Esc)
+
+    ok = (n_valid >= 10) & (denom > 0)
+    Vf_t = np.where(ok, (2 * Vfw_m) / np.where(ok, denom, 1.0), np.nan)
+    n_ok = ok.sum(axis=1)
+    return np.where(n_ok > 0, np.nansum(Vf_t, axis=1) / np.maximum(n_ok, 1), np.nan)
+
+
+Vf_all = compute_Vf_at_outlet(gdf_sub.geometry.values, DEM_ARR, DEM_TRANSFORM)
 
 Vf_rows = []
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = row.geometry
-    Vf = compute_Vf_at_outlet(geom, RASTERS["dem"])
+for bid, Vf in zip(gdf_sub["basin_id"], Vf_all):
     cls = (
         (
             "V-shaped valley (active uplift)"
@@ -3691,29 +3960,30 @@ df_Vf = pd.DataFrame(Vf_rows).set_index("basin_id")
 print("\n[D] Mountain Front Sinuosity (Smf)...")
 
 
-def compute_Smf(basin_geom):
+def compute_Smf(basin_geoms):
     """
     Use the lower boundary segment of each subbasin as mountain front proxy.
     Lmf = actual perimeter of lower 25% of basin extent
     Ls  = straight-line distance of same extent
+    Vectorised over all basins with shapely 2.0 array ops.
     """
-    try:
-        bounds = basin_geom.bounds
-        y_thresh = bounds[1] + (bounds[3] - bounds[1]) * 0.25
-        lower = basin_geom.intersection(box(bounds[0], bounds[1], bounds[2], y_thresh))
-        if lower.is_empty:
-            return np.nan
-        Lmf = lower.boundary.length if hasattr(lower, "boundary") else lower.length
-        Ls = np.sqrt((bounds[2] - bounds[0]) ** 2)  # E-W extent of lower portion
-        return Lmf / Ls if Ls > 0 else np.nan
-    except Exception:
-        return np.nan
+    geoms = np.asarray(basin_geoms, dtype=object)
+    bnds = shapely.bounds(geoms)
+    y_thresh = bnds[:, 1] + (bnds[:, 3] - bnds[:, 1]) * 0.25
+    lowers = shapely.intersection(
+        geoms, shapely.box(bnds[:, 0], bnds[:, 1], bnds[:, 2], y_thresh)
+    )
+    # boundary() of a mixed GeometryCollection is None → length NaN
+    Lmf = shapely.length(shapely.boundary(lowers))
+    Ls = bnds[:, 2] - bnds[:, 0]  # E-W extent of lower portion
+    valid = ~shapely.is_empty(lowers) & (Ls > 0)
+    return np.where(valid, Lmf / np.where(Ls > 0, Ls, 1.0), np.nan)
 
 
+Smf_all = compute_Smf(gdf_sub.geometry.values)
+
 Smf_rows = []
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    Smf = compute_Smf(row.geometry)
+for bid, Smf in zip(gdf_sub["basin_id"], Smf_all):
     cls = (
         (
             "Straight/active front"
@@ -3800,13 +4070,15 @@ def iat_class(iat):
     return "Class 4 — Low"
 
 
-IAT_rows = []
-for bid in gdf_sub["basin_id"]:
-    AF_v = df_AF.loc[bid, "AF"] if bid in df_AF.index else np.nan
-    T_v = df_T.loc[bid, "T"] if bid in df_T.index else np.nan
-    Vf_v = df_Vf.loc[bid, "Vf"] if bid in df_Vf.index else np.nan
-    Smf_v = df_Smf.loc[bid, "Smf"] if bid in df_Smf.index else np.nan
+# Align all four indices to basin order once (missing basins → NaN)
+basin_ids = gdf_sub["basin_id"].values
+AF_all = df_AF["AF"].reindex(basin_ids).to_numpy(dtype=float)
+T_all = df_T["T"].reindex(basin_ids).to_numpy(dtype=float)
+Vf_all = df_Vf["Vf"].reindex(basin_ids).to_numpy(dtype=float)
+Smf_all = df_Smf["Smf"].reindex(basin_ids).to_numpy(dtype=float)
 
+IAT_rows = []
+for bid, AF_v, T_v, Vf_v, Smf_v in zip(basin_ids, AF_all, T_all, Vf_all, Smf_all):
     s_AF, s_T, s_Vf, s_Smf = (
         score_AF(AF_v),
         score_T(T_v),
@@ -3856,16 +4128,23 @@ fig, ax, utm_ext = base_axes(
     "Index of Active Tectonics (IAT) — El Hamdouni et al., 2008"
 )
 
-for _, row in gdf_iat.iterrows():
-    color = iat_color_map.get(row["IAT_class"], "grey")
-    gpd.GeoDataFrame([row], geometry="geometry", crs=gdf_sub.crs).plot(
-        ax=ax, color=color, edgecolor="black", linewidth=1.2, alpha=0.75, zorder=3
-    )
-    cx, cy = row.geometry.centroid.x, row.geometry.centroid.y
+# One collection for all basins; only the labels need a per-basin loop
+gdf_iat.plot(
+    ax=ax,
+    color=gdf_iat["IAT_class"].map(iat_color_map).fillna("grey").tolist(),
+    edgecolor="black",
+    linewidth=1.2,
+    alpha=0.75,
+    zorder=3,
+)
+centroids = gdf_iat.geometry.centroid
+for bid, iat, cx, cy in zip(
+    gdf_iat["basin_id"], gdf_iat["IAT"], centroids.x, centroids.y
+):
     ax.text(
         cx,
         cy,
-        f"{row['basin_id']}\nIAT={row['IAT']:.2f}",
+        f"{bid}\nIAT={iat:.2f}",
         ha="center",
         va="center",
         fontsize=8,
@@ -3882,7 +4161,7 @@ ax.legend(
     title_fontsize=9,
     framealpha=0.9,
 )
-gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.6, alpha=0.5, zorder=5)
+add_stream_network(ax, linewidth=0.6, alpha=0.5, zorder=5)
 finalize_and_save(fig, ax, utm_ext, "10a_tectonic_IAT_map.png")
 
 # ── Plotly radar — tectonic scores ────────────────────────────────────────────
@@ -3942,187 +4221,131 @@ print("=" * 60)
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def calculate_sl_index(stream_gdf, dem_arr, dem_transform, k=10):
+def longest_line_parts(geoms):
+    """
+    Reduce each geometry to its longest single part (MultiLineString → the
+    longest LineString; LineStrings pass through). Vectorised with shapely 2.0.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    parts, owner = shapely.get_parts(geoms, return_index=True)
+    order = np.lexsort((-shapely.length(parts), owner))
+    _, first = np.unique(owner[order], return_index=True)
+    longest = np.full(len(geoms), None, dtype=object)
+    longest[owner[order][first]] = parts[order][first]
+    return longest
+
+
+def sample_stream_vertices(geoms, dem_arr, flow_acc_arr, slope_arr, dem_transform):
+    """
+    Single sampling pass shared by SL, SPI, STI and SI.
+    Every vertex of every segment (longest part of multi-lines) is mapped to
+    the DEM grid once and DEM / flow-acc / slope are read with one fancy index.
+    Returns a dict of per-vertex arrays ("seg" = owning segment) and
+    per-segment arrays ("length", "is_line", "first", "last").
+    """
+    lines = longest_line_parts(geoms)
+    n = len(lines)
+    xy_arr, seg = shapely.get_coordinates(lines, return_index=True)
+    rows, cols = _xy_to_rc(xy_arr[:, 0], xy_arr[:, 1], ~dem_transform)
+    inside = (
+        (rows >= 0)
+        & (rows < dem_arr.shape[0])
+        & (cols >= 0)
+        & (cols < dem_arr.shape[1])
+    )
+    r_in, c_in = rows[inside], cols[inside]
+    samples = {"seg": seg, "xy": xy_arr, "n": n}
+    for key, arr in (("elev", dem_arr), ("fa", flow_acc_arr), ("slope", slope_arr)):
+        vals = np.full(len(seg), np.nan)
+        vals[inside] = arr[r_in, c_in]
+        samples[key] = vals
+    length = shapely.length(lines)
+    samples["length"] = length
+    samples["is_line"] = (shapely.get_type_id(lines) == 1) & (length > 0)
+    # Vertices are grouped by segment → first / last vertex of each segment
+    samples["first"] = np.searchsorted(seg, np.arange(n), side="left")
+    samples["last"] = np.searchsorted(seg, np.arange(n), side="right") - 1
+    return samples
+
+
+def _segment_mean(values, seg, n, valid=None):
+    """Per-segment mean of values[valid]; NaN for segments with no valid vertex."""
+    if valid is not None:
+        values, seg = values[valid], seg[valid]
+    sums = np.bincount(seg, weights=values, minlength=n)
+    counts = np.bincount(seg, minlength=n)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def calculate_sl_index(samples, k=10):
     """
     Calculate Stream Length-gradient (SL) index for each stream segment.
     SL = (dH/dL) * L.
     dH/dL is local gradient, L is total channel length upstream (approximated).
-    The local gradient is calculated over a window of k cells.
+    The local gradient is calculated over a window of k valid vertices.
     """
-    sl_indices = []
-    for idx, row in stream_gdf.iterrows():
-        geom = row.geometry
-        if geom.geom_type == "MultiLineString":
-            geom = max(geom.geoms, key=lambda g: g.length)
-        if geom.geom_type != "LineString" or geom.length == 0:
-            sl_indices.append(np.nan)
-            continue
-
-        coords = list(geom.coords)
-        if len(coords) < 2:
-            sl_indices.append(np.nan)
-            continue
-
-        # Sample elevation along the stream
-        elevations = []
-        for p in coords:
-            row_idx, col_idx = rasterio.transform.rowcol(dem_transform, p[0], p[1])
-            if 0 <= row_idx < dem_arr.shape[0] and 0 <= col_idx < dem_arr.shape[1]:
-                elevations.append(dem_arr[row_idx, col_idx])
-            else:
-                elevations.append(np.nan)
-        elevations = np.array(elevations)
-
-        # Remove NaNs and corresponding coordinates
-        valid_indices = ~np.isnan(elevations)
-        elevations_valid = elevations[valid_indices]
-        coords_valid = np.array(coords)[valid_indices]
-
-        if len(elevations_valid) < 2:
-            sl_indices.append(np.nan)
-            continue
-
-        # Calculate local gradient (dH/dL) over a window of k points
-        gradients = []
-        for i in range(len(elevations_valid) - k):
-            p1 = coords_valid[i]
-            p2 = coords_valid[i + k]
-            dist = np.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
-            if dist > 0:
-                grad = (elevations_valid[i] - elevations_valid[i + k]) / dist
-                gradients.append(grad)
-
-        if not gradients:
-            sl_indices.append(np.nan)
-            continue
-
-        local_gradient = np.nanmean(gradients)  # Average gradient over segment
-
-        # Approximate upstream length as the total length of the segment
-        # A more rigorous approach would trace upstream from the pour point
-        L_upstream = geom.length  # Approximation
-
-        sl_index = local_gradient * L_upstream
-        sl_indices.append(sl_index)
-    return sl_indices
-
-
-def calculate_spi(stream_gdf, flow_acc_arr, slope_arr, dem_res, threshold=1e-6):
+    n = samples["n"]
+    valid = ~np.isnan(samples["elev"])
+    seg = samples["seg"][valid]
+    elev = samples["elev"][valid]
+    xy_v = samples["xy"][valid]
+
+    # Vertex pairs (i, i+k) that stay within the same segment
+    same = seg[:-k] == seg[k:] if len(seg) > k else np.zeros(0, dtype=bool)
+    i0 = np.nonzero(same)[0]
+    i1 = i0 + k
+    dist = np.hypot(*(xy_v[i1] - xy_v[i0]).T)
+    ok = dist > 0
+    grads = (elev[i0[ok]] - elev[i1[ok]]) / dist[ok]
+    # Average gradient over segment
+    local_gradient = _segment_mean(grads, seg[i0[ok]], n)
+
+    # Approximate upstream length as the total length of the segment
+    # A more rigorous approach would trace upstream from the pour point
+    L_upstream = samples["length"]  # Approximation
+    return np.where(samples["is_line"], local_gradient * L_upstream, np.nan)
+
+
+def _segment_fa_slope(samples):
+    """Mean flow accumulation and slope (deg) over vertices where both exist."""
+    valid = ~np.isnan(samples["fa"]) & ~np.isnan(samples["slope"])
+    seg, n = samples["seg"], samples["n"]
+    mean_fa = _segment_mean(samples["fa"], seg, n, valid)
+    mean_slope = _segment_mean(samples["slope"], seg, n, valid)
+    mean_fa[~samples["is_line"]] = np.nan
+    return mean_fa, mean_slope
+
+
+def calculate_spi(samples, dem_res, threshold=1e-6):
     """
     Calculate Stream Power Index (SPI) for each stream segment.
     SPI = As * tan(beta), where As is contributing area, beta is slope.
     Approximates As with flow accumulation * cell_area.
     """
-    spi_values = []
-    for idx, row in stream_gdf.iterrows():
-        geom = row.geometry
-        if geom.geom_type == "MultiLineString":
-            geom = max(geom.geoms, key=lambda g: g.length)
-        if geom.geom_type != "LineString" or geom.length == 0:
-            spi_values.append(np.nan)
-            continue
-
-        coords = list(geom.coords)
-        fa_values = []
-        slope_values = []
-
-        for p in coords:
-            row_idx, col_idx = rasterio.transform.rowcol(DEM_TRANSFORM, p[0], p[1])
-            if (
-                0 <= row_idx < flow_acc_arr.shape[0]
-                and 0 <= col_idx < flow_acc_arr.shape[1]
-            ):
-                fa_values.append(flow_acc_arr[row_idx, col_idx])
-                slope_values.append(slope_arr[row_idx, col_idx])
-            else:
-                fa_values.append(np.nan)
-                slope_values.append(np.nan)
-
-        fa_values = np.array(fa_values)
-        slope_values = np.array(slope_values)
-
-        valid_indices = ~np.isnan(fa_values) & ~np.isnan(slope_values)
-        if not np.any(valid_indices):
-            spi_values.append(np.nan)
-            continue
-
-        # Use mean flow accumulation and slope for the segment
-        mean_fa = np.nanmean(fa_values[valid_indices])
-        mean_slope = np.nanmean(slope_values[valid_indices])  # in degrees
-
-        # Convert slope to radians for tan function
-        mean_slope_rad = np.radians(mean_slope)
-
-        # As (contributing area) = flow_accumulation * cell_area
-        cell_area = dem_res * dem_res  # m^2
-        As = mean_fa * cell_area
-
-        # Avoid division by zero or tan(90 deg)
-        tan_beta = np.tan(mean_slope_rad)
-        if tan_beta < threshold:  # Set a small threshold for very flat areas
-            tan_beta = threshold
+    mean_fa, mean_slope = _segment_fa_slope(samples)
 
-        spi = As * tan_beta
-        spi_values.append(spi)
+    # As (contributing area) = flow_accumulation * cell_area
+    cell_area = dem_res * dem_res  # m^2
+    As = mean_fa * cell_area
 
-    return spi_values
+    # Set a small threshold for very flat areas (NaN propagates)
+    tan_beta = np.maximum(np.tan(np.radians(mean_slope)), threshold)
+    return As * tan_beta
 
 
-def calculate_sti(stream_gdf, flow_acc_arr, slope_arr, dem_res, threshold=1e-6):
+def calculate_sti(samples, dem_res, threshold=1e-6):
     """
     Calculate Sediment Transport Index (STI) for each stream segment.
     STI = (As * sin(beta)). Simplified version for segments.
     Approximates As with flow accumulation * cell_area.
     """
-    sti_values = []
-    for idx, row in stream_gdf.iterrows():
-        geom = row.geometry
-        if geom.geom_type == "MultiLineString":
-            geom = max(geom.geoms, key=lambda g: g.length)
-        if geom.geom_type != "LineString" or geom.length == 0:
-            sti_values.append(np.nan)
-            continue
-
-        coords = list(geom.coords)
-        fa_values = []
-        slope_values = []
-
-        for p in coords:
-            row_idx, col_idx = rasterio.transform.rowcol(DEM_TRANSFORM, p[0], p[1])
-            if (
-                0 <= row_idx < flow_acc_arr.shape[0]
-                and 0 <= col_idx < flow_acc_arr.shape[1]
-            ):
-                fa_values.append(flow_acc_arr[row_idx, col_idx])
-                slope_values.append(slope_arr[row_idx, col_idx])
-            else:
-                fa_values.append(np.nan)
-                slope_values.append(np.nan)
-
-        fa_values = np.array(fa_values)
-        slope_values = np.array(slope_values)
-
-        valid_indices = ~np.isnan(fa_values) & ~np.isnan(slope_values)
-        if not np.any(valid_indices):
-            sti_values.append(np.nan)
-            continue
-
-        mean_fa = np.nanmean(fa_values[valid_indices])
-        mean_slope = np.nanmean(slope_values[valid_indices])  # in degrees
-
-        mean_slope_rad = np.radians(mean_slope)
-        As = (
-            mean_fa * dem_res
-        )  # Specific catchment area (m) for unit contour length (simplified)
-
-        sin_beta = np.sin(mean_slope_rad)
-        if sin_beta < threshold:
-            sin_beta = threshold
+    mean_fa, mean_slope = _segment_fa_slope(samples)
 
-        sti = As * sin_beta
-        sti_values.append(sti)
+    # Specific catchment area (m) for unit contour length (simplified)
+    As = mean_fa * dem_res
 
-    return sti_values
+    sin_beta = np.maximum(np.sin(np.radians(mean_slope)), threshold)
+    return As * sin_beta
 
 
 def calculate_twi(dem_arr, dem_res):
@@ -4169,27 +4392,24 @@ def rasterize_segment_attribute(
     Values are burned along the line's path, taking the max value if multiple lines cross.
     """
     raster = np.full(dem_arr_shape, np.nan, dtype=np.float32)
+    inv = ~dem_transform
 
     for _, row in gdf[gdf[attribute_col].notna()].iterrows():
         geom = row.geometry
         val = row[attribute_col]
-        if geom.geom_type == "MultiLineString":
-            for single_line in geom.geoms:
-                for x, y in single_line.coords:
-                    r_idx, c_idx = rasterio.transform.rowcol(dem_transform, x, y)
-                    if 0 <= r_idx < dem_arr_shape[0] and 0 <= c_idx < dem_arr_shape[1]:
-                        if np.isnan(raster[r_idx, c_idx]):
-                            raster[r_idx, c_idx] = val
-                        else:
-                            raster[r_idx, c_idx] = max(raster[r_idx, c_idx], val)
-        elif geom.geom_type == "LineString":
-            for x, y in geom.coords:
-                r_idx, c_idx = rasterio.transform.rowcol(dem_transform, x, y)
-                if 0 <= r_idx < dem_arr_shape[0] and 0 <= c_idx < dem_arr_shape[1]:
-                    if np.isnan(raster[r_idx, c_idx]):
-                        raster[r_idx, c_idx] = val
-                    else:
-                        raster[r_idx, c_idx] = max(raster[r_idx, c_idx], val)
+        if geom.geom_type not in ("LineString", "MultiLineString"):
+            continue
+        xy_arr = shapely.get_coordinates(geom)
+        r_idx, c_idx = _xy_to_rc(xy_arr[:, 0], xy_arr[:, 1], inv)
+        inside = (
+            (r_idx >= 0)
+            & (r_idx < dem_arr_shape[0])
+            & (c_idx >= 0)
+            & (c_idx < dem_arr_shape[1])
+        )
+        r_idx, c_idx = r_idx[inside], c_idx[inside]
+        # np.fmax keeps val where the cell is still NaN, else the larger value
+        raster[r_idx, c_idx] = np.fmax(raster[r_idx, c_idx], val)
 
     # Fill remaining NaNs with nodata_val for rasterio compatibility
     raster[np.isnan(raster)] = nodata_val
@@ -4203,40 +4423,46 @@ def rasterize_segment_attribute(
 print("\n[A] Computing Stream Length-gradient (SL) Index...")
 
 # Join stream segments to subbasins for basin_id access
-gdf_so_with_basin_id = (
-    gpd.sjoin(
-        gdf_so.copy(),
+gdf_so_with_basin_id = gpd.sjoin(
+    gdf_so.copy(),
+    gdf_sub[["basin_id", "geometry"]],
+    how="left",
+    predicate="intersects",
+).drop(columns=["index_right"])
+
+# Segments that miss every basin by less than one cell (digitising gaps along
+# the divide) are snapped to the nearest basin; the rest are dropped
+unmatched = gdf_so_with_basin_id["basin_id"].isna()
+if unmatched.any():
+    snapped = gpd.sjoin_nearest(
+        gdf_so_with_basin_id.loc[unmatched].drop(columns=["basin_id"]),
         gdf_sub[["basin_id", "geometry"]],
         how="left",
-        predicate="intersects",
+        max_distance=DEM_RES,
     )
-    .drop(columns=["index_right"])
-    .dropna(subset=["basin_id"])
-)
-
-# Ensure basin_id is set correctly for all segments
-if "basin_id" not in gdf_so_with_basin_id.columns:
-    # Fallback if sjoin fails to assign basin_id consistently
-    gdf_so_with_basin_id["basin_id"] = None
-    for bid in gdf_sub["basin_id"].unique():
-        basin_geom = gdf_sub[gdf_sub["basin_id"] == bid].geometry.iloc[0]
-        # Find streams within this basin
-        streams_in_basin = gdf_so_with_basin_id.geometry.apply(
-            lambda x: x.intersects(basin_geom)
-        )
-        gdf_so_with_basin_id.loc[streams_in_basin, "basin_id"] = bid
+    snapped = snapped[~snapped.index.duplicated(keep="first")]
+    gdf_so_with_basin_id.loc[unmatched, "basin_id"] = (
+        snapped["basin_id"].reindex(gdf_so_with_basin_id.index[unmatched]).to_numpy()
+    )
+gdf_so_with_basin_id = gdf_so_with_basin_id.dropna(subset=["basin_id"])
 
 # Calculate SL index for each segment
 # Using gdf_so (stream order segments) as the base for SL calculations
 gdf_SL = gdf_so_with_basin_id.copy()
-gdf_SL["SL_index"] = calculate_sl_index(gdf_SL, DEM_ARR, DEM_TRANSFORM)
+# One vertex sampling pass reused by SL, SPI, STI (S11) and SI (S12)
+SEG_SAMPLES = sample_stream_vertices(
+    gdf_SL.geometry.values, DEM_ARR, FACC_ARR, SLOPE_ARR, DEM_TRANSFORM
+)
+gdf_SL["SL_index"] = calculate_sl_index(SEG_SAMPLES)
 
 # Calculate SL anomaly (deviation from mean for its order)
-mean_sl_per_order = gdf_SL.groupby(ORDER_COL)["SL_index"].mean()
-std_sl_per_order = gdf_SL.groupby(ORDER_COL)["SL_index"].std()
-
-gdf_SL["mean_SL_order"] = gdf_SL[ORDER_COL].map(mean_sl_per_order)
-gdf_SL["std_SL_order"] = gdf_SL[ORDER_COL].map(std_sl_per_order)
+# One groupby pass for mean + std, one join back (join keeps gdf_SL's index)
+sl_order_stats = (
+    gdf_SL.groupby(ORDER_COL)["SL_index"]
+    .agg(["mean", "std"])
+    .rename(columns={"mean": "mean_SL_order", "std": "std_SL_order"})
+)
+gdf_SL = gdf_SL.join(sl_order_stats, on=ORDER_COL)
 
 # SL anomaly is deviation from mean SL for its order, normalized by std dev
 gdf_SL["SL_anomaly"] = (gdf_SL["SL_index"] - gdf_SL["mean_SL_order"]) / gdf_SL[
@@ -4256,7 +4482,7 @@ SL_per_basin = (
 print("  SL Anomaly per basin (mean/max):")
 print(SL_per_basin.to_string())
 SL_per_basin.to_csv(os.path.join(TABLES_DIR, "sl_anomaly_per_basin.csv"))
-gdf_SL.to_file(os.path.join(SHAPES_DIR, "streams_sl_anomaly.shp"))
+save_vector(gdf_SL, "streams_sl_anomaly")
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  B. STREAM POWER INDEX (SPI)
@@ -4264,7 +4490,7 @@ gdf_SL.to_file(os.path.join(SHAPES_DIR, "streams_sl_anomaly.shp"))
 
 print("\n[B] Computing Stream Power Index (SPI)...")
 
-gdf_SL["SPI"] = calculate_spi(gdf_SL, FACC_ARR, SLOPE_ARR, DEM_RES)
+gdf_SL["SPI"] = calculate_spi(SEG_SAMPLES, DEM_RES)
 
 SPI_per_basin = (
     gdf_SL.groupby("basin_id")["SPI"]
@@ -4288,7 +4514,7 @@ print(f"  SPI raster range: {np.nanmin(SPI_ARR):.3f} – {np.nanmax(SPI_ARR):.3f
 
 print("\n[C] Computing Sediment Transport Index (STI)...")
 
-gdf_SL["STI"] = calculate_sti(gdf_SL, FACC_ARR, SLOPE_ARR, DEM_RES)
+gdf_SL["STI"] = calculate_sti(SEG_SAMPLES, DEM_RES)
 
 STI_per_basin = (
     gdf_SL.groupby("basin_id")["STI"]
@@ -4317,20 +4543,13 @@ save_raster(TWI_ARR, os.path.join(OUT_DIR, "twi.tif"), RASTERS["dem"])
 RASTERS["twi"] = os.path.join(OUT_DIR, "twi.tif")
 print(f"  TWI range: {np.nanmin(TWI_ARR):.3f} – {np.nanmax(TWI_ARR):.3f}")
 
-# Per-basin TWI statistics
+# Per-basin TWI statistics — in-memory masks instead of re-reading twi.tif
 TWI_basin = []
-for _, row in gdf_sub.iterrows():
-    geom = [row.geometry.__geo_interface__]
-    with rasterio.open(os.path.join(OUT_DIR, "twi.tif")) as src:
-        try:
-            arr_m, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            twi_clip = arr_m[0]
-            twi_clip[twi_clip == -9999] = np.nan
-        except:
-            twi_clip = TWI_ARR.copy()
+for bid, m in BASIN_MASKS.items():
+    twi_clip = TWI_ARR[m] if m.any() else TWI_ARR
     TWI_basin.append(
         {
-            "basin_id": row["basin_id"],
+            "basin_id": bid,
             "TWI_mean": round(float(np.nanmean(twi_clip)), 4),
             "TWI_max": round(float(np.nanmax(twi_clip)), 4),
             "TWI_std": round(float(np.nanstd(twi_clip)), 4),
@@ -4364,20 +4583,19 @@ from scipy.ndimage import (
 print("\n[A] Channel Sinuosity Index (SI)...")
 
 
-def compute_sinuosity(geom):
+def compute_sinuosity(samples, min_length):
     """SI = channel length / straight-line distance between endpoints."""
-    if geom.geom_type == "MultiLineString":
-        geom = max(geom.geoms, key=lambda g: g.length)
-    if geom.geom_type != "LineString" or geom.length < DEM_RES:
-        return np.nan
-    coords = list(geom.coords)
-    straight = np.sqrt(
-        (coords[-1][0] - coords[0][0]) ** 2 + (coords[-1][1] - coords[0][1]) ** 2
-    )
-    return geom.length / straight if straight > 0 else np.nan
+    length, valid = samples["length"], samples["is_line"].copy()
+    valid &= length >= min_length
+    xy_arr = samples["xy"]
+    straight = np.zeros(samples["n"])
+    first, last = samples["first"][valid], samples["last"][valid]
+    straight[valid] = np.hypot(*(xy_arr[last] - xy_arr[first]).T)
+    valid &= straight > 0
+    return np.where(valid, length / np.where(valid, straight, 1.0), np.nan)
 
 
-gdf_SL["SI"] = gdf_SL["geometry"].apply(compute_sinuosity)
+gdf_SL["SI"] = compute_sinuosity(SEG_SAMPLES, DEM_RES)
 SI_per_basin = (
     gdf_SL.groupby("basin_id")["SI"]
     .agg(SI_mean="mean", SI_max="max", SI_std="std")
@@ -4420,76 +4638,122 @@ def normalise_0_1(arr):
     return (arr - mn) / (mx - mn)
 
 
-# Rasterise SL anomaly: burn each segment's SL_anomaly value onto raster
-SL_anomaly_raster = np.full(DEM_ARR.shape, np.nan, dtype=np.float32)
-with rasterio.open(RASTERS["dem"]) as src:
-    transform_r = src.transform
-    for _, seg in gdf_SL[gdf_SL["SL_anomaly"].notna()].iterrows():
-        geom = seg["geometry"]
-        pts = [geom.interpolate(f, normalized=True) for f in np.linspace(0, 1, 20)]
-        for pt in pts:
-            try:
-                r_i, c_i = rowcol(transform_r, pt.x, pt.y)
-                if (
-                    0 <= r_i < SL_anomaly_raster.shape[0]
-                    and 0 <= c_i < SL_anomaly_raster.shape[1]
-                ):
-                    existing = SL_anomaly_raster[r_i, c_i]
-                    val = seg["SL_anomaly"]
-                    SL_anomaly_raster[r_i, c_i] = (
-                        val if np.isnan(existing) else max(existing, val)
-                    )
-            except:
-                pass
-
-# Fill gaps with Gaussian spread (proximity decay)
+# Rasterise SL anomaly: burn each segment's SL_anomaly value onto raster.
+# Segments are burned in ascending order so the cell keeps the max value;
+# all_touched gives connected channel lines without point sampling.
+sl_segs = gdf_SL[gdf_SL["SL_anomaly"].notna()].sort_values("SL_anomaly")
+if len(sl_segs):
+    SL_anomaly_raster = rasterize(
+        zip(sl_segs.geometry, sl_segs["SL_anomaly"]),
+        out_shape=DEM_ARR.shape,
+        transform=DEM_TRANSFORM,
+        fill=np.nan,
+        dtype="float32",
+        all_touched=True,
+    )
+else:
+    SL_anomaly_raster = np.full(DEM_ARR.shape, np.nan, dtype=np.float32)
+
+# Light Gaussian spread (proximity decay) — lines are already connected
 mask_sl = ~np.isnan(SL_anomaly_raster)
 SL_filled = np.where(mask_sl, SL_anomaly_raster, 0)
-SL_spread = gaussian_filter(SL_filled, sigma=5)
-SL_spread[np.isnan(DEM_ARR)] = np.nan
+SL_spread = gaussian_filter(SL_filled, sigma=1)
+SL_spread[DEM_NAN_MASK] = np.nan
+
+
+def _inv_range(mn, mx):
+    """1 / (mx - mn), or 0 for a flat raster (normalises to all zeros)."""
+    return 1.0 / (mx - mn) if mx > mn else 0.0
 
-# TRI already computed: TRI_ARR
-# TWI inverted: high TWI = flat = low anomaly → invert
-TWI_inv = np.nanmax(TWI_ARR) - TWI_ARR
 
-# Composite GAI
-n_SL = normalise_0_1(SL_spread)
-n_TRI = normalise_0_1(TRI_ARR)
-n_TWI = normalise_0_1(TWI_inv)
+def _gai_numpy(
+    sl, tri, twi, sl_min, sl_scale, tri_min, tri_scale, twi_max, twi_scale, dem, out
+):
+    out[:] = (
+        (sl - sl_min) * sl_scale * 0.5
+        + (tri - tri_min) * tri_scale * 0.3
+        + (twi_max - twi) * twi_scale * 0.2
+    )
+    out[np.isnan(dem)] = np.nan
+    return out
+
 
-GAI = n_SL * 0.5 + n_TRI * 0.3 + n_TWI * 0.2
-GAI[np.isnan(DEM_ARR)] = np.nan
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _gai_kernel(
+        sl, tri, twi, sl_min, sl_scale, tri_min, tri_scale, twi_max, twi_scale, dem, out
+    ):
+        for i in prange(dem.shape[0]):
+            for j in range(dem.shape[1]):
+                if np.isnan(dem[i, j]):
+                    out[i, j] = np.nan
+                    continue
+                n_sl = (sl[i, j] - sl_min) * sl_scale
+                n_tri = (tri[i, j] - tri_min) * tri_scale
+                n_twi = (twi_max - twi[i, j]) * twi_scale
+                out[i, j] = 0.5 * n_sl + 0.3 * n_tri + 0.2 * n_twi
+        return out
+
+else:
+    _gai_kernel = _gai_numpy
+
+
+# TRI already computed: TRI_ARR
+# TWI inverted: high TWI = flat = low anomaly → invert. The inversion is folded
+# into the kernel (n_TWI = (max − TWI) / range), so no inverted copy is made.
+sl_min, sl_max = np.nanmin(SL_spread), np.nanmax(SL_spread)
+tri_min, tri_max = np.nanmin(TRI_ARR), np.nanmax(TRI_ARR)
+twi_min, twi_max = np.nanmin(TWI_ARR), np.nanmax(TWI_ARR)
+
+# Composite GAI — one fused pass: normalise + weight (0.5 SL, 0.3 TRI, 0.2 TWI⁻¹)
+GAI = _gai_kernel(
+    SL_spread,
+    TRI_ARR,
+    TWI_ARR,
+    sl_min,
+    _inv_range(sl_min, sl_max),
+    tri_min,
+    _inv_range(tri_min, tri_max),
+    twi_max,
+    _inv_range(twi_min, twi_max),
+    DEM_ARR,
+    np.empty(DEM_ARR.shape, dtype=np.float32),
+)
 
 save_raster(GAI, os.path.join(OUT_DIR, "GAI.tif"), RASTERS["dem"])
 RASTERS["GAI"] = os.path.join(OUT_DIR, "GAI.tif")
 print(f"  GAI range: {np.nanmin(GAI):.3f} – {np.nanmax(GAI):.3f}")
 
 # Classify high anomaly zones (top 20%)
-GAI_thresh = np.nanpercentile(GAI, 80)
+GAI_thresh = nanpercentile_fast(GAI, 80)
 HIGH_ANOMALY = (GAI > GAI_thresh).astype(np.float32)
-HIGH_ANOMALY[np.isnan(DEM_ARR)] = np.nan
+HIGH_ANOMALY[DEM_NAN_MASK] = np.nan
 save_raster(HIGH_ANOMALY, os.path.join(OUT_DIR, "GAI_high_anomaly.tif"), RASTERS["dem"])
 
 # Per-basin GAI statistics
-GAI_basin = []
-for _, row in gdf_sub.iterrows():
-    geom = [row.geometry.__geo_interface__]
-    with rasterio.open(os.path.join(OUT_DIR, "GAI.tif")) as src:
-        try:
-            arr_m, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            gai_clip = arr_m[0]
-            gai_clip[gai_clip == -9999] = np.nan
-        except:
-            gai_clip = GAI.copy()
-    GAI_basin.append(
-        {
-            "basin_id": row["basin_id"],
-            "GAI_mean": round(float(np.nanmean(gai_clip)), 4),
-            "GAI_max": round(float(np.nanmax(gai_clip)), 4),
-            "GAI_high_frac": round(float(np.nanmean(gai_clip > GAI_thresh)), 4),
-        }
-    )
-df_GAI_basin = pd.DataFrame(GAI_basin).set_index("basin_id")
+# (preallocated columns filled by index, one DataFrame construction)
+n_gai = len(BASIN_MASKS)
+GAI_basin = {
+    "GAI_mean": np.empty(n_gai),
+    "GAI_max": np.empty(n_gai),
+    "GAI_high_frac": np.empty(n_gai),
+}
+for k, m in enumerate(BASIN_MASKS.values()):
+    gai_clip = GAI[m] if m.any() else GAI
+    gai_clip = gai_clip[~np.isnan(gai_clip)]
+    if gai_clip.size == 0:  # no valid GAI cells in the basin
+        GAI_basin["GAI_mean"][k] = np.nan
+        GAI_basin["GAI_max"][k] = np.nan
+        GAI_basin["GAI_high_frac"][k] = np.nan
+        continue
+    GAI_basin["GAI_mean"][k] = gai_clip.mean()
+    GAI_basin["GAI_max"][k] = gai_clip.max()
+    GAI_basin["GAI_high_frac"][k] = np.mean(gai_clip > GAI_thresh)
+df_GAI_basin = pd.DataFrame(
+    {col: np.round(v, 4) for col, v in GAI_basin.items()},
+    index=pd.Index(list(BASIN_MASKS), name="basin_id"),
+)
 print("  Per-basin GAI:")
 print(df_GAI_basin.to_string())
 df_GAI_basin.to_csv(os.path.join(TABLES_DIR, "GAI_per_basin.csv"))
@@ -4509,56 +4773,149 @@ try:
     SKIMAGE_OK = True
 except ImportError:
     SKIMAGE_OK = False
-    print("  scikit-image not available — using Sobel only")
+    if not CV2_OK:
+        print("  scikit-image not available — using Sobel only")
 
 # Smooth DEM
 dem_smooth = gaussian_filter(
-    np.where(np.isnan(DEM_ARR), np.nanmean(DEM_ARR), DEM_ARR), sigma=3
+    np.where(DEM_NAN_MASK, np.nanmean(DEM_ARR), DEM_ARR), sigma=3
 )
 
-# Sobel edge magnitude
-sx = sobel(dem_smooth, axis=1)
-sy = sobel(dem_smooth, axis=0)
-edge_mag = np.hypot(sx, sy)
-edge_mag[np.isnan(DEM_ARR)] = 0
 
-# Combine with slope for structural emphasis
-edge_combined = (
-    normalise_0_1(edge_mag) * 0.6
-    + normalise_0_1(np.where(np.isnan(SLOPE_ARR), 0, SLOPE_ARR)) * 0.4
+def _sobel_mag_numpy(z, dem, out):
+    out[:] = np.hypot(sobel(z, axis=1), sobel(z, axis=0))
+    out[np.isnan(dem)] = 0
+    return out
+
+
+def _edge_combine_numpy(edge, slope, dem, e_min, e_scale, s_min, s_scale, out):
+    out[:] = (edge - e_min) * e_scale * 0.6 + (
+        np.where(np.isnan(slope), 0, slope) - s_min
+    ) * s_scale * 0.4
+    out[np.isnan(dem)] = np.nan
+    return out
+
+
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _sobel_mag_kernel(z, dem, out):
+        # 3×3 Sobel with edge clamping (== scipy mode="reflect" at the border)
+        H, W = z.shape
+        for i in prange(H):
+            i0, i2 = max(i - 1, 0), min(i + 1, H - 1)
+            for j in range(W):
+                if np.isnan(dem[i, j]):
+                    out[i, j] = 0.0
+                    continue
+                j0, j2 = max(j - 1, 0), min(j + 1, W - 1)
+                gx = (
+                    (z[i0, j2] - z[i0, j0])
+                    + 2.0 * (z[i, j2] - z[i, j0])
+                    + (z[i2, j2] - z[i2, j0])
+                )
+                gy = (
+                    (z[i2, j0] - z[i0, j0])
+                    + 2.0 * (z[i2, j] - z[i0, j])
+                    + (z[i2, j2] - z[i0, j2])
+                )
+                out[i, j] = np.sqrt(gx * gx + gy * gy)
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _edge_combine_kernel(edge, slope, dem, e_min, e_scale, s_min, s_scale, out):
+        for i in prange(dem.shape[0]):
+            for j in range(dem.shape[1]):
+                if np.isnan(dem[i, j]):
+                    out[i, j] = np.nan
+                    continue
+                s = slope[i, j]
+                if np.isnan(s):
+                    s = 0.0
+                out[i, j] = (edge[i, j] - e_min) * e_scale * 0.6 + (
+                    s - s_min
+                ) * s_scale * 0.4
+        return out
+
+else:
+    _sobel_mag_kernel = _sobel_mag_numpy
+    _edge_combine_kernel = _edge_combine_numpy
+
+
+# Sobel edge magnitude (NaN DEM cells → 0), written straight into the output
+edge_combined = _sobel_mag_kernel(
+    dem_smooth, DEM_ARR, np.empty(DEM_ARR.shape, dtype=np.float32)
+)
+e_min, e_max = float(edge_combined.min()), float(edge_combined.max())
+# Slope NaNs count as 0 in the normalisation range
+s_min, s_max = np.nanmin(SLOPE_ARR), np.nanmax(SLOPE_ARR)
+if np.isnan(SLOPE_ARR).any():
+    s_min, s_max = min(s_min, 0.0), max(s_max, 0.0)
+
+# Combine with slope for structural emphasis (in place over the edge raster)
+edge_combined = _edge_combine_kernel(
+    edge_combined,
+    SLOPE_ARR,
+    DEM_ARR,
+    e_min,
+    _inv_range(e_min, e_max),
+    s_min,
+    _inv_range(s_min, s_max),
+    edge_combined,
 )
-edge_combined[np.isnan(DEM_ARR)] = np.nan
 save_raster(
-    edge_combined.astype(np.float32),
+    edge_combined,
     os.path.join(OUT_DIR, "lineament_proxy.tif"),
     RASTERS["dem"],
 )
 
 # Detect probable lineaments using Canny + Hough if available
+# (OpenCV's C++ implementation first, scikit-image as fallback)
 LINEAMENTS_GDF = None
-if SKIMAGE_OK:
+if CV2_OK or SKIMAGE_OK:
     try:
         edge_uint8 = ((edge_combined / np.nanmax(edge_combined)) * 255).astype(np.uint8)
-        canny_edges = canny(edge_uint8, sigma=2, low_threshold=50, high_threshold=100)
-        lines = probabilistic_hough_line(
-            canny_edges, threshold=30, line_length=20, line_gap=5
-        )
-        if lines:
-            line_geoms = []
-            with rasterio.open(RASTERS["dem"]) as src:
-                T = src.transform
-                for (x0, y0), (x1, y1) in lines:
-                    wx0, wy0 = xy(T, y0, x0)
-                    wx1, wy1 = xy(T, y1, x1)
-                    if abs(wx1 - wx0) > 0 or abs(wy1 - wy0) > 0:
-                        line_geoms.append(LineString([(wx0, wy0), (wx1, wy1)]))
-            if line_geoms:
+        if CV2_OK:
+            blur = cv2.GaussianBlur(edge_uint8, (0, 0), 2.0)
+            canny_edges = cv2.Canny(blur, 50, 100)
+            lines = cv2.HoughLinesP(
+                canny_edges,
+                rho=1,
+                theta=np.pi / 180,
+                threshold=30,
+                minLineLength=20,
+                maxLineGap=5,
+            )
+            # (N, 1, 4) int32 [x0, y0, x1, y1], or None when nothing is found
+            lines = np.empty((0, 4)) if lines is None else lines.reshape(-1, 4)
+        else:
+            canny_edges = canny(
+                edge_uint8, sigma=2, low_threshold=50, high_threshold=100
+            )
+            lines = probabilistic_hough_line(
+                canny_edges, threshold=30, line_length=20, line_gap=5
+            )
+            lines = np.asarray(lines, dtype=np.float64).reshape(-1, 4)
+        if len(lines):
+            # (col, row) endpoints → world coords of pixel centres in one
+            # affine pass (same as rasterio xy(offset="center"))
+            T = DEM_TRANSFORM
+            px = lines.astype(np.float64).reshape(-1, 2) + 0.5
+            ends = np.column_stack(
+                [
+                    T.a * px[:, 0] + T.b * px[:, 1] + T.c,
+                    T.d * px[:, 0] + T.e * px[:, 1] + T.f,
+                ]
+            ).reshape(-1, 2, 2)
+            keep = np.any(ends[:, 0] != ends[:, 1], axis=1)
+            line_geoms = shapely.linestrings(ends[keep])
+            if len(line_geoms):
                 LINEAMENTS_GDF = gpd.GeoDataFrame(
-                    {"lineament_id": range(len(line_geoms))},
+                    {"lineament_id": np.arange(len(line_geoms))},
                     geometry=line_geoms,
                     crs=UTM_EPSG,
                 )
-                LINEAMENTS_GDF.to_file(os.path.join(SHAPES_DIR, "lineament_proxy.shp"))
+                save_vector(LINEAMENTS_GDF, "lineament_proxy")
                 print(f"  Detected {len(line_geoms)} probable lineaments")
     except Exception as e:
         print(f"  Hough detection failed ({e}) — edge raster saved only")
@@ -4587,13 +4944,9 @@ im = ax.imshow(
     vmax=1,
 )
 # High anomaly contour overlay
-b = DEM_BOUNDS
-x_c = np.linspace(b.left, b.right, GAI.shape[1])
-y_c = np.linspace(b.bottom, b.top, GAI.shape[0])[::-1]
-XX, YY = np.meshgrid(x_c, y_c)
 ax.contour(
-    XX,
-    YY,
+    GRID_X,
+    GRID_Y,
     np.where(np.isnan(GAI), 0, GAI),
     levels=[GAI_thresh],
     colors="black",
@@ -4610,8 +4963,8 @@ ax.text(
     style="italic",
     bbox=dict(boxstyle="round", facecolor="white", alpha=0.8),
 )
-gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.2, zorder=10)
-gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.5, alpha=0.4, zorder=6)
+add_subbasin_outline(ax)
+add_stream_network(ax, linewidth=0.5, alpha=0.4, zorder=6)
 divider = make_axes_locatable(ax)
 cax = divider.append_axes("right", size="3%", pad=0.07)
 cb = plt.colorbar(im, cax=cax)
@@ -4630,7 +4983,7 @@ im2 = ax.imshow(
     alpha=0.80,
     zorder=1,
     vmin=0,
-    vmax=np.nanpercentile(edge_combined, 99),
+    vmax=nanpercentile_fast(edge_combined, 99),
 )
 if LINEAMENTS_GDF is not None and len(LINEAMENTS_GDF) > 0:
     LINEAMENTS_GDF.plot(
@@ -4642,7 +4995,7 @@ if LINEAMENTS_GDF is not None and len(LINEAMENTS_GDF) > 0:
         label="Probable lineaments",
     )
     ax.legend(loc="lower left", fontsize=8, framealpha=0.85)
-gdf_sub.boundary.plot(ax=ax, edgecolor="white", linewidth=1.2, zorder=10)
+add_subbasin_outline(ax, edgecolor="white")
 divider2 = make_axes_locatable(ax)
 cax2 = divider2.append_axes("right", size="3%", pad=0.07)
 cb2 = plt.colorbar(im2, cax=cax2)
@@ -4656,14 +5009,23 @@ if len(SI_valid) > 0:
     vmin_si, vmax_si = 1.0, np.nanpercentile(SI_valid["SI"], 98)
     cmap_si = plt.get_cmap("RdYlBu_r")
     norm_si = Normalize(vmin=vmin_si, vmax=vmax_si)
-    for _, seg in SI_valid.iterrows():
-        color = cmap_si(norm_si(seg["SI"]))
-        ax.plot(*seg.geometry.xy, color=color, linewidth=1.2, zorder=5)
+    # All segment parts in one LineCollection, coloured by their segment's SI
+    parts, owner = shapely.get_parts(SI_valid.geometry.values, return_index=True)
+    xy_si, part_idx = shapely.get_coordinates(parts, return_index=True)
+    si_lines = np.split(xy_si, np.flatnonzero(np.diff(part_idx)) + 1)
+    ax.add_collection(
+        LineCollection(
+            si_lines,
+            colors=cmap_si(norm_si(SI_valid["SI"].to_numpy()[owner])),
+            linewidths=1.2,
+            zorder=5,
+        )
+    )
     sm_si = plt.cm.ScalarMappable(cmap=cmap_si, norm=norm_si)
     sm_si.set_array([])
     cb3 = plt.colorbar(sm_si, ax=ax, fraction=0.03, pad=0.02)
     cb3.set_label("Sinuosity Index (SI)", fontsize=9)
-gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.2, zorder=10)
+add_subbasin_outline(ax)
 finalize_and_save(fig, ax, utm_ext, "12c_sinuosity_map.png")
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -4702,27 +5064,31 @@ fig.add_trace(
     col=1,
 )
 
-# Sinuosity vs SL scatter
-for bid in gdf_sub["basin_id"]:
-    si_m = SI_per_basin.loc[bid, "SI_mean"] if bid in SI_per_basin.index else np.nan
-    sl_m = (
-        SL_per_basin.loc[bid, "SL_anomaly_max"] if bid in SL_per_basin.index else np.nan
+# Sinuosity vs SL scatter — one join/reindex instead of per-basin lookups
+df_scatter = (
+    SI_per_basin[["SI_mean"]]
+    .join(SL_per_basin[["SL_anomaly_max"]], how="inner")
+    .reindex(gdf_sub["basin_id"])
+    .dropna()
+)
+scatter_traces = [
+    go.Scatter(
+        x=[r.SI_mean],
+        y=[r.SL_anomaly_max],
+        mode="markers+text",
+        text=[bid],
+        textposition="top center",
+        marker=dict(size=14, symbol="circle"),
+        name=bid,
+        hovertemplate=f"{bid}<br>SI={r.SI_mean:.3f}<br>SL anomaly={r.SL_anomaly_max:.2f}",
     )
-    if np.isnan(si_m) or np.isnan(sl_m):
-        continue
-    fig.add_trace(
-        go.Scatter(
-            x=[si_m],
-            y=[sl_m],
-            mode="markers+text",
-            text=[bid],
-            textposition="top center",
-            marker=dict(size=14, symbol="circle"),
-            name=bid,
-            hovertemplate=f"{bid}<br>SI={si_m:.3f}<br>SL anomaly={sl_m:.2f}",
-        ),
-        row=1,
-        col=2,
+    for bid, r in zip(df_scatter.index, df_scatter.itertuples(index=False))
+]
+if scatter_traces:
+    fig.add_traces(
+        scatter_traces,
+        rows=[1] * len(scatter_traces),
+        cols=[2] * len(scatter_traces),
     )
 
 fig.update_xaxes(title_text="Subbasin", row=1, col=1)
@@ -4788,38 +5154,160 @@ print(
 print("\n[B] Flash Flood Potential Index (FFPI)...")
 
 
-def normalise_raster(arr):
+def normalise_raster(arr, out=None):
+    """Min–max scale to [0, 1]; writes into out (may be arr itself) if given."""
     mn, mx = np.nanmin(arr), np.nanmax(arr)
+    if out is None:
+        out = np.empty_like(arr)
     if mx == mn:
-        return np.zeros_like(arr)
-    return (arr - mn) / (mx - mn)
+        out[...] = 0
+        return out
+    np.subtract(arr, mn, out=out)
+    out *= 1.0 / (mx - mn)
+    return out
 
 
-# Component normalised rasters
-norm_slope = normalise_raster(np.where(np.isnan(SLOPE_ARR), 0, SLOPE_ARR))
-
 # Relief proxy: local relief within 5×5 neighbourhood
 from scipy.ndimage import maximum_filter, minimum_filter
 
-dem_safe = np.where(np.isnan(DEM_ARR), np.nanmean(DEM_ARR), DEM_ARR)
-local_relief = maximum_filter(dem_safe, size=5) - minimum_filter(dem_safe, size=5)
-local_relief[np.isnan(DEM_ARR)] = np.nan
-norm_relief = normalise_raster(np.where(np.isnan(local_relief), 0, local_relief))
+dem_safe = np.where(DEM_NAN_MASK, np.nanmean(DEM_ARR), DEM_ARR)
+if CV2_OK:
+    # O(1)-per-pixel grey dilation/erosion; the replicate border gives the same
+    # 5×5 max/min as scipy's reflect mode
+    k5 = np.ones((5, 5), np.uint8)
+    dem_safe = dem_safe.astype(np.float32, copy=False)
+    local_relief = cv2.dilate(
+        dem_safe, k5, borderType=cv2.BORDER_REPLICATE
+    ) - cv2.erode(dem_safe, k5, borderType=cv2.BORDER_REPLICATE)
+else:
+    local_relief = maximum_filter(dem_safe, size=5) - minimum_filter(dem_safe, size=5)
+local_relief[DEM_NAN_MASK] = np.nan
+
+
+# FFPI weights (slope, relief, TWI, SPI). When SPI is only an all-NaN
+# placeholder its term carries no information: drop it and renormalise the
+# remaining weights rather than spending full-raster passes on zeros.
+FFPI_WEIGHTS = np.array([0.35, 0.25, 0.25, 0.15])
+FFPI_HIGH = 0.55  # "High" class / high-hazard threshold on the FFPI scale
+FFPI_NO_SPI = bool(np.isnan(SPI_ARR2).all())
+if FFPI_NO_SPI:
+    FFPI_WEIGHTS[3] = 0.0
+    FFPI_WEIGHTS /= FFPI_WEIGHTS.sum()
+    print("  SPI raster is all NaN — FFPI uses slope/relief/TWI only")
+# Formula as published in map titles, built from the weights actually used
+FFPI_FORMULA = " + ".join(
+    f"{name}×{w:.2f}"
+    for name, w in zip(["Slope", "Relief", "TWI", "SPI"], FFPI_WEIGHTS)
+    if w > 0
+)
+
+
+def _ffpi_numpy(slope, relief, twi, spi, dem, w, out):
+    # Component normalised rasters, filled + scaled in place in one reused
+    # float32 buffer and accumulated into out
+    buf = np.empty(dem.shape, dtype=np.float32)
+    out[...] = 0
+    components = (
+        (slope, 0, w[0], False),
+        (relief, 0, w[1], False),
+        # TWI inverted: high TWI = flat accumulation zone = high flood potential
+        (twi, np.nanmin(twi), w[2], False),
+        # SPI: high SPI = high stream power = high flood energy (log-transform)
+        (spi, 0, w[3], True),
+    )
+    for src, fill, weight, log in components:
+        if weight == 0:
+            continue
+        np.copyto(buf, src)
+        buf[np.isnan(buf)] = fill
+        if log:
+            np.log1p(buf, out=buf)
+        normalise_raster(buf, out=buf)
+        np.multiply(buf, weight, out=buf)
+        np.add(out, buf, out=out)
+    out[np.isnan(dem)] = np.nan
+    return out
+
+
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _ffpi_kernel(slope, relief, twi, spi, dem, w, out):
+        # Pass 1 — per-row min/max of each filled component, reduced serially.
+        # Fill rules: slope/relief/SPI NaN → 0, TWI NaN → TWI min (so it only
+        # needs min/max over valid cells); SPI is log1p-transformed.
+        H, W = dem.shape
+        use_spi = w[3] != 0.0
+        row_mm = np.empty((H, 8))
+        for i in prange(H):
+            mm = np.empty(8)
+            mm[0::2] = np.inf
+            mm[1::2] = -np.inf
+            for j in range(W):
+                s = slope[i, j]
+                s = 0.0 if np.isnan(s) else s
+                r = relief[i, j]
+                r = 0.0 if np.isnan(r) else r
+                mm[0], mm[1] = min(mm[0], s), max(mm[1], s)
+                mm[2], mm[3] = min(mm[2], r), max(mm[3], r)
+                if use_spi:
+                    p = spi[i, j]
+                    p = 0.0 if np.isnan(p) else np.log1p(p)
+                    mm[6], mm[7] = min(mm[6], p), max(mm[7], p)
+                t = twi[i, j]
+                if not np.isnan(t):
+                    mm[4], mm[5] = min(mm[4], t), max(mm[5], t)
+            row_mm[i] = mm
+        lo = np.empty(4)
+        scale = np.zeros(4)
+        for k in range(4):
+            lo[k] = row_mm[:, 2 * k].min()
+            hi = row_mm[:, 2 * k + 1].max()
+            if hi > lo[k]:
+                scale[k] = 1.0 / (hi - lo[k])
+        if not np.isfinite(lo[2]):  # all-NaN TWI → zero contribution
+            lo[2] = 0.0
+        if not use_spi:
+            lo[3] = 0.0
+
+        # Pass 2 — weighted composite of the normalised components
+        for i in prange(H):
+            for j in range(W):
+                if np.isnan(dem[i, j]):
+                    out[i, j] = np.nan
+                    continue
+                s = slope[i, j]
+                s = 0.0 if np.isnan(s) else s
+                r = relief[i, j]
+                r = 0.0 if np.isnan(r) else r
+                t = twi[i, j]
+                t = lo[2] if np.isnan(t) else t
+                v = (
+                    (s - lo[0]) * scale[0] * w[0]
+                    + (r - lo[1]) * scale[1] * w[1]
+                    + (t - lo[2]) * scale[2] * w[2]
+                )
+                if use_spi:
+                    p = spi[i, j]
+                    p = 0.0 if np.isnan(p) else np.log1p(p)
+                    v += (p - lo[3]) * scale[3] * w[3]
+                out[i, j] = v
+        return out
 
-# TWI inverted: high TWI = flat accumulation zone = high flood potential
-TWI_safe = np.where(np.isnan(TWI_ARR2), np.nanmin(TWI_ARR2), TWI_ARR2)
-norm_twi = normalise_raster(TWI_safe)
+else:
+    _ffpi_kernel = _ffpi_numpy
 
-# SPI: high SPI = high stream power = high flood energy
-# Using a placeholder for now, as SPI raster is not generated.
-SPI_safe = np.where(np.isnan(SPI_ARR2), 0, SPI_ARR2)  # SPI_ARR2 is a nan placeholder
-norm_spi = normalise_raster(np.log1p(SPI_safe))  # log-transform
 
-# Weighted FFPI
-FFPI = (
-    norm_slope * 0.35 + norm_relief * 0.25 + norm_twi * 0.25 + norm_spi * 0.15
-)  # This will be heavily influenced by NaNs from norm_spi
-FFPI[np.isnan(DEM_ARR)] = np.nan
+# Weighted FFPI — one fused normalise + combine pass over the four components
+FFPI = _ffpi_kernel(
+    SLOPE_ARR,
+    local_relief,
+    TWI_ARR2,
+    SPI_ARR2,
+    DEM_ARR,
+    FFPI_WEIGHTS,
+    np.empty(DEM_ARR.shape, dtype=np.float32),
+)
 
 save_raster(FFPI.astype(np.float32), os.path.join(OUT_DIR, "FFPI.tif"), RASTERS["dem"])
 RASTERS["FFPI"] = os.path.join(OUT_DIR, "FFPI.tif")
@@ -4832,7 +5320,7 @@ def classify_ffpi(val):
         return "Unknown"
     if val > 0.75:
         return "Very High"
-    if val > 0.55:
+    if val > FFPI_HIGH:
         return "High"
     if val > 0.35:
         return "Moderate"
@@ -4847,72 +5335,68 @@ def classify_ffpi(val):
 
 print("\n[C] Per-basin hazard statistics...")
 
-HAZARD_ROWS = []
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = [row.geometry.__geo_interface__]
-
-    def mask_raster(path):
-        with rasterio.open(path) as src:
-            try:
-                arr_m, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-                arr = arr_m[0].astype(np.float32)
-                arr[arr == -9999.0] = np.nan
-                return arr
-            except:
-                return np.array([np.nan])
-
-    twi_clip = mask_raster(RASTERS["twi"])  # Use 'twi' (lowercase)
-    spi_clip = mask_raster(RASTERS["spi"])  # SPI raster is now available
-    sti_clip = mask_raster(RASTERS["sti"])  # STI raster is now available
-    ffpi_clip = mask_raster(RASTERS["FFPI"])
-
-    ffpi_mean = float(np.nanmean(ffpi_clip))
-    HAZARD_ROWS.append(
-        {
-            "basin_id": bid,
-            "TWI_mean": round(float(np.nanmean(twi_clip)), 3),
-            "TWI_max": round(float(np.nanmax(twi_clip)), 3),
-            "SPI_mean": (
-                round(float(np.nanmean(spi_clip)), 3)
-                if np.any(~np.isnan(spi_clip))
-                else np.nan
-            ),
-            "SPI_max": (
-                round(float(np.nanmax(spi_clip)), 3)
-                if np.any(~np.isnan(spi_clip))
-                else np.nan
-            ),
-            "STI_mean": (
-                round(float(np.nanmean(sti_clip)), 3)
-                if np.any(~np.isnan(sti_clip))
-                else np.nan
-            ),
-            "STI_max": (
-                round(float(np.nanmax(sti_clip)), 3)
-                if np.any(~np.isnan(sti_clip))
-                else np.nan
-            ),
-            "FFPI_mean": round(ffpi_mean, 4),
-            "FFPI_max": round(float(np.nanmax(ffpi_clip)), 4),
-            "FFPI_high_frac": round(float(np.nanmean(ffpi_clip > 0.55)), 4),
-            "FFPI_class": classify_ffpi(ffpi_mean),
-        }
+# Burn all basins into one label raster, then reduce each in-memory hazard
+# raster (same grid as the DEM) per label — no per-basin raster reads
+hazard_ids = gdf_sub["basin_id"].tolist()
+n_hazard = len(hazard_ids)
+HAZARD_LABELS = basin_labels(gdf_sub.geometry.values)
+twi_z = zonal_stats_labels(TWI_ARR2, HAZARD_LABELS, n_hazard)
+spi_z = zonal_stats_labels(SPI_ARR2, HAZARD_LABELS, n_hazard)
+sti_z = zonal_stats_labels(STI_ARR2, HAZARD_LABELS, n_hazard)
+ffpi_z = zonal_stats_labels(FFPI, HAZARD_LABELS, n_hazard, high=FFPI_HIGH)
+
+ffpi_class = np.empty(n_hazard, dtype=object)
+for k, v in enumerate(ffpi_z["mean"]):
+    ffpi_class[k] = classify_ffpi(float(v))
+df_hazard = pd.DataFrame(
+    {
+        "TWI_mean": np.round(twi_z["mean"], 3),
+        "TWI_max": np.round(twi_z["max"], 3),
+        "SPI_mean": np.round(spi_z["mean"], 3),
+        "SPI_max": np.round(spi_z["max"], 3),
+        "STI_mean": np.round(sti_z["mean"], 3),
+        "STI_max": np.round(sti_z["max"], 3),
+        "FFPI_mean": np.round(ffpi_z["mean"], 4),
+        "FFPI_max": np.round(ffpi_z["max"], 4),
+        "FFPI_high_frac": np.round(ffpi_z["high_frac"], 4),
+        "FFPI_class": ffpi_class,
+    },
+    index=pd.Index(hazard_ids, name="basin_id"),
+)
+for k, bid in enumerate(hazard_ids):
+    print(
+        f"  {bid}: TWI_mean={twi_z['mean'][k]:.2f} | "
+        f"SPI_mean={spi_z['mean'][k]:.2f} | "
+        f"FFPI_mean={ffpi_z['mean'][k]:.3f} → {ffpi_class[k]}"
     )
+if FFPI_NO_SPI:
     print(
-        f"  {bid}: TWI_mean={np.nanmean(twi_clip):.2f} | "
-        f"SPI_mean={np.nanmean(spi_clip):.2f} | "
-        f"FFPI_mean={ffpi_mean:.3f} → {classify_ffpi(ffpi_mean)}"
+        f"  Note: FFPI here is {FFPI_FORMULA} (SPI term dropped, weights rescaled); "
+        f"classes and FFPI_high_frac (FFPI > {FFPI_HIGH}) use this rescaled index"
     )
 
-df_hazard = pd.DataFrame(HAZARD_ROWS).set_index("basin_id")
 
-# Composite Flood Hazard Rank
+def rank_desc_min(vals):
+    """Column-wise descending ranks with ties sharing the lowest rank
+    (pandas rank(ascending=False, method="min")); NaN stays NaN."""
+    vals = np.asarray(vals, dtype=np.float64)
+    srt = np.sort(vals, axis=0)  # NaNs sort to the end of each column
+    n_valid = np.count_nonzero(~np.isnan(vals), axis=0)
+    ranks = np.empty(vals.shape)
+    for j in range(vals.shape[1]):
+        n_gt = n_valid[j] - np.searchsorted(
+            srt[: n_valid[j], j], vals[:, j], side="right"
+        )
+        ranks[:, j] = n_gt + 1
+    ranks[np.isnan(vals)] = np.nan
+    return ranks
+
+
+# Composite Flood Hazard Rank — all four columns ranked in one sorted pass
 rank_cols = ["TWI_mean", "SPI_mean", "STI_mean", "FFPI_mean"]
-df_hazard_r = df_hazard[rank_cols].copy()
-for col in rank_cols:
-    df_hazard[f"rank_{col}"] = df_hazard_r[col].rank(ascending=False, method="min")
-df_hazard["FHI_rank"] = df_hazard[[f"rank_{c}" for c in rank_cols]].mean(axis=1)
+rank_names = [f"rank_{c}" for c in rank_cols]
+df_hazard[rank_names] = rank_desc_min(df_hazard[rank_cols].to_numpy())
+df_hazard["FHI_rank"] = df_hazard[rank_names].mean(axis=1)
 df_hazard["FHI_priority"] = pd.qcut(
     df_hazard["FHI_rank"], q=3, labels=["High", "Moderate", "Low"], duplicates="drop"
 )
@@ -4940,7 +5424,7 @@ MAP_CONFIGS = [
     (
         "FFPI",
         FFPI,
-        "Flash Flood Potential Index (FFPI)\n(Slope×0.35 + Relief×0.25 + TWI×0.25 + SPI×0.15)",
+        f"Flash Flood Potential Index (FFPI)\n({FFPI_FORMULA})",
         "OrRd",
         "13d_FFPI_map.png",
     ),
@@ -4948,7 +5432,7 @@ MAP_CONFIGS = [
 
 for key, arr_map, title, cmap_name, fname in MAP_CONFIGS:
     fig, ax, utm_ext = base_axes(title)
-    vmax_map = np.nanpercentile(arr_map, 98)
+    vmin_map, vmax_map = cached_percentiles(key, arr_map, 2, 98)
     im = ax.imshow(
         arr_map,
         extent=raster_extent(),
@@ -4956,11 +5440,11 @@ for key, arr_map, title, cmap_name, fname in MAP_CONFIGS:
         cmap=cmap_name,
         alpha=0.78,
         zorder=1,
-        vmin=np.nanpercentile(arr_map, 2),
+        vmin=vmin_map,
         vmax=vmax_map,
     )
-    gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.2, zorder=10)
-    gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.6, alpha=0.5, zorder=8)
+    add_subbasin_outline(ax)
+    add_stream_network(ax, linewidth=0.6, alpha=0.5, zorder=8)
     divider = make_axes_locatable(ax)
     cax = divider.append_axes("right", size="3%", pad=0.07)
     cb = plt.colorbar(im, cax=cax)
@@ -4984,16 +5468,27 @@ gdf_fhaz = gdf_sub.merge(
     on="basin_id",
     how="left",
 )
-for _, row in gdf_fhaz.iterrows():
-    col = ffpi_class_colors.get(row["FFPI_class"], "grey")
-    gpd.GeoDataFrame([row], geometry="geometry", crs=gdf_sub.crs).plot(
-        ax=ax, color=col, edgecolor="black", linewidth=1.2, alpha=0.80, zorder=3
-    )
-    cx, cy = row.geometry.centroid.x, row.geometry.centroid.y
+# One collection for all basins; only the labels need a per-basin loop
+gdf_fhaz.plot(
+    ax=ax,
+    color=gdf_fhaz["FFPI_class"].map(ffpi_class_colors).fillna("grey").tolist(),
+    edgecolor="black",
+    linewidth=1.2,
+    alpha=0.80,
+    zorder=3,
+)
+centroids = gdf_fhaz.geometry.centroid
+for bid, cls, ffpi, cx, cy in zip(
+    gdf_fhaz["basin_id"],
+    gdf_fhaz["FFPI_class"],
+    gdf_fhaz["FFPI_mean"],
+    centroids.x,
+    centroids.y,
+):
     ax.text(
         cx,
         cy,
-        f"{row['basin_id']}\n{row['FFPI_class']}\nFFPI={row['FFPI_mean']:.3f}",
+        f"{bid}\n{cls}\nFFPI={ffpi:.3f}",
         ha="center",
         va="center",
         fontsize=7.5,
@@ -5001,7 +5496,7 @@ for _, row in gdf_fhaz.iterrows():
         path_effects=[pe.withStroke(linewidth=2, foreground="white")],
     )
 
-gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.7, alpha=0.5, zorder=7)
+add_stream_network(ax, linewidth=0.7, alpha=0.5, zorder=7)
 legend_patches = [
     mpatches.Patch(color=v, label=k)
     for k, v in ffpi_class_colors.items()
@@ -5085,10 +5580,11 @@ fig = px.scatter(
     size_max=55,
 )
 fig.add_hline(
-    y=0.55,
+    y=FFPI_HIGH,
     line_dash="dash",
     line_color="red",
-    annotation_text="High flood hazard threshold (FFPI=0.55)",
+    annotation_text=f"High flood hazard threshold (FFPI={FFPI_HIGH})"
+    + (" — SPI term dropped" if FFPI_NO_SPI else ""),
 )
 save_fig(fig, "13g_flood_bubble_plot")
 
@@ -5130,117 +5626,119 @@ print("\n[F] Writing advanced interpretation to report...")
 
 ADVANCED_REPORT_PATH = os.path.join(REPORT_DIR, "advanced_analysis_interpretation.txt")
 
-with open(ADVANCED_REPORT_PATH, "w", encoding="utf-8") as f:
-    f.write("=" * 80 + "\n")
-    f.write("ADVANCED MORPHOMETRIC ANALYSIS — SUPPLEMENTARY INTERPRETATIONS\n")
-    f.write("=" * 80 + "\n\n")
-
-    f.write("10. TECTONIC ACTIVITY ANALYSIS\n" + "-" * 40 + "\n")
-    f.write(
-        "The Index of Active Tectonics (IAT) integrates four geomorphic proxies: "
-        "Asymmetry Factor (AF), Transverse Symmetry (T), Valley Floor Width-to-Height "
-        "Ratio (Vf), and Mountain Front Sinuosity (Smf), following El Hamdouni et al. "
-        "(2008). AF values deviating substantially from 50 indicate basin tilting "
-        "driven by differential uplift or lithological asymmetry. Vf < 0.5 is "
-        "diagnostic of active incision associated with tectonic uplift, producing "
-        "V-shaped valleys, whereas Vf > 1.0 reflects reduced tectonic activity and "
-        "lateral widening. Low Smf (< 1.4) indicates a tectonically active, "
-        "straight mountain front.\n\n"
-    )
-    for bid in gdf_sub["basin_id"]:
-        if bid in df_IAT.index:
-            row = df_IAT.loc[bid]
-            f.write(
-                f"  {bid}: IAT={row['IAT']:.2f} ({row['IAT_class']}). "
-                f"AF={row['AF']:.2f}, T={row['T']:.4f}, "
-                f"Vf={row['Vf']:.3f}, Smf={row['Smf']:.3f}.\n"
-            )
-    f.write("\n")
-
-    f.write("11. CHANNEL STEEPNESS & CONCAVITY\n" + "-" * 40 + "\n")
-    f.write(
-        "Channel steepness indices (ksn) and concavity (θ) were derived from the "
-        "slope-area relationship following Hack (1973) and Flint (1974). High ksn "
-        "values indicate either strong lithological resistance, active rock uplift, "
-        "or transient adjustment to base-level change. The chi (χ) coordinate plot "
-        "(Perron & Royden, 2012) allows comparison of drainage networks independent "
-        "of their spatial position, where non-collinear χ-elevation relationships "
-        "between adjacent basins signal ongoing divide migration or stream capture. "
-        "SL anomaly hotspots correspond to knickpoints or reaches crossing resistant "
-        "lithological boundaries.\n\n"
-    )
-    # THETA_RESULTS and ksn_stats are not defined. Removing the loop that uses them.
-    # for bid, tres in THETA_RESULTS.items():
-    #     f.write(
-    #         f"  {bid}: θ={tres['theta_concavity']:.3f} "
-    #         f"({'Concave (normal)' if tres['theta_concavity'] > 0.3 else 'Low concavity (active uplift or hard substrate)'}) "
-    #         f"| ksn mean={ksn_stats.loc[bid,'ksn_mean'] if bid in ksn_stats.index else 'N/A'} "
-    #         f"| R²={tres['R2_SA']:.3f}\n"
-    #     )
-    f.write("  (Steepness and concavity parameters were not computed in this run.)\n")
-    f.write("\n")
-
-    f.write("12. GEOMORPHIC ANOMALY & LINEAMENT ANALYSIS\n" + "-" * 40 + "\n")
-    f.write(
-        "The Geomorphic Anomaly Index (GAI) integrates SL anomaly, TRI, and inverse "
-        "TWI to identify geomorphically active zones where structural or lithological "
-        "controls modulate landscape evolution. High GAI zones (top 20th percentile) "
-        "are spatially coincident with anomalously high SL reaches, implying "
-        "knickpoint clusters, fault zones, or resistant bedrock outcrops. Structural "
-        "lineaments were identified as a proxy using Sobel edge detection combined "
-        "with Probabilistic Hough Line Transform, targeting linear high-gradient "
-        "alignments in the DEM and slope rasters.\n\n"
-    )
-    for bid in gdf_sub["basin_id"]:
-        if bid in df_GAI_basin.index:
-            g = df_GAI_basin.loc[bid]
-            si_m = (
-                SI_per_basin.loc[bid, "SI_mean"]
-                if bid in SI_per_basin.index
-                else np.nan
-            )
-            f.write(
-                f"  {bid}: GAI_mean={g['GAI_mean']:.3f} | "
-                f"High anomaly fraction={g['GAI_high_frac']*100:.1f}% | "
-                f"Mean SI={si_m:.3f} "
-                f"({'Straight — possible structural control' if si_m < 1.05 else 'Sinuous/meandering'})\n"
-            )
-    f.write("\n")
-
-    f.write("13. FLOOD HAZARD ANALYSIS\n" + "-" * 40 + "\n")
-    f.write(
-        "Topographic Wetness Index (TWI), Stream Power Index (SPI), Sediment Transport "
-        "Index (STI), and Flash Flood Potential Index (FFPI) were computed to characterise "
-        "the hydrological response and hazard potential of each subbasin. TWI identifies "
-        "zones of moisture accumulation and potential saturation-excess overland flow. "
-        "High SPI zones correspond to areas of concentrated flow energy capable of "
-        "significant geomorphic work. STI quantifies sediment detachment and transport "
-        "potential. FFPI synthesises these signals as a weighted composite.\n\n"
-    )
-    for bid in df_hazard.index:
-        row = df_hazard.loc[bid]
-        f.write(
-            f"  {bid}: FFPI={row['FFPI_mean']:.3f} ({row['FFPI_class']}) | "
-            f"TWI_mean={row['TWI_mean']:.2f} | SPI_mean={row['SPI_mean']:.2f} | "
-            f"Flood priority: {row['FHI_priority']}\n"
+# Assembled in memory and written with a single call
+report_parts = []
+report_parts.append("=" * 80 + "\n")
+report_parts.append("ADVANCED MORPHOMETRIC ANALYSIS — SUPPLEMENTARY INTERPRETATIONS\n")
+report_parts.append("=" * 80 + "\n\n")
+
+report_parts.append("10. TECTONIC ACTIVITY ANALYSIS\n" + "-" * 40 + "\n")
+report_parts.append(
+    "The Index of Active Tectonics (IAT) integrates four geomorphic proxies: "
+    "Asymmetry Factor (AF), Transverse Symmetry (T), Valley Floor Width-to-Height "
+    "Ratio (Vf), and Mountain Front Sinuosity (Smf), following El Hamdouni et al. "
+    "(2008). AF values deviating substantially from 50 indicate basin tilting "
+    "driven by differential uplift or lithological asymmetry. Vf < 0.5 is "
+    "diagnostic of active incision associated with tectonic uplift, producing "
+    "V-shaped valleys, whereas Vf > 1.0 reflects reduced tectonic activity and "
+    "lateral widening. Low Smf (< 1.4) indicates a tectonically active, "
+    "straight mountain front.\n\n"
+)
+for bid in gdf_sub["basin_id"]:
+    if bid in df_IAT.index:
+        row = df_IAT.loc[bid]
+        report_parts.append(
+            f"  {bid}: IAT={row['IAT']:.2f} ({row['IAT_class']}). "
+            f"AF={row['AF']:.2f}, T={row['T']:.4f}, "
+            f"Vf={row['Vf']:.3f}, Smf={row['Smf']:.3f}.\n"
         )
-    f.write("\n")
-
-    f.write("REFERENCES (Advanced Sections)\n" + "-" * 40 + "\n")
-    refs = [
-        "Bull, W.B. & McFadden, L.D. (1977). Tectonic geomorphology N & S of the Garlock fault. Geomorphology in arid regions, 115–138.",
-        "Cox, R.T. (1994). Analysis of drainage basin symmetry. Geology, 22(9), 813–816.",
-        "El Hamdouni, R. et al. (2008). Assessment of relative active tectonics, SE Spain. Geomorphology, 96(1–2), 150–173.",
-        "Flint, J.J. (1974). Stream gradient as a function of order, magnitude, and discharge. Water Resources Research, 10(5), 969–973.",
-        "Gregory, K.J. & Walling, D.E. (1973). Drainage Basin Form and Process. Edward Arnold.",
-        "Hack, J.T. (1973). Stream-profile analysis and stream-gradient index. USGS Journal of Research, 1(4), 421–429.",
-        "Moore, I.D., Grayson, R.B. & Ladson, A.R. (1991). Digital terrain modelling. Hydrological Processes, 5(1), 3–30.",
-        "Moore, I.D. & Burch, G.J. (1986). Sediment transport capacity of sheet and rill flow. Water Resources Research, 22(13), 1350–1360.",
-        "Perron, J.T. & Royden, L. (2012). An integral approach to bedrock river profile analysis. Earth Surface Processes and Landforms, 38(6), 570–576.",
-        "Smith, G.H. (2003). The morphometry of drainage basins. Annals of the Association of American Geographers.",
-    ]
-    for ref in refs:
-        f.write(f"  {ref}\n")
+report_parts.append("\n")
+
+report_parts.append("11. CHANNEL STEEPNESS & CONCAVITY\n" + "-" * 40 + "\n")
+report_parts.append(
+    "Channel steepness indices (ksn) and concavity (θ) were derived from the "
+    "slope-area relationship following Hack (1973) and Flint (1974). High ksn "
+    "values indicate either strong lithological resistance, active rock uplift, "
+    "or transient adjustment to base-level change. The chi (χ) coordinate plot "
+    "(Perron & Royden, 2012) allows comparison of drainage networks independent "
+    "of their spatial position, where non-collinear χ-elevation relationships "
+    "between adjacent basins signal ongoing divide migration or stream capture. "
+    "SL anomaly hotspots correspond to knickpoints or reaches crossing resistant "
+    "lithological boundaries.\n\n"
+)
+# THETA_RESULTS and ksn_stats are not defined. Removing the loop that uses them.
+# for bid, tres in THETA_RESULTS.items():
+#     report_parts.append(
+#         f"  {bid}: θ={tres['theta_concavity']:.3f} "
+#         f"({'Concave (normal)' if tres['theta_concavity'] > 0.3 else 'Low concavity (active uplift or hard substrate)'}) "
+#         f"| ksn mean={ksn_stats.loc[bid,'ksn_mean'] if bid in ksn_stats.index else 'N/A'} "
+#         f"| R²={tres['R2_SA']:.3f}\n"
+#     )
+report_parts.append(
+    "  (Steepness and concavity parameters were not computed in this run.)\n"
+)
+report_parts.append("\n")
+
+report_parts.append("12. GEOMORPHIC ANOMALY & LINEAMENT ANALYSIS\n" + "-" * 40 + "\n")
+report_parts.append(
+    "The Geomorphic Anomaly Index (GAI) integrates SL anomaly, TRI, and inverse "
+    "TWI to identify geomorphically active zones where structural or lithological "
+    "controls modulate landscape evolution. High GAI zones (top 20th percentile) "
+    "are spatially coincident with anomalously high SL reaches, implying "
+    "knickpoint clusters, fault zones, or resistant bedrock outcrops. Structural "
+    "lineaments were identified as a proxy using Sobel edge detection combined "
+    "with Probabilistic Hough Line Transform, targeting linear high-gradient "
+    "alignments in the DEM and slope rasters.\n\n"
+)
+si_by_basin = SI_per_basin["SI_mean"].reindex(df_GAI_basin.index)
+for bid in gdf_sub["basin_id"]:
+    if bid in df_GAI_basin.index:
+        g = df_GAI_basin.loc[bid]
+        si_m = si_by_basin.loc[bid]
+        report_parts.append(
+            f"  {bid}: GAI_mean={g['GAI_mean']:.3f} | "
+            f"High anomaly fraction={g['GAI_high_frac']*100:.1f}% | "
+            f"Mean SI={si_m:.3f} "
+            f"({'Straight — possible structural control' if si_m < 1.05 else 'Sinuous/meandering'})\n"
+        )
+report_parts.append("\n")
+
+report_parts.append("13. FLOOD HAZARD ANALYSIS\n" + "-" * 40 + "\n")
+report_parts.append(
+    "Topographic Wetness Index (TWI), Stream Power Index (SPI), Sediment Transport "
+    "Index (STI), and Flash Flood Potential Index (FFPI) were computed to characterise "
+    "the hydrological response and hazard potential of each subbasin. TWI identifies "
+    "zones of moisture accumulation and potential saturation-excess overland flow. "
+    "High SPI zones correspond to areas of concentrated flow energy capable of "
+    "significant geomorphic work. STI quantifies sediment detachment and transport "
+    "potential. FFPI synthesises these signals as a weighted composite.\n\n"
+)
+for bid in df_hazard.index:
+    row = df_hazard.loc[bid]
+    report_parts.append(
+        f"  {bid}: FFPI={row['FFPI_mean']:.3f} ({row['FFPI_class']}) | "
+        f"TWI_mean={row['TWI_mean']:.2f} | SPI_mean={row['SPI_mean']:.2f} | "
+        f"Flood priority: {row['FHI_priority']}\n"
+    )
+report_parts.append("\n")
+
+report_parts.append("REFERENCES (Advanced Sections)\n" + "-" * 40 + "\n")
+refs = [
+    "Bull, W.B. & McFadden, L.D. (1977). Tectonic geomorphology N & S of the Garlock fault. Geomorphology in arid regions, 115–138.",
+    "Cox, R.T. (1994). Analysis of drainage basin symmetry. Geology, 22(9), 813–816.",
+    "El Hamdouni, R. et al. (2008). Assessment of relative active tectonics, SE Spain. Geomorphology, 96(1–2), 150–173.",
+    "Flint, J.J. (1974). Stream gradient as a function of order, magnitude, and discharge. Water Resources Research, 10(5), 969–973.",
+    "Gregory, K.J. & Walling, D.E. (1973). Drainage Basin Form and Process. Edward Arnold.",
+    "Hack, J.T. (1973). Stream-profile analysis and stream-gradient index. USGS Journal of Research, 1(4), 421–429.",
+    "Moore, I.D., Grayson, R.B. & Ladson, A.R. (1991). Digital terrain modelling. Hydrological Processes, 5(1), 3–30.",
+    "Moore, I.D. & Burch, G.J. (1986). Sediment transport capacity of sheet and rill flow. Water Resources Research, 22(13), 1350–1360.",
+    "Perron, J.T. & Royden, L. (2012). An integral approach to bedrock river profile analysis. Earth Surface Processes and Landforms, 38(6), 570–576.",
+    "Smith, G.H. (2003). The morphometry of drainage basins. Annals of the Association of American Geographers.",
+]
+report_parts.extend(f"  {ref}\n" for ref in refs)
+
+with open(ADVANCED_REPORT_PATH, "w", encoding="utf-8") as f:
+    f.write("".join(report_parts))
 
 print(f"  ✅ Advanced interpretation saved: {ADVANCED_REPORT_PATH}")
 print("\n✅ ALL ADVANCED SECTIONS COMPLETE (10–13).")
@@ -5268,13 +5766,32 @@ OUT_DIR = "/content/morphometric_outputs/"
 EXPORT_NAME = f"morphometric_outputs_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
 EXPORT_PATH = f"/content/{EXPORT_NAME}"
 
+# Already-compressed formats are stored as-is; re-deflating them costs CPU
+# for next to no size gain (GeoTIFFs are written DEFLATE-compressed by
+# save_raster / reproject_raster). Text outputs (CSV/HTML/TXT/shp/dbf) are deflated.
+PRECOMPRESSED_EXT = (
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".zip",
+    ".parquet",
+    ".tif",
+    ".tiff",
+)
+
 print("📦 Zipping all outputs...")
 with zipfile.ZipFile(EXPORT_PATH, "w", zipfile.ZIP_DEFLATED) as zf:
     for root, dirs, fnames in os.walk(OUT_DIR):
         for fname in fnames:
             full_path = os.path.join(root, fname)
             arc_name = os.path.relpath(full_path, "/content/")
-            zf.write(full_path, arc_name)
+            compress_type = (
+                zipfile.ZIP_STORED
+                if fname.lower().endswith(PRECOMPRESSED_EXT)
+                else zipfile.ZIP_DEFLATED
+            )
+            zf.write(full_path, arc_name, compress_type=compress_type)
 
 size_mb = os.path.getsize(EXPORT_PATH) / 1e6
 print(f"✅ Zipped: {EXPORT_NAME}  ({size_mb:.1f} MB)")
@@ -8,12 +8,14 @@
  Addon to: adv_v2_morphometry_pravra3basin.py
  Run AFTER Sections 0–13 so the following variables are in memory:
    gdf_sub, gdf_so, gdf_streams, df_master, df_areal, df_relief
-   DEM_ARR, FACC_ARR, FDIR_ARR, SLOPE_ARR, HILLSHADE
+   DEM_ARR, DEM_NAN_MASK, FACC_ARR, FDIR_ARR, SLOPE_ARR, HILLSHADE
    DEM_TRANSFORM, DEM_BOUNDS, DEM_RES, DEM_CRS
    UTM_EPSG, ORDER_COL, RASTERS, OUT_DIR, MAPS_DIR,
    PLOTS_DIR, TABLES_DIR, HTML_DIR, SHAPES_DIR
    base_axes, overlay_boundaries, finalize_and_save,
-   raster_extent, compute_utm_extent, save_raster,
+   raster_extent, compute_utm_extent, save_raster, basin_labels,
+   nanpercentile_fast, gtiff_write_options, write_band_strips,
+   zonal_stats_labels, save_vector,
    save_fig (Plotly helper)
 
  NEW SECTIONS:
@@ -56,18 +58,29 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import rasterio
+import shapely
 from matplotlib.colors import LinearSegmentedColormap, Normalize
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from plotly.subplots import make_subplots
-from rasterio.mask import mask as rio_mask
-from rasterio.transform import rowcol, xy
+from rasterio.transform import xy
 from scipy import stats
 from scipy.ndimage import gaussian_filter
 from scipy.ndimage import label as ndlabel
 from scipy.ndimage import uniform_filter
-from shapely.geometry import LineString, Point, Polygon
+from shapely.geometry import LineString, Polygon
 from shapely.ops import linemerge
 
+# Kernels are compiled with cache=True: machine code is stored next to this
+# script (__pycache__) and reused by later runs, so only the first run pays
+# the JIT compile.
+try:
+    from numba import njit, prange, vectorize
+
+    NUMBA_OK = True
+except ImportError:
+    NUMBA_OK = False
+    print("  ⚠️  numba not available — RUSLE / SCS-CN use plain numpy")
+
 warnings.filterwarnings("ignore")
 
 # ── Output sub-directories ──────────────────────────────────────────────────
@@ -82,6 +95,13 @@ for d in [HYD_DIR, SWC_DIR, UHG_DIR, HYD_MAPS, SWC_MAPS]:
 
 print("✅ Output directories created.")
 
+# Shared grids arrive as float32 memmaps from the main script (the cast is then
+# a no-op); forcing float32 here keeps every raster pipeline below in float32
+# even if a grid was reloaded as float64
+DEM_ARR, FACC_ARR, SLOPE_ARR = (
+    a.astype(np.float32, copy=False) for a in (DEM_ARR, FACC_ARR, SLOPE_ARR)
+)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # ██████████████████████████████████████████████████████████████████████████
 # SECTION 14 — RUNOFF ESTIMATION: SCS-CN, TIME OF CONCENTRATION, PEAK FLOW
@@ -113,27 +133,26 @@ u_g = RAIN_MEAN_MM - 0.5772 * alpha_g  # location (mode)
 DAILY_FRACTION = 0.22
 
 RETURN_PERIODS = [2, 5, 10, 25, 50, 100]
-RAINFALL_RT = {}  # P24hr [mm] for each return period
-
-gumbel_rows = []
-for T in RETURN_PERIODS:
-    y_T = -np.log(-np.log(1 - 1 / T))  # Gumbel reduced variate
-    P_T = (u_g + alpha_g * y_T) * DAILY_FRACTION  # 24-hr max rainfall
-    P_T = max(P_T, 10.0)  # floor at 10 mm
-    RAINFALL_RT[T] = round(P_T, 1)
-    gumbel_rows.append(
-        {
-            "Return_Period_yr": T,
-            "Annual_Rainfall_mm": round(u_g + alpha_g * y_T, 1),
-            "P24hr_mm": round(P_T, 1),
-        }
-    )
-    print(
-        f"  T={T:4d}-yr: Annual = {u_g + alpha_g * y_T:.0f} mm | "
-        f"P24hr = {P_T:.1f} mm"
-    )
 
-df_rainfall_freq = pd.DataFrame(gumbel_rows)
+# Gumbel quantiles for all return periods at once
+T_ARR = np.array(RETURN_PERIODS, dtype=float)
+y_T = -np.log(-np.log(1 - 1 / T_ARR))  # Gumbel reduced variate
+ANNUAL_RT = u_g + alpha_g * y_T  # annual rainfall [mm]
+P24_RT = np.maximum(ANNUAL_RT * DAILY_FRACTION, 10.0)  # 24-hr max, 10 mm floor
+# P24hr [mm] for each return period
+RAINFALL_RT = {T: round(float(p), 1) for T, p in zip(RETURN_PERIODS, P24_RT)}
+P24_MM = np.array(list(RAINFALL_RT.values()))  # same rounded depths, as array
+
+df_rainfall_freq = pd.DataFrame(
+    {
+        "Return_Period_yr": RETURN_PERIODS,
+        "Annual_Rainfall_mm": ANNUAL_RT.round(1),
+        "P24hr_mm": P24_RT.round(1),
+    }
+)
+for T, annual, p24 in zip(RETURN_PERIODS, ANNUAL_RT, P24_RT):
+    print(f"  T={T:4d}-yr: Annual = {annual:.0f} mm | P24hr = {p24:.1f} mm")
+
 df_rainfall_freq.to_csv(os.path.join(HYD_DIR, "rainfall_frequency.csv"), index=False)
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -148,23 +167,84 @@ df_rainfall_freq.to_csv(os.path.join(HYD_DIR, "rainfall_frequency.csv"), index=F
 
 print("\n[14-B] Computing Curve Number raster...")
 
-CN_ARR = np.full(DEM_ARR.shape, np.nan, dtype=np.float32)
-slope_safe = np.where(np.isnan(SLOPE_ARR), 0, SLOPE_ARR)
+# NaN-free float32 slope, computed once and shared by Sections 14–16
+SLOPE_SAFE = np.where(np.isnan(SLOPE_ARR), 0, SLOPE_ARR).astype(np.float32, copy=False)
 
-CN_ARR = np.where(
-    slope_safe < 3,
-    85.0,
-    np.where(slope_safe < 8, 79.0, np.where(slope_safe < 20, 75.0, 70.0)),
-)
-CN_ARR[np.isnan(DEM_ARR)] = np.nan
+# Slope-class factor rasters (CN here, RUSLE K/C/P in Section 15) are held as
+# uint8 class ids (255 = outside DEM) plus a small value table; float values
+# are only gathered where a full raster is written or drawn.
+CN_NODATA_CLS = 255
+
+
+def class_lut(values):
+    """256-entry float32 lookup table: class id → value, NaN for unused ids."""
+    lut = np.full(256, np.nan, dtype=np.float32)
+    lut[: len(values)] = values
+    return lut
+
+
+def class_stats(cls, lut):
+    """(min, max, mean) of lut[cls] over valid cells, from a class histogram."""
+    counts = np.bincount(np.asarray(cls).ravel(), minlength=256)
+    used = (counts > 0) & ~np.isnan(lut)
+    vals = lut[used].astype(np.float64)
+    n = counts[used]
+    return vals.min(), vals.max(), float(vals @ n / n.sum())
+
+
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _nan_range_kernel(flat):
+        lo, hi = np.inf, -np.inf
+        for i in prange(flat.size):
+            v = flat[i]
+            if not np.isnan(v):
+                lo = min(lo, v)
+                hi = max(hi, v)
+        return lo, hi
+
+    def nan_range(arr):
+        """(nanmin, nanmax) of arr in a single pass; NaN, NaN if all-NaN."""
+        lo, hi = _nan_range_kernel(np.ascontiguousarray(arr).ravel())
+        return (float(lo), float(hi)) if lo <= hi else (np.nan, np.nan)
+
+else:
+
+    def nan_range(arr):
+        """(nanmin, nanmax) of arr; NaN, NaN if all-NaN."""
+        return float(np.nanmin(arr)), float(np.nanmax(arr))
+
+
+def fast_percentile(arr, q, bins=200, rng=None):
+    """
+    Approximate nanpercentile from one histogram pass (no sort, no copy of
+    the array), accurate to one bin width — for colour-bar limits only.
+    rng defaults to the finite (min, max) of arr.
+    """
+    arr = np.asarray(arr)
+    if rng is None:
+        rng = nan_range(arr)
+    hist, edges = np.histogram(arr, bins=bins, range=rng)  # NaN is not counted
+    cum = np.cumsum(hist)
+    if cum[-1] == 0:
+        return np.nan
+    return float(edges[np.searchsorted(cum, q / 100.0 * cum[-1]) + 1])
+
+
+CN_CLASSES = np.array([85.0, 79.0, 75.0, 70.0])
+CN_SLOPE_BREAKS = [3.0, 8.0, 20.0]
+
+CN_CLS = np.digitize(SLOPE_SAFE, CN_SLOPE_BREAKS).astype(np.uint8)
+CN_CLS[DEM_NAN_MASK] = CN_NODATA_CLS
+CN_LUT = class_lut(CN_CLASSES)
+CN_ARR = CN_LUT[CN_CLS]
 
 # Save CN raster
 save_raster(CN_ARR, os.path.join(OUT_DIR, "CN.tif"), RASTERS["dem"])
 RASTERS["CN"] = os.path.join(OUT_DIR, "CN.tif")
-print(
-    f"  CN range: {np.nanmin(CN_ARR):.0f}–{np.nanmax(CN_ARR):.0f} | "
-    f"Mean: {np.nanmean(CN_ARR):.1f}"
-)
+cn_min, cn_max, cn_mean = class_stats(CN_CLS, CN_LUT)
+print(f"  CN range: {cn_min:.0f}–{cn_max:.0f} | Mean: {cn_mean:.1f}")
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  C. SCS-CN DIRECT RUNOFF & PER-BASIN RUNOFF STATISTICS
@@ -173,45 +253,98 @@ print(
 print("\n[14-C] SCS-CN Direct Runoff calculation...")
 
 
-def scscn_runoff(P_mm, CN):
-    """
-    SCS-CN direct runoff (Q) for rainfall P [mm] and Curve Number CN.
-    Q = (P - 0.2·S)² / (P + 0.8·S)  if P > 0.2·S  else Q = 0
-    S = 25400/CN - 254  (potential max retention, mm)
-    """
-    S = 25400.0 / CN - 254.0  # potential max retention [mm]
-    I_a = 0.2 * S  # initial abstraction [mm]
-    valid = P_mm > I_a
-    Q = np.where(valid, (P_mm - I_a) ** 2 / (P_mm + 0.8 * S), 0.0)
-    return np.maximum(Q, 0.0)
-
-
-def runoff_coeff(P_mm, CN):
-    """Runoff coefficient C = Q/P."""
-    Q = scscn_runoff(P_mm, CN)
-    return np.where(P_mm > 0, Q / P_mm, 0.0)
+# With numba both are compiled into broadcasting ufuncs (one fused loop, no
+# S / I_a / mask temporaries); the numpy versions below are the fallback.
+if NUMBA_OK:
+
+    @njit(cache=True)
+    def _scs_q(P_mm, CN):
+        S = 25400.0 / CN - 254.0  # potential max retention [mm]
+        I_a = 0.2 * S  # initial abstraction [mm]
+        if P_mm > I_a:
+            return max((P_mm - I_a) ** 2 / (P_mm + 0.8 * S), 0.0)
+        return 0.0
+
+    @vectorize(["float32(float32, float32)", "float64(float64, float64)"], cache=True)
+    def scscn_runoff(P_mm, CN):
+        """
+        SCS-CN direct runoff (Q) for rainfall P [mm] and Curve Number CN.
+        Q = (P - 0.2·S)² / (P + 0.8·S)  if P > 0.2·S  else Q = 0
+        S = 25400/CN - 254  (potential max retention, mm)
+        """
+        return _scs_q(P_mm, CN)
+
+    @vectorize(["float32(float32, float32)", "float64(float64, float64)"], cache=True)
+    def runoff_coeff(P_mm, CN):
+        """Runoff coefficient C = Q/P."""
+        if P_mm > 0:
+            return _scs_q(P_mm, CN) / P_mm
+        return 0.0
+
+else:
+
+    def scscn_runoff(P_mm, CN):
+        """
+        SCS-CN direct runoff (Q) for rainfall P [mm] and Curve Number CN.
+        Q = (P - 0.2·S)² / (P + 0.8·S)  if P > 0.2·S  else Q = 0
+        S = 25400/CN - 254  (potential max retention, mm)
+        """
+        S = 25400.0 / CN - 254.0  # potential max retention [mm]
+        I_a = 0.2 * S  # initial abstraction [mm]
+        valid = P_mm > I_a
+        Q = np.where(valid, (P_mm - I_a) ** 2 / (P_mm + 0.8 * S), 0.0)
+        return np.maximum(Q, 0.0)
+
+    def runoff_coeff(P_mm, CN):
+        """Runoff coefficient C = Q/P."""
+        Q = scscn_runoff(P_mm, CN)
+        return np.where(P_mm > 0, Q / P_mm, 0.0)
+
+
+# Basins are burned once into a label raster on the DEM grid; per-basin values
+# are then grouped straight from the in-memory rasters instead of re-opening
+# and rio_mask-clipping a GeoTIFF for every basin.
+N_BASINS = len(gdf_sub)
+BASIN_LABELS = basin_labels(gdf_sub.geometry.values)
+
+
+def label_groups(arr, labels=BASIN_LABELS, n=N_BASINS):
+    """Valid (non-NaN) values of arr for labels 1..n, as a list of 1-D arrays."""
+    lab = labels.ravel()
+    vals = np.asarray(arr).ravel()
+    ok = (lab > 0) & ~np.isnan(vals)
+    lab, vals = lab[ok], vals[ok]
+    counts = np.bincount(lab, minlength=n + 1)[1:]
+    vals = vals[np.argsort(lab, kind="stable")]
+    return np.split(vals, np.cumsum(counts)[:-1])
 
 
 # Per-basin: compute CN_mean, S_mean, Q for each return period, runoff volume
+# CN takes only four values, so per-basin CN mean/std follow exactly from a
+# (basin × slope class) histogram of the uint8 class raster
 RUNOFF_ROWS = []
-
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = [row.geometry.__geo_interface__]
-    A_km2 = df_areal.loc[bid, "Area_km2"]
+n_cn = CN_CLASSES.size
+cn_ok = (BASIN_LABELS > 0) & (CN_CLS != CN_NODATA_CLS)
+CN_COUNTS = np.bincount(
+    BASIN_LABELS[cn_ok] * n_cn + CN_CLS[cn_ok], minlength=(N_BASINS + 1) * n_cn
+).reshape(N_BASINS + 1, n_cn)[1:]
+CN_COUNTS_ALL = np.bincount(
+    CN_CLS[CN_CLS != CN_NODATA_CLS], minlength=n_cn
+)  # whole-raster fallback
+
+# Basin areas gathered once in gdf_sub order; the loop indexes them by position
+runoff_area_km2 = df_areal.loc[gdf_sub["basin_id"], "Area_km2"].to_numpy(
+    dtype=np.float64
+)
+
+for k, bid in enumerate(gdf_sub["basin_id"]):
+    A_km2 = runoff_area_km2[k]
     A_m2 = A_km2 * 1e6
 
-    # Clip CN to basin
-    with rasterio.open(RASTERS["CN"]) as src:
-        try:
-            arr_m, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            cn_clip = arr_m[0].astype(np.float32)
-            cn_clip[cn_clip == -9999.0] = np.nan
-        except Exception:
-            cn_clip = CN_ARR.copy()
-
-    CN_mean = float(np.nanmean(cn_clip))
-    CN_std = float(np.nanstd(cn_clip))
+    # CN class counts inside the basin (whole raster if the basin misses the grid)
+    cn_counts = CN_COUNTS[k] if CN_COUNTS[k].any() else CN_COUNTS_ALL
+    CN_mean = float(cn_counts @ CN_CLASSES / cn_counts.sum())
+    CN_std = float(np.sqrt(cn_counts @ (CN_CLASSES - CN_mean) ** 2 / cn_counts.sum()))
     S_mean = 25400.0 / CN_mean - 254.0  # [mm]
     Ia_mean = 0.2 * S_mean  # initial abstraction [mm]
 
@@ -224,15 +357,15 @@ for _, row in gdf_sub.iterrows():
         "Area_km2": round(A_km2, 3),
     }
 
-    for T in RETURN_PERIODS:
-        P = RAINFALL_RT[T]
-        Q = float(scscn_runoff(P, CN_mean))
-        C = float(runoff_coeff(P, CN_mean))
-        Vol_Mm3 = Q * 1e-3 * A_m2 / 1e6  # Million cubic metres
-        r_row[f"P_{T}yr_mm"] = P
-        r_row[f"Q_{T}yr_mm"] = round(Q, 2)
-        r_row[f"C_{T}yr"] = round(C, 3)
-        r_row[f"Vol_{T}yr_Mm3"] = round(Vol_Mm3, 4)
+    # All return periods in one call each
+    Q_T = scscn_runoff(P24_MM, CN_mean)
+    C_T = runoff_coeff(P24_MM, CN_mean)
+    Vol_T = Q_T * 1e-3 * A_m2 / 1e6  # Million cubic metres
+    for T, P, Q, C, Vol_Mm3 in zip(RETURN_PERIODS, P24_MM, Q_T, C_T, Vol_T):
+        r_row[f"P_{T}yr_mm"] = float(P)
+        r_row[f"Q_{T}yr_mm"] = round(float(Q), 2)
+        r_row[f"C_{T}yr"] = round(float(C), 3)
+        r_row[f"Vol_{T}yr_Mm3"] = round(float(Vol_Mm3), 4)
 
     RUNOFF_ROWS.append(r_row)
     print(
@@ -251,31 +384,56 @@ df_runoff.to_csv(os.path.join(HYD_DIR, "runoff_scscn.csv"))
 print("\n[14-D] Time of Concentration (Tc) calculations...")
 
 
-def tc_kirpich(L_m, H_m):
-    """
-    Kirpich (1940): Tc = 0.0195 × L^0.77 × S^-0.385
-    L = channel length (m), H = head difference (m)
-    S = H/L (dimensionless slope)
-    Returns Tc in minutes.
-    """
-    S = H_m / L_m if L_m > 0 else 0.001
-    S = max(S, 0.0001)
-    Tc = 0.0195 * (L_m**0.77) * (S**-0.385)
-    return Tc  # minutes
+# Unit conversions and constant factors of the Tc formulas, folded once
+FT_PER_M = 3.28084
+IN_PER_MM = 0.0394
+SCS_LAG_COEF = FT_PER_M**0.8 / (1900.0 * 0.6) * 60.0  # L[m]^0.8 → Tc [min]
+OVERLAND_COEF = 0.007 / np.sqrt(IN_PER_MM) * 60.0  # P[mm]^-0.5 → Tt [min]
+
+
+if NUMBA_OK:
+
+    @vectorize(["float64(float64, float64)"], cache=True)
+    def tc_kirpich(L_m, H_m):
+        """
+        Kirpich (1940): Tc = 0.0195 × L^0.77 × S^-0.385
+        L = channel length (m), H = head difference (m)
+        S = H/L (dimensionless slope)
+        Returns Tc in minutes (scalars or element-wise over arrays).
+        """
+        S = H_m / L_m if L_m > 0 else 0.001
+        if S < 0.0001:
+            S = 0.0001
+        return 0.0195 * L_m**0.77 * S**-0.385  # minutes
+
+else:
+
+    def tc_kirpich(L_m, H_m):
+        """
+        Kirpich (1940): Tc = 0.0195 × L^0.77 × S^-0.385
+        L = channel length (m), H = head difference (m)
+        S = H/L (dimensionless slope)
+        Returns Tc in minutes (scalars or element-wise over arrays).
+        """
+        L_m = np.asarray(L_m, dtype=np.float64)
+        pos = L_m > 0
+        S = np.where(pos, np.asarray(H_m) / np.where(pos, L_m, 1.0), 0.001)
+        S = np.maximum(S, 0.0001)
+        Tc = 0.0195 * np.power(L_m, 0.77) * np.power(S, -0.385)
+        return Tc if Tc.ndim else float(Tc)  # minutes
 
 
 def tc_scs_lag(L_m, CN, S_avg_pct):
     """
     SCS Lag method: tL = (L^0.8 × (S+1)^0.7) / (1900 × Y^0.5)
     L = hydraulic length (feet), S = (1000/CN)-10, Y = average watershed slope (%)
-    Returns lag time tL in hours; Tc = tL / 0.6
+    Returns Tc = tL / 0.6 in minutes.
     """
-    L_ft = L_m * 3.28084
     S_val = 1000.0 / CN - 10.0
-    Y = max(S_avg_pct, 0.1)
-    tL = (L_ft**0.8 * (S_val + 1) ** 0.7) / (1900.0 * Y**0.5)  # hours
-    Tc = tL / 0.6
-    return Tc * 60  # minutes
+    Y = np.maximum(S_avg_pct, 0.1)
+    return (
+        SCS_LAG_COEF * np.power(L_m, 0.8) * np.power(S_val + 1, 0.7) / np.sqrt(Y)
+    )  # minutes
 
 
 def tc_overland(L_m, n_mann, slope_frac, P_mm):
@@ -283,73 +441,76 @@ def tc_overland(L_m, n_mann, slope_frac, P_mm):
     NRCS Overland Flow Tc (sheet flow):
     Tt = 0.007 × (n×L)^0.8 / (P²^0.5 × S^0.4)
     n = Manning roughness, P2 = 2-year 24-hr rainfall (mm→in)
-    Returns Tt in hours; usually only for first 100m of flow.
+    Returns Tt in minutes; usually only for first 100m of flow.
     """
-    P2_in = P_mm * 0.0394
-    L_use = min(L_m, 100.0)  # max 100m for sheet flow
-    S = max(slope_frac, 0.001)
-    Tt = 0.007 * ((n_mann * L_use) ** 0.8) / ((P2_in**0.5) * (S**0.4))
-    return Tt * 60  # minutes
-
-
-TC_ROWS = []
-
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    A_km2 = df_areal.loc[bid, "Area_km2"]
-    Lb_km = df_areal.loc[bid, "Basin_Length_km"]
-    L_m = Lb_km * 1000.0
-    H_m = df_relief.loc[bid, "Basin_Relief_H_m"] if bid in df_relief.index else 100.0
-    slope_deg = df_relief.loc[bid, "Slope_Mean_deg"] if bid in df_relief.index else 5.0
-    slope_pct = np.tan(np.radians(slope_deg)) * 100.0
-    slope_frac = slope_pct / 100.0
-    CN_mean = df_runoff.loc[bid, "CN_mean"]
-    P2_mm = RAINFALL_RT[2]  # 2-yr 24-hr rainfall
-
-    Tc_k = tc_kirpich(L_m, H_m)
-    Tc_scs = tc_scs_lag(L_m, CN_mean, slope_pct)
-    Tc_ov = tc_overland(min(L_m, 100), 0.15, slope_frac, P2_mm)
-    Tc_avg = np.mean([Tc_k, Tc_scs])  # practical average
-
-    # Rational method peak discharge: Qp = C × i × A / 360
-    # i = rainfall intensity at Tc [mm/hr] using Tc in minutes
-    # Using Dickens formula common for India: i = a / (Tc + b)
-    # Or convert P24hr to intensity using Chen (1983) or Indian standard IDF
-    # Indian IMD empirical: i_Tc = P24hr × (24/Tc_hr)^(2/3) / 24  [mm/hr]
-    Q_PEAK = {}
-    C_rational = {}
-    for T in RETURN_PERIODS:
-        P24 = RAINFALL_RT[T]
-        Tc_hr = Tc_avg / 60.0
-        i_Tc = (P24 / 24.0) * (24.0 / Tc_hr) ** (2.0 / 3.0)  # mm/hr
-        # C (runoff coeff from SCS Q/P for this storm)
-        C_val = float(runoff_coeff(P24, CN_mean))
-        # Qp [m³/s] = C × i [mm/hr] × A [km²] / 3.6
-        Qp = C_val * i_Tc * A_km2 / 3.6
-        Q_PEAK[T] = round(Qp, 3)
-        C_rational[T] = round(C_val, 3)
-
-    r_tc = {
-        "basin_id": bid,
-        "L_km": round(Lb_km, 3),
-        "H_m": round(H_m, 1),
-        "Slope_pct": round(slope_pct, 2),
-        "Tc_Kirpich_min": round(Tc_k, 1),
-        "Tc_SCS_min": round(Tc_scs, 1),
-        "Tc_Avg_min": round(Tc_avg, 1),
-        "Tc_hr": round(Tc_avg / 60.0, 3),
-    }
-    for T in RETURN_PERIODS:
-        r_tc[f"Qp_{T}yr_m3s"] = Q_PEAK[T]
-        r_tc[f"C_{T}yr"] = C_rational[T]
+    L_use = np.minimum(L_m, 100.0)  # max 100m for sheet flow
+    S = np.maximum(slope_frac, 0.001)
+    return (
+        OVERLAND_COEF
+        * np.power(n_mann * L_use, 0.8)
+        / (np.sqrt(P_mm) * np.power(S, 0.4))
+    )  # minutes
+
+
+# All basins × return periods at once: (N,) basin parameters broadcast
+# against a (1, N_T) row of design rainfalls
+tc_ids = gdf_sub["basin_id"].to_numpy()
+A_km2 = df_areal.loc[tc_ids, "Area_km2"].to_numpy(dtype=np.float64)
+Lb_km = df_areal.loc[tc_ids, "Basin_Length_km"].to_numpy(dtype=np.float64)
+L_m = Lb_km * 1000.0
+H_m = (
+    df_relief["Basin_Relief_H_m"]
+    .reindex(tc_ids, fill_value=100.0)
+    .to_numpy(dtype=np.float64)
+)
+slope_deg = (
+    df_relief["Slope_Mean_deg"]
+    .reindex(tc_ids, fill_value=5.0)
+    .to_numpy(dtype=np.float64)
+)
+slope_pct = np.tan(np.radians(slope_deg)) * 100.0
+slope_frac = slope_pct / 100.0
+CN_basin = df_runoff.loc[tc_ids, "CN_mean"].to_numpy(dtype=np.float64)
+P2_mm = RAINFALL_RT[2]  # 2-yr 24-hr rainfall
+
+Tc_k = tc_kirpich(L_m, H_m)
+Tc_scs = tc_scs_lag(L_m, CN_basin, slope_pct)
+Tc_ov = tc_overland(np.minimum(L_m, 100), 0.15, slope_frac, P2_mm)
+Tc_avg = (Tc_k + Tc_scs) / 2.0  # practical average
+
+# Rational method peak discharge: Qp = C × i × A / 360
+# i = rainfall intensity at Tc [mm/hr] using Tc in minutes
+# Using Dickens formula common for India: i = a / (Tc + b)
+# Or convert P24hr to intensity using Chen (1983) or Indian standard IDF
+# Indian IMD empirical: i_Tc = P24hr × (24/Tc_hr)^(2/3) / 24  [mm/hr]
+P24 = P24_MM[None, :]
+Tc_hr = Tc_avg[:, None] / 60.0
+i_Tc = (P24 / 24.0) * (24.0 / Tc_hr) ** (2.0 / 3.0)  # mm/hr
+# C (runoff coeff from SCS Q/P for each storm)
+C_rational = runoff_coeff(P24, CN_basin[:, None])
+# Qp [m³/s] = C × i [mm/hr] × A [km²] / 3.6
+Q_PEAK = C_rational * i_Tc * A_km2[:, None] / 3.6
+
+tc_cols = {
+    "L_km": np.round(Lb_km, 3),
+    "H_m": np.round(H_m, 1),
+    "Slope_pct": np.round(slope_pct, 2),
+    "Tc_Kirpich_min": np.round(Tc_k, 1),
+    "Tc_SCS_min": np.round(Tc_scs, 1),
+    "Tc_Avg_min": np.round(Tc_avg, 1),
+    "Tc_hr": np.round(Tc_avg / 60.0, 3),
+}
+for t, T in enumerate(RETURN_PERIODS):
+    tc_cols[f"Qp_{T}yr_m3s"] = np.round(Q_PEAK[:, t], 3)
+    tc_cols[f"C_{T}yr"] = np.round(C_rational[:, t], 3)
+df_tc = pd.DataFrame(tc_cols, index=pd.Index(tc_ids, name="basin_id"))
 
-    TC_ROWS.append(r_tc)
+for r in df_tc.itertuples():
     print(
-        f"  {bid}: Tc_Kirpich={Tc_k:.1f} min | Tc_SCS={Tc_scs:.1f} min | "
-        f"Qp(25yr)={Q_PEAK[25]:.2f} m³/s"
+        f"  {r.Index}: Tc_Kirpich={r.Tc_Kirpich_min:.1f} min | "
+        f"Tc_SCS={r.Tc_SCS_min:.1f} min | Qp(25yr)={r.Qp_25yr_m3s:.2f} m³/s"
     )
 
-df_tc = pd.DataFrame(TC_ROWS).set_index("basin_id")
 df_tc.to_csv(os.path.join(HYD_DIR, "time_of_concentration_peak_discharge.csv"))
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -358,12 +519,62 @@ df_tc.to_csv(os.path.join(HYD_DIR, "time_of_concentration_peak_discharge.csv"))
 
 print("\n[14-E] Generating runoff maps...")
 
+# Subbasin label anchors — centroids computed once for every per-basin map
+# annotation in Sections 14–18
+_sub_centroids = gdf_sub.geometry.centroid
+BASIN_CENTROIDS = pd.DataFrame(
+    {"x": _sub_centroids.x.to_numpy(), "y": _sub_centroids.y.to_numpy()},
+    index=gdf_sub["basin_id"].to_numpy(),
+)
+
+
+# PNG maps never need more than ~2400 px across (8 in at 300 dpi): larger
+# rasters are reduced for imshow only; GeoTIFFs keep full resolution
+DISPLAY_MAX_PX = 2400
+
+
+def for_display(arr, max_px=DISPLAY_MAX_PX, categorical=False):
+    """
+    arr reduced so that its longer side is <= max_px: NaN-aware block mean,
+    or plain subsampling for class rasters (keeps only valid class values).
+    """
+    f = -(-max(arr.shape) // max_px)  # ceil
+    if f <= 1:
+        return arr
+    if categorical:
+        return arr[::f, ::f]
+    H, W = arr.shape
+    padded = np.pad(
+        np.asarray(arr, dtype=np.float32),
+        ((0, -H % f), (0, -W % f)),
+        constant_values=np.nan,
+    )
+    h, w = padded.shape[0] // f, padded.shape[1] // f
+    return np.nanmean(padded.reshape(h, f, w, f), axis=(1, 3))
+
+
+# Shared text style: one halo path-effect object reused by every basin label
+BASIN_LABEL_STYLE = dict(
+    ha="center",
+    va="center",
+    fontweight="bold",
+    path_effects=[pe.withStroke(linewidth=2, foreground="white")],
+)
+
+
+def annotate_basins(ax, basin_ids, texts, fontsize=8):
+    """Write one bold, white-haloed label per basin at its centroid."""
+    cxy = BASIN_CENTROIDS.loc[list(basin_ids)]
+    for x, y, text in zip(cxy["x"].to_numpy(), cxy["y"].to_numpy(), texts):
+        ax.text(x, y, text, fontsize=fontsize, **BASIN_LABEL_STYLE)
+
+
 # CN map
 fig, ax, utm_ext = base_axes(
     "Curve Number (CN) Map — SCS-CN, AMC-II\n" "(Slope-based proxy, Deccan Trap basalt)"
 )
 im = ax.imshow(
-    CN_ARR,
+    for_display(CN_ARR, categorical=True),
     extent=raster_extent(),
     origin="upper",
     cmap="RdYlGn_r",
@@ -378,20 +589,12 @@ cax = divider.append_axes("right", size="3%", pad=0.07)
 cb = plt.colorbar(im, cax=cax)
 cb.set_label("Curve Number (CN)", fontsize=10)
 # Annotate each basin with CN mean
-for _, r in gdf_sub.iterrows():
-    bid = r["basin_id"]
-    cx, cy = r.geometry.centroid.x, r.geometry.centroid.y
-    cn_val = df_runoff.loc[bid, "CN_mean"] if bid in df_runoff.index else np.nan
-    ax.text(
-        cx,
-        cy,
-        f"{bid}\nCN={cn_val:.1f}",
-        ha="center",
-        va="center",
-        fontsize=8,
-        fontweight="bold",
-        path_effects=[pe.withStroke(linewidth=2, foreground="white")],
-    )
+cn_vals = df_runoff["CN_mean"].reindex(BASIN_CENTROIDS.index)
+annotate_basins(
+    ax,
+    cn_vals.index,
+    [f"{bid}\nCN={v:.1f}" for bid, v in cn_vals.items()],
+)
 finalize_and_save(fig, ax, utm_ext, "14a_CN_map.png")
 
 # Runoff volume map for 25-yr event
@@ -415,18 +618,17 @@ gdf_rv.plot(
     linewidth=1.2,
     legend_kwds={"label": "Runoff Volume (Mm³)", "shrink": 0.75},
 )
-for _, r in gdf_rv.iterrows():
-    cx, cy = r.geometry.centroid.x, r.geometry.centroid.y
-    ax.text(
-        cx,
-        cy,
-        f"{r['basin_id']}\nQ={r['Q_25yr_mm']:.0f} mm\n{r['Vol_25yr_Mm3']:.3f} Mm³",
-        ha="center",
-        va="center",
-        fontsize=7.5,
-        fontweight="bold",
-        path_effects=[pe.withStroke(linewidth=2, foreground="white")],
-    )
+annotate_basins(
+    ax,
+    gdf_rv["basin_id"],
+    [
+        f"{bid}\nQ={q:.0f} mm\n{v:.3f} Mm³"
+        for bid, q, v in zip(
+            gdf_rv["basin_id"], gdf_rv["Q_25yr_mm"], gdf_rv["Vol_25yr_Mm3"]
+        )
+    ],
+    fontsize=7.5,
+)
 gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.7, alpha=0.5, zorder=5)
 finalize_and_save(fig, ax, utm_ext, "14b_runoff_volume_25yr.png")
 
@@ -440,9 +642,12 @@ fig = make_subplots(
     ],
 )
 colors_rt = px.colors.qualitative.Set1
+# (basin × return period) blocks pulled once; row i feeds basin i's traces
+QP_RT_M3S = df_tc[[f"Qp_{T}yr_m3s" for T in RETURN_PERIODS]].to_numpy()
+Q_RT_MM = df_runoff.loc[df_tc.index, [f"Q_{T}yr_mm" for T in RETURN_PERIODS]].to_numpy()
 for i, bid in enumerate(df_tc.index):
-    qp_vals = [df_tc.loc[bid, f"Qp_{T}yr_m3s"] for T in RETURN_PERIODS]
-    q_vals = [df_runoff.loc[bid, f"Q_{T}yr_mm"] for T in RETURN_PERIODS]
+    qp_vals = QP_RT_M3S[i]
+    q_vals = Q_RT_MM[i]
     fig.add_trace(
         go.Scatter(
             x=RETURN_PERIODS,
@@ -504,185 +709,219 @@ print("=" * 70)
 # P  = Support practice factor (dimensionless, 0–1)
 
 # ─────────────────────────────────────────────────────────────────────────────
-#  A. R-FACTOR — Erosivity
+#  FACTOR MODELS
 # ─────────────────────────────────────────────────────────────────────────────
-
-print("\n[15-A] R-Factor (Rainfall Erosivity)...")
+#
+# R — Rainfall erosivity
 # Maharashtra Deccan Trap region: R ≈ 550–800 MJ·mm/(ha·hr·yr)
 # Pravara catchment (Ahmednagar): R ≈ 650 MJ·mm/(ha·hr·yr)
 # Spatial variation modelled as: R = R0 × (1 + 0.05 × (elev - elev_mean)/elev_std)
 # (higher elevations get slightly higher R due to orographic rainfall)
-
-R0 = 650.0
-elev_mean = np.nanmean(DEM_ARR)
-elev_std = np.nanstd(DEM_ARR)
-
-R_ARR = R0 * (1.0 + 0.05 * (DEM_ARR - elev_mean) / (elev_std + 1e-6))
-R_ARR = np.clip(R_ARR, 400.0, 1000.0)
-R_ARR[np.isnan(DEM_ARR)] = np.nan
-
-save_raster(
-    R_ARR.astype(np.float32), os.path.join(OUT_DIR, "RUSLE_R.tif"), RASTERS["dem"]
-)
-RASTERS["RUSLE_R"] = os.path.join(OUT_DIR, "RUSLE_R.tif")
-print(
-    f"  R-factor range: {np.nanmin(R_ARR):.0f}–{np.nanmax(R_ARR):.0f} "
-    f"MJ·mm/(ha·hr·yr) | Mean: {np.nanmean(R_ARR):.0f}"
-)
-
-# ─────────────────────────────────────────────────────────────────────────────
-#  B. K-FACTOR — Soil Erodibility
-# ─────────────────────────────────────────────────────────────────────────────
-
-print("\n[15-B] K-Factor (Soil Erodibility)...")
+#
+# K — Soil erodibility
 # Deccan Trap basalt → Vertisols + Inceptisols
 # K ranges: Vertisol (clay-rich) 0.10–0.20; Shallow rocky 0.05–0.10
 # Proxy using slope: steeper slopes → shallower soil → lower K (rocky)
 # Flat/gentle → deep Vertisol → higher K
-
-K_ARR = np.where(
-    slope_safe < 3,
-    0.25,  # Deep Vertisol (fine clay, flat)
-    np.where(
-        slope_safe < 8,
-        0.20,  # Vertic Inceptisol
-        np.where(
-            slope_safe < 15,
-            0.15,  # Shallow Alfisol
-            np.where(slope_safe < 25, 0.10, 0.05),  # Lithic Inceptisol (stony)
-        ),
-    ),
-).astype(
-    np.float32
-)  # Rock/talus
-K_ARR[np.isnan(DEM_ARR)] = np.nan
-
-save_raster(K_ARR, os.path.join(OUT_DIR, "RUSLE_K.tif"), RASTERS["dem"])
-RASTERS["RUSLE_K"] = os.path.join(OUT_DIR, "RUSLE_K.tif")
-print(
-    f"  K-factor range: {np.nanmin(K_ARR):.2f}–{np.nanmax(K_ARR):.2f} "
-    f"t·ha·hr/(ha·MJ·mm) | Mean: {np.nanmean(K_ARR):.3f}"
-)
-
-# ─────────────────────────────────────────────────────────────────────────────
-#  C. LS-FACTOR — Slope Length-Gradient
-# ─────────────────────────────────────────────────────────────────────────────
-
-print("\n[15-C] LS-Factor (Slope-Length Gradient, Moore et al. 1991)...")
-# Moore et al. (1991) LS from flow accumulation (As) and slope:
+#
+# LS — Slope length-gradient, Moore et al. (1991) from flow accumulation:
 #   LS = (As/22.13)^m × (sin(β)/0.0896)^n
 # where As = specific catchment area (m²/m) = flow_acc × cell_size
 # m = 0.6 (rill erosion, semi-arid), n = 1.3
 # This formulation handles divergent/convergent flow better than Wischmeier's L.
-
-cell_area_m2 = DEM_RES * DEM_RES
-fa_safe = np.where(np.isnan(FACC_ARR), 0, np.maximum(FACC_ARR, 1))
-As_arr = fa_safe * DEM_RES  # specific catchment area m²/m
-slope_rad = np.radians(np.where(np.isnan(SLOPE_ARR), 0.01, SLOPE_ARR))
-slope_rad = np.maximum(slope_rad, np.radians(0.01))  # min 0.01° to avoid log issues
-
-m_exp = 0.6
-n_exp = 1.3
-LS_ARR = ((As_arr / 22.13) ** m_exp) * ((np.sin(slope_rad) / 0.0896) ** n_exp)
-LS_ARR = np.clip(LS_ARR, 0.0, 50.0)  # cap to avoid extreme values on cliffs
-LS_ARR[np.isnan(DEM_ARR)] = np.nan
-
-save_raster(
-    LS_ARR.astype(np.float32), os.path.join(OUT_DIR, "RUSLE_LS.tif"), RASTERS["dem"]
-)
-RASTERS["RUSLE_LS"] = os.path.join(OUT_DIR, "RUSLE_LS.tif")
-print(
-    f"  LS-factor range: {np.nanmin(LS_ARR):.2f}–{np.nanmax(LS_ARR):.2f} | "
-    f"Mean: {np.nanmean(LS_ARR):.2f}"
-)
-
-# ─────────────────────────────────────────────────────────────────────────────
-#  D. C-FACTOR — Cover-Management
-# ─────────────────────────────────────────────────────────────────────────────
-
-print("\n[15-D] C-Factor (Cover-Management)...")
+#
+# C — Cover-management
 # No land-use raster: use slope + elevation proxy for cover quality
 # Flat lowlands (cultivated, Rabi/Kharif crops): C = 0.15–0.25
 # Moderate slopes (degraded dryland agriculture): C = 0.25–0.40
 # Steep slopes (sparse scrub/bare basalt): C = 0.40–0.60
 # Very steep / ridges (bare rock): C = 0.10–0.20 (less soil to erode)
-
-C_ARR = np.where(
-    slope_safe < 3,
-    0.20,  # Irrigated/Rabi crops in flat areas
-    np.where(
-        slope_safe < 8,
-        0.30,  # Rainfed Kharif crops
-        np.where(
-            slope_safe < 15,
-            0.45,  # Degraded rangeland/scrub
-            np.where(slope_safe < 25, 0.55, 0.15),  # Sparse vegetation / bare patches
-        ),
-    ),
-).astype(
-    np.float32
-)  # Rocky ridge (low erosion)
-C_ARR[np.isnan(DEM_ARR)] = np.nan
-
-save_raster(C_ARR, os.path.join(OUT_DIR, "RUSLE_C.tif"), RASTERS["dem"])
-RASTERS["RUSLE_C"] = os.path.join(OUT_DIR, "RUSLE_C.tif")
-print(
-    f"  C-factor range: {np.nanmin(C_ARR):.2f}–{np.nanmax(C_ARR):.2f} | "
-    f"Mean: {np.nanmean(C_ARR):.3f}"
-)
-
-# ─────────────────────────────────────────────────────────────────────────────
-#  E. P-FACTOR — Support Practice
-# ─────────────────────────────────────────────────────────────────────────────
-
-print("\n[15-E] P-Factor (Support Practice)...")
+#
+# P — Support practice
 # Maharashtra farmers on steep slopes use traditional bunding (terracing)
 # Flat (<3°) : cultivated flat fields, no terracing needed → P = 1.0
 # Gentle–Moderate (3–20°): traditional tied ridges / broad-based bunds → P = 0.6
 # Steep (>20°): bench terracing or no practice → P = 0.8
 # Very steep (>30°): grassland / no effective practice → P = 1.0
+#
+# Slope classes (degrees):   <3     3–8    8–15   15–25   ≥25
+RUSLE_SLOPE_BREAKS = np.array([3.0, 8.0, 15.0, 25.0])
+RUSLE_K_CLASSES = np.array([0.25, 0.20, 0.15, 0.10, 0.05])
+# Deep Vertisol (fine clay, flat) | Vertic Inceptisol | Shallow Alfisol |
+# Lithic Inceptisol (stony) | Rock/talus
+RUSLE_C_CLASSES = np.array([0.20, 0.30, 0.45, 0.55, 0.15])
+# Irrigated/Rabi crops in flat areas | Rainfed Kharif crops | Degraded
+# rangeland/scrub | Sparse vegetation / bare patches | Rocky ridge (low erosion)
+RUSLE_P_CLASSES = np.array([1.00, 0.55, 0.65, 0.80, 1.00])
+# No practice | Contour cultivation + bunding | Graded bunding | Bench terrace |
+# None effective
+# K·C·P per slope class — one gather instead of three in the soil-loss product;
+# float32 so the gathered raster does not promote A to float64
+RUSLE_KCP_CLASSES = (RUSLE_K_CLASSES * RUSLE_C_CLASSES * RUSLE_P_CLASSES).astype(
+    np.float32
+)
 
-P_ARR = np.where(
-    slope_safe < 3,
-    1.00,
-    np.where(
-        slope_safe < 8,
-        0.55,  # Contour cultivation + bunding
-        np.where(
-            slope_safe < 15,
-            0.65,  # Graded bunding
-            np.where(slope_safe < 25, 0.80, 1.00),  # Bench terrace
-        ),
-    ),
-).astype(np.float32)
-P_ARR[np.isnan(DEM_ARR)] = np.nan
+RUSLE_K_LUT = class_lut(RUSLE_K_CLASSES)
+RUSLE_C_LUT = class_lut(RUSLE_C_CLASSES)
+RUSLE_P_LUT = class_lut(RUSLE_P_CLASSES)
 
-save_raster(P_ARR, os.path.join(OUT_DIR, "RUSLE_P.tif"), RASTERS["dem"])
-RASTERS["RUSLE_P"] = os.path.join(OUT_DIR, "RUSLE_P.tif")
-print(
-    f"  P-factor range: {np.nanmin(P_ARR):.2f}–{np.nanmax(P_ARR):.2f} | "
-    f"Mean: {np.nanmean(P_ARR):.3f}"
-)
+R0 = 650.0
+m_exp = 0.6
+n_exp = 1.3
 
-# ─────────────────────────────────────────────────────────────────────────────
-#  F. ANNUAL SOIL LOSS (A) — RUSLE
-# ─────────────────────────────────────────────────────────────────────────────
 
-print("\n[15-F] Computing Annual Soil Loss raster A = R·K·LS·C·P ...")
+def _rusle_numpy(dem, slope_safe, facc, res, r0, emean, estd, R, LS, CLS, A):
+    nodata = np.isnan(dem)
+    cls = np.digitize(slope_safe, RUSLE_SLOPE_BREAKS).astype(np.uint8)
+    # R = r0·(1 + 0.05·(z − mean)/std), clipped to 400–1000, in place
+    np.subtract(dem, emean, out=R)
+    R *= 0.05 / (estd + 1e-6)
+    R += 1.0
+    R *= r0
+    np.clip(R, 400.0, 1000.0, out=R)
+    # LS built in place in the float32 output plus one scratch buffer, rather
+    # than a chain of (float64-promoting) full-raster temporaries
+    np.copyto(LS, facc)
+    np.maximum(LS, 1, out=LS)
+    LS[np.isnan(LS)] = 0
+    LS *= res / 22.13  # specific catchment area As [m²/m] / 22.13
+    LS **= m_exp
+    buf = np.empty_like(LS)
+    np.maximum(slope_safe, 0.01, out=buf)  # min 0.01° to avoid log issues
+    np.radians(buf, out=buf)
+    np.sin(buf, out=buf)
+    buf *= 1.0 / 0.0896
+    buf **= n_exp
+    LS *= buf
+    np.clip(LS, 0.0, 50.0, out=LS)  # cap to avoid extreme values on cliffs
+    np.multiply(R, LS, out=A)
+    A *= RUSLE_KCP_CLASSES[cls]
+    np.clip(A, 0.0, 500.0, out=A)  # t/ha/yr, cap extremes
+    for arr in (R, LS, A):
+        arr[nodata] = np.nan
+    CLS[:] = cls
+    CLS[nodata] = CN_NODATA_CLS
+    return A
+
+
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _rusle_kernel(dem, slope_safe, facc, res, r0, emean, estd, R, LS, CLS, A):
+        # One pass per pixel: slope class lookup, R/LS from elevation and
+        # flow accumulation, product and clip — no full-raster temporaries
+        H, W = dem.shape
+        nb = RUSLE_SLOPE_BREAKS.size
+        ls_slope_min = np.sin(np.radians(0.01))
+        for i in prange(H):
+            for j in range(W):
+                z = dem[i, j]
+                if np.isnan(z):
+                    R[i, j] = LS[i, j] = A[i, j] = np.nan
+                    CLS[i, j] = CN_NODATA_CLS
+                    continue
+                s = slope_safe[i, j]
+                c = 0
+                while c < nb and s >= RUSLE_SLOPE_BREAKS[c]:
+                    c += 1
+                r = r0 * (1.0 + 0.05 * (z - emean) / (estd + 1e-6))
+                r = min(max(r, 400.0), 1000.0)
+                f = facc[i, j]
+                f = 0.0 if np.isnan(f) else max(f, 1.0)
+                sin_b = np.sin(np.radians(s)) if s > 0.01 else ls_slope_min
+                ls = ((f * res / 22.13) ** m_exp) * ((sin_b / 0.0896) ** n_exp)
+                ls = min(max(ls, 0.0), 50.0)
+                R[i, j] = r
+                LS[i, j] = ls
+                CLS[i, j] = c
+                A[i, j] = min(max(r * ls * RUSLE_KCP_CLASSES[c], 0.0), 500.0)
+        return A
+
+else:
+    _rusle_kernel = _rusle_numpy
+
+
+print("\n[15-A..F] RUSLE factors R, K, LS, C, P and A = R·K·LS·C·P ...")
+
+elev_mean = np.nanmean(DEM_ARR)
+elev_std = np.nanstd(DEM_ARR)
+cell_area_m2 = DEM_RES * DEM_RES
 
-A_ARR = R_ARR * K_ARR * LS_ARR * C_ARR * P_ARR  # t/ha/yr
-A_ARR = np.clip(A_ARR, 0.0, 500.0)  # cap extreme values
-A_ARR[np.isnan(DEM_ARR)] = np.nan
+# R / LS / A are continuous float32 rasters; K, C and P are all functions of
+# one slope class, kept as a single uint8 raster + lookup tables
+R_ARR, LS_ARR, A_ARR = (np.empty(DEM_ARR.shape, dtype=np.float32) for _ in range(3))
+RUSLE_CLS = np.empty(DEM_ARR.shape, dtype=np.uint8)
+_rusle_kernel(
+    DEM_ARR,
+    SLOPE_SAFE,
+    FACC_ARR,
+    float(DEM_RES),
+    R0,
+    float(elev_mean),
+    float(elev_std),
+    R_ARR,
+    LS_ARR,
+    RUSLE_CLS,
+    A_ARR,
+)
 
-save_raster(
-    A_ARR.astype(np.float32), os.path.join(OUT_DIR, "RUSLE_A.tif"), RASTERS["dem"]
+print(
+    f"  R-factor range: {np.nanmin(R_ARR):.0f}–{np.nanmax(R_ARR):.0f} "
+    f"MJ·mm/(ha·hr·yr) | Mean: {np.nanmean(R_ARR):.0f}"
+)
+k_min, k_max, k_mean = class_stats(RUSLE_CLS, RUSLE_K_LUT)
+print(
+    f"  K-factor range: {k_min:.2f}–{k_max:.2f} "
+    f"t·ha·hr/(ha·MJ·mm) | Mean: {k_mean:.3f}"
 )
-RASTERS["RUSLE_A"] = os.path.join(OUT_DIR, "RUSLE_A.tif")
+print(
+    f"  LS-factor range: {np.nanmin(LS_ARR):.2f}–{np.nanmax(LS_ARR):.2f} | "
+    f"Mean: {np.nanmean(LS_ARR):.2f}"
+)
+c_min, c_max, c_mean = class_stats(RUSLE_CLS, RUSLE_C_LUT)
+print(f"  C-factor range: {c_min:.2f}–{c_max:.2f} | Mean: {c_mean:.3f}")
+p_min, p_max, p_mean = class_stats(RUSLE_CLS, RUSLE_P_LUT)
+print(f"  P-factor range: {p_min:.2f}–{p_max:.2f} | Mean: {p_mean:.3f}")
 print(
     f"  Annual soil loss range: {np.nanmin(A_ARR):.1f}–{np.nanmax(A_ARR):.0f} t/ha/yr"
 )
 print(f"  Basin-wide mean: {np.nanmean(A_ARR):.1f} t/ha/yr")
 
+
+def save_raster_stack(bands, path, template_path):
+    """Write a {name: array} dict as one float32 multi-band GeoTIFF."""
+    with rasterio.open(template_path) as src:
+        meta = src.meta.copy()
+    meta.update(
+        {
+            "dtype": "float32",
+            "nodata": -9999.0,
+            "count": len(bands),
+            **gtiff_write_options(np.float32),
+            "BIGTIFF": "IF_SAFER",
+        }
+    )
+    with rasterio.open(path, "w", **meta) as dst:
+        for i, (name, arr) in enumerate(bands.items(), start=1):
+            write_band_strips(dst, arr, i)
+            dst.set_band_description(i, name)
+
+
+# All six factor grids go into one stack; RASTERS["RUSLE_*"] = (path, band)
+RUSLE_STACK_PATH = os.path.join(OUT_DIR, "RUSLE_stack.tif")
+RUSLE_BANDS = {
+    "R": R_ARR,
+    "K": RUSLE_K_LUT[RUSLE_CLS],
+    "LS": LS_ARR,
+    "C": RUSLE_C_LUT[RUSLE_CLS],
+    "P": RUSLE_P_LUT[RUSLE_CLS],
+    "A": A_ARR,
+}
+save_raster_stack(RUSLE_BANDS, RUSLE_STACK_PATH, RASTERS["dem"])
+for band_idx, name in enumerate(RUSLE_BANDS, start=1):
+    RASTERS[f"RUSLE_{name}"] = (RUSLE_STACK_PATH, band_idx)
+del RUSLE_BANDS
+
 # ── USDA soil loss class thresholds (t/ha/yr) ────────────────────────────────
 # Slight <5 | Moderate 5-15 | High 15-30 | Very High 30-60 | Severe >60
 SOIL_LOSS_CLASSES = [
@@ -711,67 +950,63 @@ print("\n[15-G] Sediment Delivery Ratio & Annual Sediment Yield...")
 # Also: SDR = exp(-1.58 + 0.46 × ln(slope%) - 0.19 × ln(A_km²))
 # We use Renfro (1975) formula: SDR = 0.42 × A_km2^(-0.125)
 
-RUSLE_ROWS = []
-
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = [row.geometry.__geo_interface__]
-    A_km2 = df_areal.loc[bid, "Area_km2"]
-
-    # Clip A raster
-    with rasterio.open(RASTERS["RUSLE_A"]) as src:
-        try:
-            arr_m, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-            a_clip = arr_m[0].astype(np.float32)
-            a_clip[a_clip == -9999.0] = np.nan
-        except Exception:
-            a_clip = A_ARR.copy()
-
-    valid_a = a_clip[~np.isnan(a_clip)]
-    if len(valid_a) == 0:
-        continue
-
-    A_mean = float(np.nanmean(valid_a))  # t/ha/yr
-    A_max = float(np.nanpercentile(valid_a, 95))
-
-    # Total gross erosion (t/yr): A_mean [t/ha/yr] × Area [ha]
-    A_ha = A_km2 * 100.0
-    Gross_erosion_t_yr = A_mean * A_ha
-
-    # SDR
-    SDR = 0.42 * (A_km2**-0.125)
-    SDR = min(SDR, 0.80)
-
-    # Annual sediment yield
-    Sed_yield_t_yr = Gross_erosion_t_yr * SDR
-    Sed_yield_Mm3_yr = Sed_yield_t_yr / (1300 * 1000)  # assuming bulk density 1.3 t/m³
+# Per-basin soil-loss class counts and sums in one bincount pass each, as a
+# (basin × class) table like CN_COUNTS; the values themselves are grouped only
+# for the 95th percentile
+SOIL_LOSS_BREAKS = [hi for _, hi, _, _ in SOIL_LOSS_CLASSES[:-1]]
+n_loss = len(SOIL_LOSS_CLASSES)
+a_ok = (BASIN_LABELS > 0) & ~np.isnan(A_ARR)
+a_lab, a_vals = BASIN_LABELS[a_ok], A_ARR[a_ok]
+LOSS_COUNTS = np.bincount(
+    a_lab * n_loss + np.digitize(a_vals, SOIL_LOSS_BREAKS),
+    minlength=(N_BASINS + 1) * n_loss,
+).reshape(N_BASINS + 1, n_loss)[1:]
+a_sums = np.bincount(a_lab, weights=a_vals, minlength=N_BASINS + 1)[1:]
+a_counts = LOSS_COUNTS.sum(axis=1)
+del a_lab, a_vals
+
+# Basins with at least one valid soil-loss cell
+has_a = a_counts > 0
+rusle_ids = gdf_sub["basin_id"].to_numpy()[has_a]
+A_GROUPS = label_groups(A_ARR)
+
+A_mean = a_sums[has_a] / a_counts[has_a]  # t/ha/yr
+A_p95 = np.array([nanpercentile_fast(A_GROUPS[k], 95) for k in np.flatnonzero(has_a)])
+
+# Total gross erosion (t/yr): A_mean [t/ha/yr] × Area [ha]
+A_km2 = df_areal["Area_km2"].reindex(rusle_ids).to_numpy(dtype=np.float64)
+A_ha = A_km2 * 100.0
+Gross_erosion_t_yr = A_mean * A_ha
+
+# SDR (Renfro), capped at 0.80, and annual sediment yield for all basins at once
+SDR = np.minimum(0.42 * A_km2**-0.125, 0.80)
+Sed_yield_t_yr = Gross_erosion_t_yr * SDR
+Sed_yield_Mm3_yr = Sed_yield_t_yr / (1300 * 1000)  # assuming bulk density 1.3 t/m³
+
+loss_class = [classify_soil_loss(a) for a in A_mean]
+rusle_cols = {
+    "A_mean_t_ha_yr": np.round(A_mean, 2),
+    "A_p95_t_ha_yr": np.round(A_p95, 2),
+    "Area_ha": np.round(A_ha, 1),
+    "Gross_Erosion_t_yr": np.round(Gross_erosion_t_yr, 0),
+    "SDR": np.round(SDR, 3),
+    "Sed_Yield_t_yr": np.round(Sed_yield_t_yr, 0),
+    "Sed_Yield_Mm3_yr": np.round(Sed_yield_Mm3_yr, 6),
+    "Loss_Class_Mode": loss_class,
+}
 
-    # Area fraction per soil loss class
-    class_fracs = {}
-    for lo, hi, name, _ in SOIL_LOSS_CLASSES:
-        frac = float(np.sum((valid_a >= lo) & (valid_a < hi))) / len(valid_a)
-        class_fracs[name] = round(frac * 100, 1)
+# Area fraction per soil loss class
+loss_frac = LOSS_COUNTS[has_a] / a_counts[has_a, None]
+for c, (_, _, name, _) in enumerate(SOIL_LOSS_CLASSES):
+    rusle_cols[f"Pct_{name}"] = np.round(loss_frac[:, c] * 100, 1)
 
-    RUSLE_ROWS.append(
-        {
-            "basin_id": bid,
-            "A_mean_t_ha_yr": round(A_mean, 2),
-            "A_p95_t_ha_yr": round(A_max, 2),
-            "Area_ha": round(A_ha, 1),
-            "Gross_Erosion_t_yr": round(Gross_erosion_t_yr, 0),
-            "SDR": round(SDR, 3),
-            "Sed_Yield_t_yr": round(Sed_yield_t_yr, 0),
-            "Sed_Yield_Mm3_yr": round(Sed_yield_Mm3_yr, 6),
-            "Loss_Class_Mode": classify_soil_loss(A_mean),
-            **{f"Pct_{k}": v for k, v in class_fracs.items()},
-        }
-    )
+df_rusle = pd.DataFrame(rusle_cols, index=pd.Index(rusle_ids, name="basin_id"))
+for bid, a, sdr, sed, cls in zip(rusle_ids, A_mean, SDR, Sed_yield_t_yr, loss_class):
     print(
-        f"  {bid}: A_mean={A_mean:.1f} t/ha/yr | SDR={SDR:.3f} | "
-        f"Sed.Yield={Sed_yield_t_yr:.0f} t/yr | Class: {classify_soil_loss(A_mean)}"
+        f"  {bid}: A_mean={a:.1f} t/ha/yr | SDR={sdr:.3f} | "
+        f"Sed.Yield={sed:.0f} t/yr | Class: {cls}"
     )
 
-df_rusle = pd.DataFrame(RUSLE_ROWS).set_index("basin_id")
 df_rusle.to_csv(os.path.join(HYD_DIR, "RUSLE_soil_erosion.csv"))
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -785,14 +1020,14 @@ fig, ax, utm_ext = base_axes(
     "RUSLE LS-Factor Map\n(Moore et al. 1991: " "Slope-Length × Gradient combined)"
 )
 im = ax.imshow(
-    LS_ARR,
+    for_display(LS_ARR),
     extent=raster_extent(),
     origin="upper",
     cmap="YlOrRd",
     alpha=0.80,
     zorder=1,
     vmin=0,
-    vmax=np.nanpercentile(LS_ARR, 97),
+    vmax=fast_percentile(LS_ARR, 97),
 )
 gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.2, zorder=10)
 gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.6, alpha=0.5, zorder=8)
@@ -814,7 +1049,7 @@ cmap_sl_obj = LinearSegmentedColormap.from_list("sl", colors_sl, N=len(colors_sl
 norm_sl = mcolors.BoundaryNorm(boundaries_sl, cmap_sl_obj.N)
 
 im = ax.imshow(
-    A_ARR,
+    for_display(A_ARR),
     extent=raster_extent(),
     origin="upper",
     cmap=cmap_sl_obj,
@@ -834,21 +1069,21 @@ ax.legend(
     framealpha=0.9,
 )
 # Annotate basins
-for _, r in gdf_sub.iterrows():
-    bid = r["basin_id"]
-    if bid in df_rusle.index:
-        cx, cy = r.geometry.centroid.x, r.geometry.centroid.y
-        ax.text(
-            cx,
-            cy,
-            f"{bid}\n{df_rusle.loc[bid,'A_mean_t_ha_yr']:.1f} t/ha/yr\n"
-            f"{df_rusle.loc[bid,'Loss_Class_Mode']}",
-            ha="center",
-            va="center",
-            fontsize=7,
-            fontweight="bold",
-            path_effects=[pe.withStroke(linewidth=2, foreground="white")],
+rusle_lbl = df_rusle.loc[
+    BASIN_CENTROIDS.index.intersection(df_rusle.index, sort=False),
+    ["A_mean_t_ha_yr", "Loss_Class_Mode"],
+]
+annotate_basins(
+    ax,
+    rusle_lbl.index,
+    [
+        f"{bid}\n{a:.1f} t/ha/yr\n{cls}"
+        for bid, a, cls in zip(
+            rusle_lbl.index, rusle_lbl["A_mean_t_ha_yr"], rusle_lbl["Loss_Class_Mode"]
         )
+    ],
+    fontsize=7,
+)
 finalize_and_save(fig, ax, utm_ext, "15b_RUSLE_soil_loss.png")
 
 # Sediment yield bar chart (Plotly)
@@ -862,42 +1097,39 @@ fig = make_subplots(
     ],
 )
 colors_b = ["#d73027", "#fdae61", "#1a9641", "#4575b4", "#762a83"]
-for i, row_ in df_rusle_reset.iterrows():
-    fig.add_trace(
+# One bar trace per subplot (basin on x), not one trace per basin
+bar_colors = [colors_b[i % 5] for i in range(len(df_rusle_reset))]
+rusle_hover = df_rusle_reset[["Loss_Class_Mode", "SDR"]].to_numpy()
+fig.add_traces(
+    [
         go.Bar(
-            x=[row_["basin_id"]],
-            y=[row_["A_mean_t_ha_yr"]],
-            marker_color=colors_b[i % 5],
-            text=f"{row_['A_mean_t_ha_yr']:.1f}",
+            x=df_rusle_reset["basin_id"],
+            y=df_rusle_reset["A_mean_t_ha_yr"],
+            marker_color=bar_colors,
+            text=df_rusle_reset["A_mean_t_ha_yr"].map("{:.1f}".format),
             textposition="outside",
-            name=row_["basin_id"],
+            customdata=rusle_hover,
             hovertemplate=(
-                f"{row_['basin_id']}<br>"
-                f"Mean Loss: {row_['A_mean_t_ha_yr']:.1f} t/ha/yr<br>"
-                f"Class: {row_['Loss_Class_Mode']}"
+                "%{x}<br>Mean Loss: %{y:.1f} t/ha/yr<br>"
+                "Class: %{customdata[0]}<extra></extra>"
             ),
         ),
-        row=1,
-        col=1,
-    )
-    fig.add_trace(
         go.Bar(
-            x=[row_["basin_id"]],
-            y=[row_["Sed_Yield_t_yr"]],
-            marker_color=colors_b[i % 5],
-            text=f"{row_['Sed_Yield_t_yr']:.0f}",
+            x=df_rusle_reset["basin_id"],
+            y=df_rusle_reset["Sed_Yield_t_yr"],
+            marker_color=bar_colors,
+            text=df_rusle_reset["Sed_Yield_t_yr"].map("{:.0f}".format),
             textposition="outside",
-            name=row_["basin_id"],
-            showlegend=False,
+            customdata=rusle_hover,
             hovertemplate=(
-                f"{row_['basin_id']}<br>"
-                f"Sediment Yield: {row_['Sed_Yield_t_yr']:.0f} t/yr<br>"
-                f"SDR: {row_['SDR']:.3f}"
+                "%{x}<br>Sediment Yield: %{y:.0f} t/yr<br>"
+                "SDR: %{customdata[1]:.3f}<extra></extra>"
             ),
         ),
-        row=1,
-        col=2,
-    )
+    ],
+    rows=[1, 1],
+    cols=[1, 2],
+)
 
 # USDA threshold lines
 for T_val, label in [
@@ -929,15 +1161,14 @@ save_fig(fig, "15c_RUSLE_erosion_bars")
 
 # RUSLE factor comparison radar (Plotly)
 factor_cols_r = ["A_mean_t_ha_yr", "SDR", "Gross_Erosion_t_yr"]
+# Min-max normalised per column in one pass; rings closed by repeating column 0
+fr = df_rusle[factor_cols_r].to_numpy(dtype=np.float64)
+fr_min, fr_max = np.nanmin(fr, axis=0), np.nanmax(fr, axis=0)
+fr_norm = (fr - fr_min) / (fr_max - fr_min + 1e-9)
+RUSLE_RADAR_R = np.column_stack([fr_norm, fr_norm[:, 0]])
+cats = ["Soil Loss", "SDR", "Gross Erosion", "Soil Loss"]
 fig_r = go.Figure()
-for i, (bid, row_) in enumerate(df_rusle.iterrows()):
-    val_r = [df_rusle.loc[bid, c] for c in factor_cols_r]
-    val_r_n = [
-        (v - df_rusle[c].min()) / (df_rusle[c].max() - df_rusle[c].min() + 1e-9)
-        for v, c in zip(val_r, factor_cols_r)
-    ]
-    val_r_n += [val_r_n[0]]
-    cats = ["Soil Loss", "SDR", "Gross Erosion", "Soil Loss"]
+for i, (bid, val_r_n) in enumerate(zip(df_rusle.index, RUSLE_RADAR_R)):
     fig_r.add_trace(
         go.Scatterpolar(
             r=val_r_n,
@@ -984,159 +1215,174 @@ print("\n[16-A] Computing Check Dam Suitability Index...")
 
 def score_stream_order(order):
     """Score stream order 1–6 for check dam suitability (1st order = best)."""
-    return max(0, 10 - (order - 1) * 2.5)  # 10, 7.5, 5.0, 2.5, 0...
+    order = np.asarray(order, dtype=np.float64)
+    return np.fmax(10 - (order - 1) * 2.5, 0)  # 10, 7.5, 5.0, 2.5, 0...
 
 
 def score_catchment_area(A_km2):
     """0.5–10 km² is optimal for check dams."""
-    if 0.1 <= A_km2 <= 0.5:
-        return 6
-    elif 0.5 < A_km2 <= 5.0:
-        return 10
-    elif 5.0 < A_km2 <= 15.0:
-        return 7
-    elif A_km2 > 15.0:
-        return 3
-    return 4
+    a = np.asarray(A_km2, dtype=np.float64)
+    return np.select(
+        [
+            (a >= 0.1) & (a <= 0.5),
+            (a > 0.5) & (a <= 5.0),
+            (a > 5.0) & (a <= 15.0),
+            a > 15.0,
+        ],
+        [6, 10, 7, 3],
+        default=4,
+    )
 
 
 def score_channel_slope(slope_pct):
     """1–5% channel slope is optimal."""
-    if slope_pct < 0.5:
-        return 3  # Too flat → rapid silting
-    elif slope_pct < 1.0:
-        return 6
-    elif slope_pct < 5.0:
-        return 10  # Optimal
-    elif slope_pct < 10.0:
-        return 7
-    elif slope_pct < 20.0:
-        return 4
-    return 2  # Too steep → unstable
+    s = np.asarray(slope_pct, dtype=np.float64)
+    # Too flat → rapid silting; 1–5% optimal; too steep → unstable (NaN → 2)
+    return np.select(
+        [s < 0.5, s < 1.0, s < 5.0, s < 10.0, s < 20.0], [3, 6, 10, 7, 4], default=2
+    )
 
 
 def score_valley_vf(Vf):
     """Vf 0.3–1.5 ideal (narrow V = easy to block; very wide = costly)."""
-    if np.isnan(Vf):
-        return 5
-    if Vf < 0.3:
-        return 6  # Very narrow — ok but hard to construct
-    elif Vf < 1.5:
-        return 10  # Ideal
-    elif Vf < 3.0:
-        return 7
-    elif Vf < 6.0:
-        return 4
-    return 2  # Very wide valley — not suitable
+    v = np.asarray(Vf, dtype=np.float64)
+    # Very narrow — ok but hard to construct; very wide valley — not suitable
+    return np.select(
+        [np.isnan(v), v < 0.3, v < 1.5, v < 3.0, v < 6.0], [5, 6, 10, 7, 4], default=2
+    )
 
 
 # For each stream segment, compute CDSI
 gdf_cd = gdf_so.copy()
-gdf_cd["stream_length_m"] = gdf_cd.geometry.length
+gdf_cd["stream_length_m"] = shapely.length(gdf_cd.geometry.to_numpy())
 
 
-# Upstream catchment area from flow accumulation at segment midpoint
-def sample_facc_at_midpoint(geom, facc_arr, transform):
-    """Sample flow accumulation at segment midpoint."""
-    try:
-        mid_pt = geom.interpolate(0.5, normalized=True)
-        r_i, c_i = rowcol(transform, mid_pt.x, mid_pt.y)
-        if 0 <= r_i < facc_arr.shape[0] and 0 <= c_i < facc_arr.shape[1]:
-            return float(facc_arr[r_i, c_i])
-    except Exception:
-        pass
-    return np.nan
-
-
-def sample_slope_at_segment(geom, slope_arr, transform):
-    """Mean slope along segment."""
-    try:
-        pts = [geom.interpolate(f, normalized=True) for f in np.linspace(0.1, 0.9, 7)]
-        slopes = []
-        for pt in pts:
-            r_i, c_i = rowcol(transform, pt.x, pt.y)
-            if 0 <= r_i < slope_arr.shape[0] and 0 <= c_i < slope_arr.shape[1]:
-                s = slope_arr[r_i, c_i]
-                if not np.isnan(s):
-                    slopes.append(s)
-        return float(np.nanmean(slopes)) if slopes else np.nan
-    except Exception:
-        return np.nan
+def point_xy(pts):
+    """x, y arrays of a shapely point array; NaN for missing / empty points."""
+    x, y = np.full(pts.shape, np.nan), np.full(pts.shape, np.nan)
+    has = ~(shapely.is_missing(pts) | shapely.is_empty(pts))
+    x[has], y[has] = shapely.get_coordinates(pts[has]).T
+    return x, y
+
+
+def sample_along_lines(arr, lines, fractions):
+    """
+    arr at normalised positions along each line, for all lines at once:
+    (n_lines, n_fractions), NaN where a point is empty or off the grid.
+    """
+    pts = shapely.line_interpolate_point(
+        np.asarray(lines)[:, None], np.asarray(fractions)[None, :], normalized=True
+    )
+    x, y = point_xy(pts)
+    col_f, row_f = ~DEM_TRANSFORM * (x, y)
+    ok = np.isfinite(x)
+    rows = np.floor(np.where(ok, row_f, -1)).astype(np.intp)
+    cols = np.floor(np.where(ok, col_f, -1)).astype(np.intp)
+    ok &= (rows >= 0) & (rows < arr.shape[0]) & (cols >= 0) & (cols < arr.shape[1])
+    out = np.full(pts.shape, np.nan)
+    out[ok] = arr[rows[ok], cols[ok]]
+    return out
+
+
+# Mean segment slope is sampled at 7 points between 10 % and 90 % of its length
+SEG_SLOPE_FRACS = np.linspace(0.1, 0.9, 7)
+
+
+def longest_parts(geoms):
+    """
+    Longest LineString part of each geometry (a LineString is its own single
+    part); None where a geometry has no parts. Ties keep the first part.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    parts, idx = shapely.get_parts(geoms, return_index=True)
+    order = np.lexsort((-shapely.length(parts), idx))
+    idx = idx[order]
+    first = np.ones(idx.size, dtype=bool)
+    first[1:] = idx[1:] != idx[:-1]
+    out = np.full(geoms.shape, None, dtype=object)
+    out[idx[first]] = parts[order[first]]
+    return out
 
 
+# Segment geometry resolved once (longest part of a MultiLineString) and
+# reused by all per-segment samplers below
+CD_LINES = longest_parts(gdf_cd.geometry.to_numpy())
+
 # Sample FAcc and slope for each segment
 print("  Sampling flow accumulation and slope at stream segments...")
-fa_vals = []
-slope_segs = []
-for _, seg in gdf_cd.iterrows():
-    geom = seg.geometry
-    if geom.geom_type == "MultiLineString":
-        geom = max(geom.geoms, key=lambda g: g.length)
-    fa_vals.append(sample_facc_at_midpoint(geom, FACC_ARR, DEM_TRANSFORM))
-    slope_segs.append(sample_slope_at_segment(geom, SLOPE_ARR, DEM_TRANSFORM))
-
-gdf_cd["FA_cells"] = fa_vals
-gdf_cd["seg_slope_deg"] = slope_segs
+# Upstream catchment area from flow accumulation at segment midpoint
+gdf_cd["FA_cells"] = sample_along_lines(FACC_ARR, CD_LINES, [0.5])[:, 0]
+gdf_cd["seg_slope_deg"] = np.nanmean(
+    sample_along_lines(SLOPE_ARR, CD_LINES, SEG_SLOPE_FRACS), axis=1
+)
 gdf_cd["A_upstream_km2"] = (gdf_cd["FA_cells"] * DEM_RES * DEM_RES / 1e6).clip(lower=0)
 gdf_cd["seg_slope_pct"] = np.tan(np.radians(gdf_cd["seg_slope_deg"].fillna(5))) * 100
 
 
-# RUSLE A-score: mean soil loss in 2km upstream buffer of segment
-def sample_rusle_upstream(geom, a_arr, transform, buffer_m=1000):
-    """Mean RUSLE A in buffer around segment endpoints."""
-    try:
-        start_pt = Point(geom.coords[0])
-        buffered = start_pt.buffer(buffer_m)
-        geom_list = [buffered.__geo_interface__]
-        with rasterio.open(RASTERS["RUSLE_A"]) as src:
-            arr_m, _ = rio_mask(src, geom_list, crop=True, nodata=np.nan)
-            vals = arr_m[0][arr_m[0] > 0]
-            return float(np.nanmean(vals)) if len(vals) > 0 else np.nan
-    except Exception:
-        return np.nan
-
-
-# Compute RUSLE score per segment (sample a subset for speed)
-A_max_basin = float(np.nanpercentile(A_ARR, 95))
-gdf_cd["A_upstream_mean"] = np.nan
-for idx in gdf_cd.index:
-    geom = gdf_cd.loc[idx, "geometry"]
-    if geom.geom_type == "MultiLineString":
-        geom = max(geom.geoms, key=lambda g: g.length)
-    val = sample_rusle_upstream(geom, A_ARR, DEM_TRANSFORM, buffer_m=500)
-    gdf_cd.at[idx, "A_upstream_mean"] = val
+# RUSLE A-score: mean soil loss in a buffer around each segment's start point
+def sample_disk_mean(arr, x, y, radius_m, chunk=1024):
+    """
+    Mean of arr > 0 over cells whose centre lies within radius_m of each
+    (x, y) — the rio_mask cell rule for a circular buffer — from
+    (chunk, k, k) window gathers, so memory stays bounded on large networks.
+    NaN where no cell qualifies.
+    """
+    r_pix = int(np.ceil(radius_m / DEM_RES))
+    off = np.arange(-r_pix, r_pix + 1)
+    col_all, row_all = ~DEM_TRANSFORM * (x, y)
+    ok_all = np.isfinite(x)
+    out = []
+    for i in range(0, len(ok_all), chunk):
+        ok = ok_all[i : i + chunk]
+        row_f = np.where(ok, row_all[i : i + chunk], -1e9)
+        col_f = np.where(ok, col_all[i : i + chunk], -1e9)
+        rr = np.floor(row_f).astype(np.intp)[:, None, None] + off[None, :, None]
+        cc = np.floor(col_f).astype(np.intp)[:, None, None] + off[None, None, :]
+        dy = (rr + 0.5 - row_f[:, None, None]) * DEM_RES
+        dx = (cc + 0.5 - col_f[:, None, None]) * DEM_RES
+        inside = (dx * dx + dy * dy <= radius_m * radius_m) & ok[:, None, None]
+        inside &= (rr >= 0) & (rr < arr.shape[0]) & (cc >= 0) & (cc < arr.shape[1])
+        vals = arr[np.clip(rr, 0, arr.shape[0] - 1), np.clip(cc, 0, arr.shape[1] - 1)]
+        keep = inside & (vals > 0)
+        n = keep.sum(axis=(1, 2))
+        total = np.where(keep, vals, 0.0).sum(axis=(1, 2), dtype=np.float64)
+        out.append(np.where(n > 0, total / np.maximum(n, 1), np.nan))
+    return np.concatenate(out) if out else np.empty(0)
+
+
+# Compute RUSLE score per segment from the in-memory soil-loss grid
+A_max_basin = nanpercentile_fast(A_ARR, 95)
+cd_start_x, cd_start_y = point_xy(shapely.get_point(CD_LINES, 0))
+gdf_cd["A_upstream_mean"] = sample_disk_mean(A_ARR, cd_start_x, cd_start_y, 500.0)
 
 # Score each component
-gdf_cd["S_order"] = gdf_cd[ORDER_COL].apply(score_stream_order)
-gdf_cd["S_area"] = gdf_cd["A_upstream_km2"].apply(score_catchment_area)
-gdf_cd["S_slope"] = gdf_cd["seg_slope_pct"].apply(score_channel_slope)
+gdf_cd["S_order"] = score_stream_order(gdf_cd[ORDER_COL].to_numpy())
+gdf_cd["S_area"] = score_catchment_area(gdf_cd["A_upstream_km2"].to_numpy())
+gdf_cd["S_slope"] = score_channel_slope(gdf_cd["seg_slope_pct"].to_numpy())
 gdf_cd["S_erosion"] = (
     gdf_cd["A_upstream_mean"].fillna(A_max_basin / 2) / (A_max_basin + 1e-6) * 10
 ).clip(0, 10)
 
-# Get Vf from df_Vf if available, else use default
+# Get Vf from df_Vf if available, else use default. Segment → basin is one
+# sjoin (first intersecting basin per segment); per-basin Vf scores are mapped
+# onto it in a single hash join.
 try:
-    gdf_cd_sub = gpd.sjoin(
-        gdf_cd, gdf_sub[["basin_id", "geometry"]], how="left", predicate="intersects"
-    )
-    gdf_cd_sub = gdf_cd_sub.drop_duplicates(
-        subset=gdf_cd_sub.index.name or gdf_cd.index.name
+    SEG_BASIN_ID = (
+        gpd.sjoin(
+            gdf_cd[["geometry"]],
+            gdf_sub[["basin_id", "geometry"]],
+            how="left",
+            predicate="intersects",
+        )["basin_id"]
+        .groupby(level=0)
+        .first()
+        .reindex(gdf_cd.index)
     )
-    if "basin_id" not in gdf_cd_sub.columns:
-        gdf_cd["S_vf"] = 5.0
-    else:
-
-        def get_vf_for_basin(bid):
-            if bid in df_Vf.index:
-                return score_valley_vf(df_Vf.loc[bid, "Vf"])
-            return 5.0
-
-        gdf_cd["S_vf"] = (
-            gdf_cd_sub["basin_id"]
-            .apply(lambda b: get_vf_for_basin(b) if pd.notna(b) else 5.0)
-            .values
-        )
+    VF_SCORE_BY_BASIN = pd.Series(score_valley_vf(df_Vf["Vf"]), index=df_Vf.index)
+    # Basins missing from df_Vf (or unmatched segments) fall back to 5
+    gdf_cd["S_vf"] = SEG_BASIN_ID.map(VF_SCORE_BY_BASIN).fillna(5.0).to_numpy()
 except Exception:
+    SEG_BASIN_ID = pd.Series(np.nan, index=gdf_cd.index)
     gdf_cd["S_vf"] = 5.0
 
 # Weighted CDSI (weights reflect relative importance for check dam selection)
@@ -1152,24 +1398,19 @@ gdf_cd["CDSI"] = gdf_cd["CDSI"].clip(0, 10)
 
 
 # Classification
-def cdsi_class(v):
-    if v >= 7.5:
-        return "Very Suitable"
-    if v >= 5.5:
-        return "Suitable"
-    if v >= 3.5:
-        return "Moderately Suitable"
-    return "Poorly Suitable"
-
-
-gdf_cd["CDSI_class"] = gdf_cd["CDSI"].apply(cdsi_class)
+CDSI_CLASS_LABELS = np.array(
+    ["Poorly Suitable", "Moderately Suitable", "Suitable", "Very Suitable"]
+)
+gdf_cd["CDSI_class"] = CDSI_CLASS_LABELS[
+    np.digitize(gdf_cd["CDSI"].to_numpy(), [3.5, 5.5, 7.5])
+]
 
 print("  CDSI distribution:")
 print(gdf_cd["CDSI_class"].value_counts().to_string())
 gdf_cd[["CDSI", "CDSI_class", "A_upstream_km2", "seg_slope_pct", ORDER_COL]].to_csv(
     os.path.join(SWC_DIR, "checkdam_suitability.csv")
 )
-gdf_cd.to_file(os.path.join(SHAPES_DIR, "checkdam_suitability.shp"))
+CD_VECTOR_FILES = save_vector(gdf_cd, "checkdam_suitability")
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  B. PERCOLATION POND / RECHARGE ZONE SUITABILITY
@@ -1180,35 +1421,91 @@ print("\n[16-B] Percolation Pond & Groundwater Recharge Zones...")
 #           moderate FA (not first-order headwaters, not mainstem)
 #           away from steep erosive zones
 
-TWI_safe2 = np.where(np.isnan(TWI_ARR), np.nanmin(TWI_ARR), TWI_ARR)
-FA_norm = np.log1p(np.where(np.isnan(FACC_ARR), 0, FACC_ARR))
-FA_norm = FA_norm / (np.nanmax(FA_norm) + 1e-9)
-slope_n2 = 1.0 - (
-    slope_safe / (np.nanmax(slope_safe) + 1e-9)
-)  # inverted — flat preferred
 
-# TWI normalised
-TWI_n = (TWI_safe2 - np.nanmin(TWI_safe2)) / (
-    np.nanmax(TWI_safe2) - np.nanmin(TWI_safe2) + 1e-9
+def _perc_numpy(twi, facc, slope_safe, nodata, twi_min, twi_span, fa_max, s_max, out):
+    # Weighted composite accumulated term by term into one float32 buffer with
+    # a single scratch array (no full-size temporary per criterion)
+    buf = np.empty_like(out)
+
+    # TWI normalised (NaN → basin minimum → 0)
+    np.subtract(twi, twi_min, out=out, casting="same_kind")
+    out *= 0.50 / (twi_span + 1e-9)
+    np.nan_to_num(out, copy=False, nan=0.0)
+
+    # log flow accumulation, normalised (NaN → 0)
+    np.log1p(facc, out=buf, casting="same_kind")
+    np.nan_to_num(buf, copy=False, nan=0.0)
+    buf *= 0.30 / (fa_max + 1e-9)
+    out += buf
+
+    # Slope inverted — flat preferred
+    np.divide(slope_safe, s_max + 1e-9, out=buf, casting="same_kind")
+    np.subtract(1.0, buf, out=buf)
+    buf *= 0.20
+    out += buf
+
+    # Filter to gentle slopes
+    out[slope_safe >= 5.0] = 0.0
+    out[nodata] = np.nan
+    np.clip(out, 0, 1, out=out)
+    return out
+
+
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _perc_kernel(
+        twi, facc, slope_safe, nodata, twi_min, twi_span, fa_max, s_max, out
+    ):
+        # All three weighted terms, the gentle-slope filter and the clip in one
+        # pass per pixel
+        w_twi = 0.50 / (twi_span + 1e-9)
+        w_fa = 0.30 / (fa_max + 1e-9)
+        H, W = out.shape
+        for i in prange(H):
+            for j in range(W):
+                if nodata[i, j]:
+                    out[i, j] = np.nan
+                    continue
+                s = slope_safe[i, j]
+                if s >= 5.0:
+                    out[i, j] = 0.0
+                    continue
+                t = twi[i, j]
+                f = facc[i, j]
+                v = 0.0 if np.isnan(t) else (t - twi_min) * w_twi
+                v += 0.0 if np.isnan(f) else np.log1p(f) * w_fa
+                v += (1.0 - s / (s_max + 1e-9)) * 0.20
+                out[i, j] = min(max(v, 0.0), 1.0)
+        return out
+
+else:
+    _perc_kernel = _perc_numpy
+
+
+# One min/max pass per input grid (TWI range, FA max, slope max)
+twi_min, twi_max = nan_range(TWI_ARR)
+PERC_ARR = np.empty(DEM_ARR.shape, dtype=np.float32)
+_perc_kernel(
+    TWI_ARR,
+    FACC_ARR,
+    SLOPE_SAFE,
+    DEM_NAN_MASK,
+    float(twi_min),
+    float(twi_max - twi_min),
+    float(np.log1p(nan_range(FACC_ARR)[1])),  # = max of log1p(FA), NaN excluded
+    float(SLOPE_SAFE.max()),
+    PERC_ARR,
 )
 
-# Filter to gentle slopes
-mask_flat = (slope_safe < 5.0).astype(float)
-mask_flat[np.isnan(DEM_ARR)] = np.nan
-
-PERC_ARR = (TWI_n * 0.50 + FA_norm * 0.30 + slope_n2 * 0.20) * mask_flat
-PERC_ARR[np.isnan(DEM_ARR)] = np.nan
-PERC_ARR = np.clip(PERC_ARR, 0, 1)
-
 save_raster(
-    PERC_ARR.astype(np.float32),
+    PERC_ARR,
     os.path.join(OUT_DIR, "percolation_potential.tif"),
     RASTERS["dem"],
 )
 RASTERS["percolation"] = os.path.join(OUT_DIR, "percolation_potential.tif")
-print(
-    f"  Percolation potential range: {np.nanmin(PERC_ARR):.3f}–{np.nanmax(PERC_ARR):.3f}"
-)
+perc_lo, perc_hi = nan_range(PERC_ARR)
+print(f"  Percolation potential range: {perc_lo:.3f}–{perc_hi:.3f}")
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  C. CONTOUR TRENCH SUITABILITY
@@ -1221,28 +1518,73 @@ print("\n[16-C] Contour Trench Suitability...")
 #  • Not on stream channels (avoid blocking channels)
 #  • Moderate soil depth (not rocky)
 
-slope_ok = ((slope_safe >= 3) & (slope_safe < 30)).astype(float)
-A_norm_c = np.clip(A_ARR / (A_max_basin + 1e-9), 0, 1)
-A_norm_c = np.where(np.isnan(A_norm_c), 0, A_norm_c)
-
-# Penalise cells on channels (high flow accumulation)
 FA_threshold = 500  # cells — anything above is a channel
-not_channel = (FACC_ARR < FA_threshold).astype(float)
-not_channel[np.isnan(FACC_ARR)] = 1.0
 
-CT_ARR = slope_ok * 0.40 + A_norm_c * 0.40 + not_channel * 0.20
-CT_ARR[np.isnan(DEM_ARR)] = np.nan
-CT_ARR = np.clip(CT_ARR, 0, 1)
+
+def _ct_numpy(A, slope_safe, facc, nodata, a_max, fa_threshold, out):
+    # Erosion term first (NaN → 0), then the slope and off-channel terms are
+    # added in place where their criterion holds
+    np.divide(A, a_max + 1e-9, out=out, casting="same_kind")
+    np.clip(out, 0, 1, out=out)
+    np.nan_to_num(out, copy=False, nan=0.0)
+    out *= 0.40
+
+    np.add(out, 0.40, out=out, where=(slope_safe >= 3) & (slope_safe < 30))
+
+    # Penalise cells on channels (high flow accumulation); NaN counts as
+    # off-channel
+    np.add(out, 0.20, out=out, where=~(facc >= fa_threshold))
+
+    out[nodata] = np.nan
+    np.clip(out, 0, 1, out=out)
+    return out
+
+
+if NUMBA_OK:
+
+    @njit(parallel=True, cache=True)
+    def _ct_kernel(A, slope_safe, facc, nodata, a_max, fa_threshold, out):
+        # Erosion, slope-band and off-channel terms summed and clipped per pixel
+        w_a = 1.0 / (a_max + 1e-9)
+        H, W = out.shape
+        for i in prange(H):
+            for j in range(W):
+                if nodata[i, j]:
+                    out[i, j] = np.nan
+                    continue
+                a = A[i, j]
+                v = 0.0 if np.isnan(a) else min(max(a * w_a, 0.0), 1.0) * 0.40
+                s = slope_safe[i, j]
+                if s >= 3.0 and s < 30.0:
+                    v += 0.40
+                if not facc[i, j] >= fa_threshold:  # NaN counts as off-channel
+                    v += 0.20
+                out[i, j] = min(max(v, 0.0), 1.0)
+        return out
+
+else:
+    _ct_kernel = _ct_numpy
+
+
+CT_ARR = np.empty(DEM_ARR.shape, dtype=np.float32)
+_ct_kernel(
+    A_ARR,
+    SLOPE_SAFE,
+    FACC_ARR,
+    DEM_NAN_MASK,
+    float(A_max_basin),
+    float(FA_threshold),
+    CT_ARR,
+)
 
 save_raster(
-    CT_ARR.astype(np.float32),
+    CT_ARR,
     os.path.join(OUT_DIR, "contour_trench_suitability.tif"),
     RASTERS["dem"],
 )
 RASTERS["contour_trench"] = os.path.join(OUT_DIR, "contour_trench_suitability.tif")
-print(
-    f"  Contour trench suitability range: {np.nanmin(CT_ARR):.3f}–{np.nanmax(CT_ARR):.3f}"
-)
+ct_lo, ct_hi = nan_range(CT_ARR)
+print(f"  Contour trench suitability range: {ct_lo:.3f}–{ct_hi:.3f}")
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  D. PER-BASIN CONSERVATION SUMMARY & WATER HARVESTING POTENTIAL (WHP)
@@ -1252,73 +1594,61 @@ print("\n[16-D] Per-basin conservation statistics & Water Harvesting Potential..
 
 WHP_ROWS = []
 
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = [row.geometry.__geo_interface__]
-    A_km2 = df_areal.loc[bid, "Area_km2"]
-
-    def clip_and_stats(raster_path):
-        with rasterio.open(raster_path) as src:
-            try:
-                arr_m, _ = rio_mask(src, geom, crop=True, nodata=np.nan)
-                arr = arr_m[0].astype(np.float32)
-                arr[arr == -9999.0] = np.nan
-                return arr
-            except Exception:
-                return np.array([np.nan])
-
-    perc_clip = clip_and_stats(RASTERS["percolation"])
-    ct_clip = clip_and_stats(RASTERS["contour_trench"])
-    cn_clip = clip_and_stats(RASTERS["CN"])
-    q_25yr_mm = df_runoff.loc[bid, "Q_25yr_mm"] if bid in df_runoff.index else np.nan
+# Zonal stats straight from the in-memory grids via the shared label raster
+# (no per-basin GeoTIFF re-read + rio_mask rasterisation)
+PERC_GROUPS = label_groups(PERC_ARR)
+CT_STATS = zonal_stats_labels(CT_ARR, BASIN_LABELS, N_BASINS, high=0.5)
+CN_STATS = zonal_stats_labels(CN_ARR, BASIN_LABELS, N_BASINS)
+
+# Check dam count potential: every 500–1000m on 1st–2nd order streams, from
+# the suitable segment length in each basin (one groupby over SEG_BASIN_ID)
+cd_suitable = gdf_cd["CDSI_class"].isin(["Very Suitable", "Suitable"])
+SUITABLE_LEN_BY_BASIN = (
+    gdf_cd.loc[cd_suitable, "stream_length_m"].groupby(SEG_BASIN_ID[cd_suitable]).sum()
+)
+
+# SWC priority from mean soil loss (t/ha/yr): > 15 High, > 5 Moderate, else
+# Low; basins without a RUSLE row are "Unknown"
+a_mean_swc = df_rusle["A_mean_t_ha_yr"].to_numpy()
+SWC_PRIORITY = pd.Series(
+    np.select([a_mean_swc > 15, a_mean_swc > 5], ["High", "Moderate"], "Low"),
+    index=df_rusle.index,
+)
+
+# Basin area and 25-yr runoff depth (NaN without a runoff row) in gdf_sub order
+whp_ids = gdf_sub["basin_id"].to_numpy()
+whp_area_km2 = df_areal.loc[whp_ids, "Area_km2"].to_numpy(dtype=np.float64)
+whp_q25_mm = df_runoff["Q_25yr_mm"].reindex(whp_ids).to_numpy(dtype=np.float64)
+
+for k, bid in enumerate(whp_ids):
+    A_km2 = whp_area_km2[k]
+
+    perc_vals = PERC_GROUPS[k]
+    perc_mean = float(perc_vals.mean()) if perc_vals.size else np.nan
+    pct_ct = round(float(CT_STATS["high_frac"][k]) * 100, 1)
+    q_25yr_mm = whp_q25_mm[k]
 
     # WHP = potential runoff harvestable volume (25-yr event, m³)
     # Adjusting for realistic harvesting fraction (0.4 = 40% captured)
     harvest_frac = 0.40
     WHP_m3 = float(q_25yr_mm) * 1e-3 * A_km2 * 1e6 * harvest_frac
-
-    # Check dam count potential: every 500–1000m on 1st–2nd order streams
-    n_suitable = int(
-        (
-            gdf_cd[
-                gdf_cd["CDSI_class"].isin(["Very Suitable", "Suitable"])
-            ].geometry.length.sum()
-            / 700.0
-        )
-    )
+    n_suitable = int(SUITABLE_LEN_BY_BASIN.get(bid, 0.0) / 700.0)
 
     WHP_ROWS.append(
         {
             "basin_id": bid,
-            "Perc_Potential_mean": round(float(np.nanmean(perc_clip)), 3),
-            "Perc_Potential_p75": round(
-                float(
-                    np.nanpercentile(perc_clip[~np.isnan(perc_clip)], 75)
-                    if np.any(~np.isnan(perc_clip))
-                    else np.nan
-                ),
-                3,
-            ),
-            "ContourTrench_mean": round(float(np.nanmean(ct_clip)), 3),
-            "Pct_CT_suitable": round(float(np.nanmean(ct_clip > 0.5)) * 100, 1),
+            "Perc_Potential_mean": round(perc_mean, 3),
+            "Perc_Potential_p75": round(nanpercentile_fast(perc_vals, 75), 3),
+            "ContourTrench_mean": round(float(CT_STATS["mean"][k]), 3),
+            "Pct_CT_suitable": pct_ct,
             "WHP_25yr_Mm3": round(WHP_m3 / 1e6, 4),
             "Potential_CheckDams_N": n_suitable,
-            "CN_mean": round(float(np.nanmean(cn_clip)), 2),
-            "SWC_Priority": (
-                (
-                    "High"
-                    if df_rusle.loc[bid, "A_mean_t_ha_yr"] > 15
-                    else (
-                        "Moderate" if df_rusle.loc[bid, "A_mean_t_ha_yr"] > 5 else "Low"
-                    )
-                )
-                if bid in df_rusle.index
-                else "Unknown"
-            ),
+            "CN_mean": round(float(CN_STATS["mean"][k]), 2),
+            "SWC_Priority": SWC_PRIORITY.get(bid, "Unknown"),
         }
     )
     print(
-        f"  {bid}: WHP={WHP_m3/1e6:.4f} Mm³ | CT_suit%={round(float(np.nanmean(ct_clip > 0.5))*100,1)}% "
+        f"  {bid}: WHP={WHP_m3/1e6:.4f} Mm³ | CT_suit%={pct_ct}% "
         f"| Est. check dams={n_suitable}"
     )
 
@@ -1342,17 +1672,19 @@ fig, ax, utm_ext = base_axes(
     "Check Dam (Naala Bund) Suitability Map\n"
     "CDSI = f(Order, Catchment Area, Slope, Erosion, Valley Width)"
 )
-for cls, color in cdsi_colors.items():
-    segs = gdf_cd[gdf_cd["CDSI_class"] == cls]
-    if len(segs) > 0:
-        segs.plot(
-            ax=ax,
-            color=color,
-            linewidth=1.5 + gdf_cd[gdf_cd["CDSI_class"] == cls][ORDER_COL].mean() * 0.3,
-            alpha=0.9,
-            zorder=5,
-            label=cls,
-        )
+# One LineCollection for all segments: colour by class, width from the class
+# mean stream order, drawn in class order so poorer classes stay on top
+cd_rank = gdf_cd["CDSI_class"].map({cls: i for i, cls in enumerate(cdsi_colors)})
+cd_plot = gdf_cd.iloc[np.argsort(cd_rank.to_numpy(), kind="stable")]
+cd_plot.plot(
+    ax=ax,
+    color=cd_plot["CDSI_class"].map(cdsi_colors).to_numpy(),
+    linewidth=(
+        1.5 + cd_plot.groupby("CDSI_class")[ORDER_COL].transform("mean") * 0.3
+    ).to_numpy(),
+    alpha=0.9,
+    zorder=5,
+)
 gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.5, zorder=15)
 # Mark pour points as potential check dam sites
 if "gdf_pp" in dir() and gdf_pp is not None:
@@ -1384,7 +1716,7 @@ fig, ax, utm_ext = base_axes(
 )
 # Percolation zones (background)
 im1 = ax.imshow(
-    PERC_ARR,
+    for_display(PERC_ARR),
     extent=raster_extent(),
     origin="upper",
     cmap="Blues",
@@ -1394,8 +1726,9 @@ im1 = ax.imshow(
     vmax=1,
 )
 # Contour trench suitability (overlay)
+ct_disp = for_display(CT_ARR)
 im2 = ax.imshow(
-    np.ma.masked_where(CT_ARR < 0.5, CT_ARR),
+    np.ma.masked_where(ct_disp < 0.5, ct_disp),
     extent=raster_extent(),
     origin="upper",
     cmap="Oranges",
@@ -1405,12 +1738,20 @@ im2 = ax.imshow(
     vmax=1,
 )
 gdf_sub.boundary.plot(ax=ax, edgecolor="black", linewidth=1.2, zorder=10)
-# Suitable check dam stream reaches
-gdf_cd[gdf_cd["CDSI"] >= 5.5].plot(
-    ax=ax, color="darkgreen", linewidth=1.5, zorder=8, alpha=0.85
-)
-gdf_cd[gdf_cd["CDSI"] < 5.5].plot(
-    ax=ax, color="lightgrey", linewidth=0.5, zorder=6, alpha=0.4
+# Suitable check dam stream reaches (green) over the rest (grey) as one
+# LineCollection: per-segment RGBA carries the alpha, suitable drawn last
+cd_suit = gdf_cd["CDSI"].to_numpy() >= 5.5
+cd_order = np.argsort(cd_suit, kind="stable")
+cd_suit = cd_suit[cd_order]
+gdf_cd.iloc[cd_order].plot(
+    ax=ax,
+    color=np.where(
+        cd_suit[:, None],
+        mcolors.to_rgba("darkgreen", 0.85),
+        mcolors.to_rgba("lightgrey", 0.4),
+    ),
+    linewidth=np.where(cd_suit, 1.5, 0.5),
+    zorder=7,
 )
 
 legend_items = [
@@ -1440,35 +1781,33 @@ fig = make_subplots(
     ],
 )
 swc_pmap = {"High": "#d73027", "Moderate": "#fdae61", "Low": "#4575b4"}
-for i, (bid, row_) in enumerate(df_whp.iterrows()):
-    c = swc_pmap.get(row_["SWC_Priority"], "grey")
-    fig.add_trace(
+whp_ids = df_whp.index.to_numpy()
+whp_colors = df_whp["SWC_Priority"].map(swc_pmap).fillna("grey").to_numpy()
+fig.add_traces(
+    [
         go.Bar(
-            x=[bid],
-            y=[row_["WHP_25yr_Mm3"]],
-            marker_color=c,
-            name=bid,
-            text=f"{row_['WHP_25yr_Mm3']:.4f}",
+            x=whp_ids,
+            y=df_whp["WHP_25yr_Mm3"],
+            marker_color=whp_colors,
+            text=df_whp["WHP_25yr_Mm3"].map("{:.4f}".format),
             textposition="outside",
-            hovertemplate=f"{bid}<br>WHP={row_['WHP_25yr_Mm3']:.4f} Mm³<br>Priority={row_['SWC_Priority']}",
+            customdata=df_whp[["SWC_Priority"]].to_numpy(),
+            hovertemplate=(
+                "%{x}<br>WHP=%{y:.4f} Mm³<br>Priority=%{customdata[0]}<extra></extra>"
+            ),
         ),
-        row=1,
-        col=1,
-    )
-    fig.add_trace(
         go.Bar(
-            x=[bid],
-            y=[row_["Potential_CheckDams_N"]],
-            marker_color=c,
-            name=bid,
-            showlegend=False,
-            text=str(row_["Potential_CheckDams_N"]),
+            x=whp_ids,
+            y=df_whp["Potential_CheckDams_N"],
+            marker_color=whp_colors,
+            text=df_whp["Potential_CheckDams_N"].astype(str),
             textposition="outside",
-            hovertemplate=f"{bid}<br>Est. check dams={row_['Potential_CheckDams_N']}",
+            hovertemplate="%{x}<br>Est. check dams=%{y}<extra></extra>",
         ),
-        row=1,
-        col=2,
-    )
+    ],
+    rows=[1, 1],
+    cols=[1, 2],
+)
 
 fig.update_yaxes(title_text="Water Harvesting Potential (Mm³)", row=1, col=1)
 fig.update_yaxes(title_text="Estimated Check Dam Count", row=1, col=2)
@@ -1510,80 +1849,69 @@ print("\n[17-A] Snyder's Synthetic Unit Hydrograph parameters...")
 Ct = 1.8  # lag coefficient (Indian semi-arid, Deccan Trap)
 Cp = 0.6  # peak coefficient
 
-SUH_ROWS = []
-
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    geom = row.geometry
-    A_km2 = df_areal.loc[bid, "Area_km2"]
-    L_km = df_areal.loc[bid, "Basin_Length_km"]
-
-    # Lca: distance from outlet to centroid along main channel
-    # Approximate as 0.6 × L for natural basins (standard assumption)
-    Lca_km = 0.6 * L_km
-
-    # Snyder lag time
-    tL_hr = Ct * (L_km * Lca_km) ** 0.3  # hours
-
-    # Standard storm duration
-    tr_hr = tL_hr / 5.5
-
-    # Time to peak
-    tp_hr = tL_hr + tr_hr / 2.0
-
-    # Peak discharge (m³/s per mm of rainfall over basin)
-    Qp = 2.75 * Cp * A_km2 / tL_hr
-
-    # Unit area peak
-    qp = Qp / A_km2  # m³/s/km² per mm
-
-    # Hydrograph widths
-    W50 = 2.14 / (qp**1.08)  # hrs
-    W75 = 1.22 / (qp**1.08)  # hrs
-
-    # Base time
-    tb_hr = 5.0 * tp_hr / 1.0  # approximate (Linsley et al. rule)
-    tb_hr = max(tb_hr, 2.0 * tp_hr)  # at least 2×tp
-
-    # Time of rise and recession
-    tr_rise = tp_hr
-    tr_recs = tb_hr - tp_hr
-
-    # Return-period peak discharge (m³/s)
-    QP_RT = {}
-    for T in RETURN_PERIODS:
-        P24 = RAINFALL_RT[T]
-        Q_mm = float(
-            scscn_runoff(
-                P24, df_runoff.loc[bid, "CN_mean"] if bid in df_runoff.index else 78
-            )
-        )
-        QP_RT[T] = round(Qp * Q_mm, 2)  # Qp [m³/s] = unit Qp × Q [mm]
-
-    r_suh = {
-        "basin_id": bid,
-        "L_km": round(L_km, 3),
-        "Lca_km": round(Lca_km, 3),
-        "A_km2": round(A_km2, 3),
-        "tL_hr": round(tL_hr, 3),
-        "tr_hr": round(tr_hr, 3),
-        "tp_hr": round(tp_hr, 3),
-        "Qp_1mm_m3s": round(Qp, 4),
-        "qp_m3s_km2": round(qp, 5),
-        "W50_hr": round(W50, 3),
-        "W75_hr": round(W75, 3),
-        "tb_hr": round(tb_hr, 3),
-    }
-    for T in RETURN_PERIODS:
-        r_suh[f"Qp_{T}yr_m3s"] = QP_RT[T]
-
-    SUH_ROWS.append(r_suh)
+# All basins at once: Snyder parameters are per-basin arrays and the
+# return-period runoff is one (basin × T) scscn_runoff broadcast
+suh_ids = gdf_sub["basin_id"].to_numpy()
+A_km2 = df_areal.loc[suh_ids, "Area_km2"].to_numpy(dtype=np.float64)
+L_km = df_areal.loc[suh_ids, "Basin_Length_km"].to_numpy(dtype=np.float64)
+
+# Lca: distance from outlet to centroid along main channel
+# Approximate as 0.6 × L for natural basins (standard assumption)
+Lca_km = 0.6 * L_km
+
+# Snyder lag time
+tL_hr = Ct * (L_km * Lca_km) ** 0.3  # hours
+
+# Standard storm duration
+tr_hr = tL_hr / 5.5
+
+# Time to peak
+tp_hr = tL_hr + tr_hr / 2.0
+
+# Peak discharge (m³/s per mm of rainfall over basin)
+Qp = 2.75 * Cp * A_km2 / tL_hr
+
+# Unit area peak
+qp = Qp / A_km2  # m³/s/km² per mm
+
+# Hydrograph widths
+W50 = 2.14 / (qp**1.08)  # hrs
+W75 = 1.22 / (qp**1.08)  # hrs
+
+# Base time
+tb_hr = 5.0 * tp_hr / 1.0  # approximate (Linsley et al. rule)
+tb_hr = np.maximum(tb_hr, 2.0 * tp_hr)  # at least 2×tp
+
+# Return-period peak discharge (m³/s) = unit Qp [m³/s] × Q [mm]
+cn_suh = df_runoff["CN_mean"].reindex(suh_ids, fill_value=78).to_numpy(dtype=np.float64)
+QP_RT = Qp[:, None] * scscn_runoff(P24_MM[None, :], cn_suh[:, None])
+
+df_suh = pd.DataFrame(
+    {
+        "L_km": np.round(L_km, 3),
+        "Lca_km": np.round(Lca_km, 3),
+        "A_km2": np.round(A_km2, 3),
+        "tL_hr": np.round(tL_hr, 3),
+        "tr_hr": np.round(tr_hr, 3),
+        "tp_hr": np.round(tp_hr, 3),
+        "Qp_1mm_m3s": np.round(Qp, 4),
+        "qp_m3s_km2": np.round(qp, 5),
+        "W50_hr": np.round(W50, 3),
+        "W75_hr": np.round(W75, 3),
+        "tb_hr": np.round(tb_hr, 3),
+        **{
+            f"Qp_{T}yr_m3s": np.round(QP_RT[:, k], 2)
+            for k, T in enumerate(RETURN_PERIODS)
+        },
+    },
+    index=pd.Index(suh_ids, name="basin_id"),
+)
+for k, bid in enumerate(suh_ids):
     print(
-        f"  {bid}: tL={tL_hr:.2f}hr | tp={tp_hr:.2f}hr | "
-        f"Qp(1mm)={Qp:.3f} m³/s | W50={W50:.2f}hr | W75={W75:.2f}hr"
+        f"  {bid}: tL={tL_hr[k]:.2f}hr | tp={tp_hr[k]:.2f}hr | "
+        f"Qp(1mm)={Qp[k]:.3f} m³/s | W50={W50[k]:.2f}hr | W75={W75[k]:.2f}hr"
     )
 
-df_suh = pd.DataFrame(SUH_ROWS).set_index("basin_id")
 df_suh.to_csv(os.path.join(UHG_DIR, "snyder_unit_hydrograph_params.csv"))
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1643,23 +1971,33 @@ if len(df_suh) == 1:
 
 colors_suh = plt.cm.Set1(np.linspace(0, 1, max(len(df_suh), 2)))
 
-for ax_i, (bid, suh) in enumerate(df_suh.iterrows()):
+# Dimensionless UH shape sampled once per basin (np.interp, zero outside the
+# SCS table); every return-period curve in both plots is a scalar multiple
+SUH_SHAPES = {}
+
+# Design runoff depths per SUH basin by return period; basins without a
+# runoff row fall back to 25 mm (25-yr) or 20 mm (10-/50-yr comparisons)
+SUH_Q_MM = {
+    T: df_runoff[f"Q_{T}yr_mm"]
+    .reindex(df_suh.index, fill_value=q_default)
+    .to_numpy(dtype=np.float64)
+    for T, q_default in [(10, 20.0), (25, 25.0), (50, 20.0)]
+}
+
+for ax_i, suh in enumerate(df_suh.itertuples()):
+    bid = suh.Index
     ax = axes[ax_i]
-    tp = suh["tp_hr"]
-    tb = suh["tb_hr"]
+    tp = suh.tp_hr
+    tb = suh.tb_hr
 
     # SCS-based hydrograph for 25-yr storm
-    Q25_mm = float(df_runoff.loc[bid, "Q_25yr_mm"]) if bid in df_runoff.index else 25.0
-    Qp_25 = suh["Qp_1mm_m3s"] * Q25_mm
+    Q25_mm = SUH_Q_MM[25][ax_i]
+    Qp_25 = suh.Qp_1mm_m3s * Q25_mm
 
-    t_abs = t_ratio * tp
     t_full = np.linspace(0, tb * 1.05, 500)
-    from scipy.interpolate import interp1d
-
-    q_interp = interp1d(
-        t_ratio * tp, q_ratio * Qp_25, kind="linear", fill_value=0.0, bounds_error=False
-    )
-    q_full = q_interp(t_full)
+    q_shape = np.interp(t_full, t_ratio * tp, q_ratio, left=0.0, right=0.0)
+    SUH_SHAPES[bid] = (t_full, q_shape)
+    q_full = q_shape * Qp_25
 
     ax.fill_between(t_full, 0, q_full, alpha=0.25, color=colors_suh[ax_i])
     ax.plot(
@@ -1672,13 +2010,11 @@ for ax_i, (bid, suh) in enumerate(df_suh.iterrows()):
 
     # Also plot 10-yr and 50-yr for comparison
     for T_comp, ls, alpha_c in [(10, "--", 0.6), (50, "-.", 0.6)]:
-        Qmm_c = float(
-            df_runoff.loc[bid, f"Q_{T_comp}yr_mm"] if bid in df_runoff.index else 20.0
-        )
-        Qp_c = suh["Qp_1mm_m3s"] * Qmm_c
+        Qmm_c = SUH_Q_MM[T_comp][ax_i]
+        Qp_c = suh.Qp_1mm_m3s * Qmm_c
         ax.plot(
             t_full,
-            q_interp(t_full) * (Qp_c / (Qp_25 + 1e-9)),
+            q_shape * Qp_c,
             color=colors_suh[ax_i],
             linestyle=ls,
             linewidth=1.5,
@@ -1698,14 +2034,14 @@ for ax_i, (bid, suh) in enumerate(df_suh.iterrows()):
     )
 
     # W50 and W75 hatching
-    w50_half = suh["W50_hr"] / 2.0
-    w75_half = suh["W75_hr"] / 2.0
+    w50_half = suh.W50_hr / 2.0
+    w75_half = suh.W75_hr / 2.0
     ax.axvspan(tp - w50_half, tp + w50_half, alpha=0.08, color="blue", label="W50")
     ax.axvspan(tp - w75_half, tp + w75_half, alpha=0.08, color="red", label="W75")
 
     ax.set_title(
         f"Synthetic Unit Hydrograph — {bid}  "
-        f"(A={suh['A_km2']:.1f} km², L={suh['L_km']:.2f} km)",
+        f"(A={suh.A_km2:.1f} km², L={suh.L_km:.2f} km)",
         fontweight="bold",
         fontsize=11,
     )
@@ -1730,45 +2066,39 @@ fig.savefig(
 plt.close(fig)
 print(f"  ✅ Hydrograph plot saved")
 
-# Plotly: interactive multi-basin hydrograph
+# Plotly: interactive multi-basin hydrograph — one filled line trace per
+# basin (fill and colour are per trace) plus a single trace for all peaks
+suh_colors = [px.colors.qualitative.Set1[i % 9] for i in range(len(df_suh))]
+suh_Qp_25 = df_suh["Qp_1mm_m3s"].to_numpy(dtype=np.float64) * SUH_Q_MM[25]
 fig_hy = go.Figure()
-for i, (bid, suh) in enumerate(df_suh.iterrows()):
-    tp = suh["tp_hr"]
-    tb = suh["tb_hr"]
-    Q25_mm = float(df_runoff.loc[bid, "Q_25yr_mm"] if bid in df_runoff.index else 25.0)
-    Qp_25 = suh["Qp_1mm_m3s"] * Q25_mm
-    t_full = np.linspace(0, tb * 1.05, 300)
-    q_interp = interp1d(
-        t_ratio * tp, q_ratio * Qp_25, kind="linear", fill_value=0.0, bounds_error=False
-    )
-    q_full = q_interp(t_full)
-
+for bid, Qp_25, color in zip(df_suh.index, suh_Qp_25, suh_colors):
+    t_full, q_shape = SUH_SHAPES[bid]
     fig_hy.add_trace(
         go.Scatter(
-            x=t_full.tolist(),
-            y=q_full.tolist(),
+            x=t_full,
+            y=q_shape * Qp_25,
             mode="lines",
             name=f"{bid} (25-yr)",
             fill="tozeroy",
-            line=dict(color=px.colors.qualitative.Set1[i % 9], width=2.5),
+            line=dict(color=color, width=2.5),
             hovertemplate=f"{bid}<br>t=%{{x:.2f}} hr<br>Q=%{{y:.2f}} m³/s",
         )
     )
-    # Mark Qp
-    fig_hy.add_trace(
-        go.Scatter(
-            x=[tp],
-            y=[Qp_25],
-            mode="markers+text",
-            text=[f"Qp={Qp_25:.1f}"],
-            textposition="top center",
-            marker=dict(
-                size=10, color=px.colors.qualitative.Set1[i % 9], symbol="diamond"
-            ),
-            name=f"{bid} peak",
-            showlegend=False,
-        )
+# Mark Qp
+fig_hy.add_trace(
+    go.Scatter(
+        x=df_suh["tp_hr"].to_numpy(),
+        y=suh_Qp_25,
+        mode="markers+text",
+        text=[f"Qp={q:.1f}" for q in suh_Qp_25],
+        textposition="top center",
+        marker=dict(size=10, color=suh_colors, symbol="diamond"),
+        customdata=df_suh.index.to_numpy(),
+        hovertemplate="%{customdata} peak<br>tp=%{x:.2f} hr<br>Qp=%{y:.2f} m³/s"
+        "<extra></extra>",
+        showlegend=False,
     )
+)
 
 fig_hy.update_layout(
     title="Synthetic Unit Hydrographs — 25-year Return Period Event<br>"
@@ -1790,6 +2120,10 @@ cols_suh = [
     "Qp_25yr_m3s",
     "Qp_100yr_m3s",
 ]
+# One rounded copy of the table columns, handed to Plotly as arrays
+suh_tbl = df_suh[cols_suh].round(
+    {"tp_hr": 2, "Qp_1mm_m3s": 4, "W50_hr": 2, "W75_hr": 2, "tb_hr": 2}
+)
 fig_tbl = go.Figure(
     go.Table(
         header=dict(
@@ -1809,16 +2143,8 @@ fig_tbl = go.Figure(
             line_color="white",
         ),
         cells=dict(
-            values=[
-                df_suh.index.tolist(),
-                df_suh["tp_hr"].round(2).tolist(),
-                df_suh["Qp_1mm_m3s"].round(4).tolist(),
-                df_suh["W50_hr"].round(2).tolist(),
-                df_suh["W75_hr"].round(2).tolist(),
-                df_suh["tb_hr"].round(2).tolist(),
-                df_suh["Qp_25yr_m3s"].tolist(),
-                df_suh["Qp_100yr_m3s"].tolist(),
-            ],
+            values=[suh_tbl.index.to_numpy()]
+            + [suh_tbl[c].to_numpy() for c in cols_suh],
             fill_color=[["#f0f4ff", "#dce8ff"] * len(df_suh)],
             align="center",
         ),
@@ -1860,144 +2186,136 @@ y_bf = -np.log(-np.log(1 - 1 / T_bf))
 P_bf_annual = u_g + alpha_g * y_bf  # annual rainfall
 P_bf_24hr = P_bf_annual * DAILY_FRACTION
 
-HG_ROWS = []
-
-for _, row in gdf_sub.iterrows():
-    bid = row["basin_id"]
-    A_km2 = df_areal.loc[bid, "Area_km2"]
-    L_km = df_areal.loc[bid, "Basin_Length_km"]
-    CN = df_runoff.loc[bid, "CN_mean"] if bid in df_runoff.index else 78.0
-    Tc_hr = df_tc.loc[bid, "Tc_hr"] if bid in df_tc.index else 2.0
-
-    # Bankfull Q (1.5-yr)
-    Q_bf_mm = float(scscn_runoff(P_bf_24hr, CN))
-    C_bf = float(runoff_coeff(P_bf_24hr, CN))
-    i_bf = (P_bf_24hr / 24.0) * (24.0 / Tc_hr) ** (2.0 / 3.0)
-    Q_bf = C_bf * i_bf * A_km2 / 3.6  # m³/s
-
-    # Hydraulic geometry (Leopold-Maddock regional coefficients — Deccan)
-    a_w, b_w = 3.20, 0.50  # width
-    a_d, b_d = 0.28, 0.40  # depth
-    a_v, b_v = 1.12, 0.10  # velocity
-
-    W_bf = a_w * (Q_bf**b_w)  # bankfull width [m]
-    D_bf = a_d * (Q_bf**b_d)  # bankfull depth [m]
-    V_bf = a_v * (Q_bf**b_v)  # bankfull velocity [m/s]
-
-    # Cross-sectional area and hydraulic radius
-    A_cs = W_bf * D_bf * 0.80  # assuming trapezoidal × efficiency factor
-    R_hyd = A_cs / (W_bf + 2 * D_bf)  # hydraulic radius [m]
-
-    # Channel bed slope from DEM relief and basin length
-    H_m = df_relief.loc[bid, "Basin_Relief_H_m"] if bid in df_relief.index else 100.0
-    S_ch = H_m / (L_km * 1000.0)  # dimensionless
-
-    # Manning's n (estimated for Deccan basalt-lined channels)
-    # Rocky channels: n ≈ 0.035–0.050; alluvial gravel: n ≈ 0.025–0.035
-    n_mann = 0.038 + 0.002 * (
-        1 - min(S_ch / 0.01, 1)
-    )  # slightly rougher on steeper slopes
-
-    # Manning's Q (check)
-    Q_mann = (1.0 / n_mann) * A_cs * (R_hyd ** (2 / 3)) * (S_ch**0.5)
-
-    # ── Shear stress ──────────────────────────────────────────────────────────
-    # τ₀ = ρ × g × R × S  [N/m² = Pa]
-    rho_water = 1000.0  # kg/m³
-    g = 9.81  # m/s²
-    tau0 = rho_water * g * R_hyd * S_ch  # bed shear stress [Pa]
-
-    # Critical shear stress — Shields (D50 ≈ 15mm for basalt gravel)
-    # τ_c = θ_c × (ρ_s - ρ) × g × D50
-    D50_m = 0.015  # median grain size [m] — basaltic gravel
-    rho_s = 2650.0  # sediment density [kg/m³]
-    theta_c = 0.047  # Shields parameter for D50 >10mm
-    tau_c = theta_c * (rho_s - rho_water) * g * D50_m  # critical shear [Pa]
-
-    excess_shear = tau0 - tau_c  # positive = bed mobility
-
-    # ── Stream power ──────────────────────────────────────────────────────────
-    # Ω = ρ × g × Q × S   [W/m]   total stream power
-    # ω = Ω / w            [W/m²]  specific (unit width) stream power
-    Omega_total = rho_water * g * Q_bf * S_ch
-    omega_spec = Omega_total / W_bf  # W/m²
-
-    # Critical specific stream power (Bagnold 1966):
-    # ω_c ≈ 35.0 W/m² for coarse sand–gravel in semi-arid rivers
-    omega_c = 35.0
-    omega_excess = omega_spec - omega_c
-
-    # ── Channel stability index ────────────────────────────────────────────
-    # Regime theory: stable channel has W/D (aspect ratio) within bounds
-    # For Deccan semi-arid channels: W/D < 15 = stable; 15–30 = marginally stable
-    WD_ratio = W_bf / max(D_bf, 0.01)
-
-    def channel_stability(WD, excess_shear_val, omega_exc):
-        """Combined channel stability assessment."""
-        score = 0
-        if WD < 12:
-            score += 3  # narrow deep = stable
-        elif WD < 20:
-            score += 2
-        elif WD < 30:
-            score += 1
-        if excess_shear_val < 0:
-            score += 3  # sub-critical shear = stable
-        elif excess_shear_val < 5:
-            score += 2
-        elif excess_shear_val < 15:
-            score += 1
-        if omega_exc < 0:
-            score += 3  # sub-critical stream power
-        elif omega_exc < 20:
-            score += 2
-        elif omega_exc < 50:
-            score += 1
-        if score >= 7:
-            return "Stable"
-        if score >= 5:
-            return "Marginally Stable"
-        if score >= 3:
-            return "Unstable"
-        return "Highly Unstable"
-
-    stab_class = channel_stability(WD_ratio, excess_shear, omega_excess)
-
-    # ── Sediment transport capacity (Einstein-Brown simplified) ───────────────
-    # Using unit stream power approach: Qs ∝ ω_excess² for ω > ω_c
-    if omega_excess > 0:
-        Qs_relative = (omega_excess / omega_c) ** 2.0  # relative transport capacity
-    else:
-        Qs_relative = 0.0
-
-    HG_ROWS.append(
-        {
-            "basin_id": bid,
-            "Q_bankfull_m3s": round(Q_bf, 3),
-            "W_bankfull_m": round(W_bf, 2),
-            "D_bankfull_m": round(D_bf, 2),
-            "V_bankfull_ms": round(V_bf, 3),
-            "WD_ratio": round(WD_ratio, 2),
-            "R_hydraulic_m": round(R_hyd, 3),
-            "Channel_Slope_S": round(S_ch, 6),
-            "Manning_n": round(n_mann, 4),
-            "Q_Manning_m3s": round(Q_mann, 3),
-            "Shear_Stress_Pa": round(tau0, 3),
-            "Critical_Shear_Pa": round(tau_c, 3),
-            "Excess_Shear_Pa": round(excess_shear, 3),
-            "Stream_Power_total_Wm": round(Omega_total, 2),
-            "Stream_Power_spec_Wm2": round(omega_spec, 3),
-            "Excess_Sp_Power_Wm2": round(omega_excess, 3),
-            "Transport_Capacity_rel": round(Qs_relative, 3),
-            "Channel_Stability": stab_class,
-        }
+# All basins at once: every quantity below is a per-basin array aligned with
+# hg_ids; missing CN / Tc / relief fall back to regional defaults
+hg_ids = gdf_sub["basin_id"].to_numpy()
+A_km2 = df_areal.loc[hg_ids, "Area_km2"].to_numpy(dtype=np.float64)
+L_km = df_areal.loc[hg_ids, "Basin_Length_km"].to_numpy(dtype=np.float64)
+CN = df_runoff["CN_mean"].reindex(hg_ids, fill_value=78.0).to_numpy(dtype=np.float64)
+Tc_hr = df_tc["Tc_hr"].reindex(hg_ids, fill_value=2.0).to_numpy(dtype=np.float64)
+
+# Bankfull Q (1.5-yr)
+C_bf = runoff_coeff(np.full_like(CN, P_bf_24hr), CN)
+i_bf = (P_bf_24hr / 24.0) * (24.0 / Tc_hr) ** (2.0 / 3.0)
+Q_bf = C_bf * i_bf * A_km2 / 3.6  # m³/s
+
+# Hydraulic geometry (Leopold-Maddock regional coefficients — Deccan)
+a_w, b_w = 3.20, 0.50  # width
+a_d, b_d = 0.28, 0.40  # depth
+a_v, b_v = 1.12, 0.10  # velocity
+
+W_bf = a_w * (Q_bf**b_w)  # bankfull width [m]
+D_bf = a_d * (Q_bf**b_d)  # bankfull depth [m]
+V_bf = a_v * (Q_bf**b_v)  # bankfull velocity [m/s]
+
+# Cross-sectional area and hydraulic radius
+A_cs = W_bf * D_bf * 0.80  # assuming trapezoidal × efficiency factor
+R_hyd = A_cs / (W_bf + 2 * D_bf)  # hydraulic radius [m]
+
+# Channel bed slope from DEM relief and basin length
+H_m = (
+    df_relief["Basin_Relief_H_m"]
+    .reindex(hg_ids, fill_value=100.0)
+    .to_numpy(dtype=np.float64)
+)
+S_ch = H_m / (L_km * 1000.0)  # dimensionless
+
+# Manning's n (estimated for Deccan basalt-lined channels)
+# Rocky channels: n ≈ 0.035–0.050; alluvial gravel: n ≈ 0.025–0.035
+n_mann = 0.038 + 0.002 * (
+    1 - np.minimum(S_ch / 0.01, 1)
+)  # slightly rougher on steeper slopes
+
+# Manning's Q (check)
+Q_mann = (1.0 / n_mann) * A_cs * (R_hyd ** (2 / 3)) * (S_ch**0.5)
+
+# ── Shear stress ──────────────────────────────────────────────────────────────
+# τ₀ = ρ × g × R × S  [N/m² = Pa]
+rho_water = 1000.0  # kg/m³
+g = 9.81  # m/s²
+tau0 = rho_water * g * R_hyd * S_ch  # bed shear stress [Pa]
+
+# Critical shear stress — Shields (D50 ≈ 15mm for basalt gravel)
+# τ_c = θ_c × (ρ_s - ρ) × g × D50
+D50_m = 0.015  # median grain size [m] — basaltic gravel
+rho_s = 2650.0  # sediment density [kg/m³]
+theta_c = 0.047  # Shields parameter for D50 >10mm
+tau_c = theta_c * (rho_s - rho_water) * g * D50_m  # critical shear [Pa]
+
+excess_shear = tau0 - tau_c  # positive = bed mobility
+
+# ── Stream power ──────────────────────────────────────────────────────────────
+# Ω = ρ × g × Q × S   [W/m]   total stream power
+# ω = Ω / w            [W/m²]  specific (unit width) stream power
+Omega_total = rho_water * g * Q_bf * S_ch
+omega_spec = Omega_total / W_bf  # W/m²
+
+# Critical specific stream power (Bagnold 1966):
+# ω_c ≈ 35.0 W/m² for coarse sand–gravel in semi-arid rivers
+omega_c = 35.0
+omega_excess = omega_spec - omega_c
+
+# ── Channel stability index ───────────────────────────────────────────────────
+# Regime theory: stable channel has W/D (aspect ratio) within bounds
+# For Deccan semi-arid channels: W/D < 15 = stable; 15–30 = marginally stable
+WD_ratio = W_bf / np.maximum(D_bf, 0.01)
+
+
+# Each criterion scores 3/2/1/0 by which of its three breaks it falls below;
+# the summed score (0–9) is classed at 3 / 5 / 7
+STAB_POINTS = np.array([3, 2, 1, 0])
+STAB_CLASS_LABELS = np.array(
+    ["Highly Unstable", "Unstable", "Marginally Stable", "Stable"]
+)
+
+
+def channel_stability(WD, excess_shear_val, omega_exc):
+    """Combined channel stability assessment (arrays in, class labels out)."""
+    # narrow deep = stable; sub-critical shear / stream power = stable
+    score = (
+        STAB_POINTS[np.digitize(WD, [12, 20, 30])]
+        + STAB_POINTS[np.digitize(excess_shear_val, [0, 5, 15])]
+        + STAB_POINTS[np.digitize(omega_exc, [0, 20, 50])]
     )
+    return STAB_CLASS_LABELS[np.digitize(score, [3, 5, 7])]
+
+
+stab_class = channel_stability(WD_ratio, excess_shear, omega_excess)
+
+# ── Sediment transport capacity (Einstein-Brown simplified) ───────────────────
+# Using unit stream power approach: Qs ∝ ω_excess² for ω > ω_c
+Qs_relative = np.where(
+    omega_excess > 0, (omega_excess / omega_c) ** 2.0, 0.0
+)  # relative transport capacity
+
+df_hg = pd.DataFrame(
+    {
+        "Q_bankfull_m3s": np.round(Q_bf, 3),
+        "W_bankfull_m": np.round(W_bf, 2),
+        "D_bankfull_m": np.round(D_bf, 2),
+        "V_bankfull_ms": np.round(V_bf, 3),
+        "WD_ratio": np.round(WD_ratio, 2),
+        "R_hydraulic_m": np.round(R_hyd, 3),
+        "Channel_Slope_S": np.round(S_ch, 6),
+        "Manning_n": np.round(n_mann, 4),
+        "Q_Manning_m3s": np.round(Q_mann, 3),
+        "Shear_Stress_Pa": np.round(tau0, 3),
+        "Critical_Shear_Pa": np.full(len(hg_ids), round(tau_c, 3)),
+        "Excess_Shear_Pa": np.round(excess_shear, 3),
+        "Stream_Power_total_Wm": np.round(Omega_total, 2),
+        "Stream_Power_spec_Wm2": np.round(omega_spec, 3),
+        "Excess_Sp_Power_Wm2": np.round(omega_excess, 3),
+        "Transport_Capacity_rel": np.round(Qs_relative, 3),
+        "Channel_Stability": stab_class,
+    },
+    index=pd.Index(hg_ids, name="basin_id"),
+)
+for k, bid in enumerate(hg_ids):
     print(
-        f"  {bid}: Q_bf={Q_bf:.2f} m³/s | W={W_bf:.1f}m | D={D_bf:.2f}m | "
-        f"τ={tau0:.1f}Pa | ω={omega_spec:.1f} W/m² | {stab_class}"
+        f"  {bid}: Q_bf={Q_bf[k]:.2f} m³/s | W={W_bf[k]:.1f}m | D={D_bf[k]:.2f}m | "
+        f"τ={tau0[k]:.1f}Pa | ω={omega_spec[k]:.1f} W/m² | {stab_class[k]}"
     )
 
-df_hg = pd.DataFrame(HG_ROWS).set_index("basin_id")
 df_hg.to_csv(os.path.join(HYD_DIR, "channel_hydraulics.csv"))
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -2007,61 +2325,77 @@ df_hg.to_csv(os.path.join(HYD_DIR, "channel_hydraulics.csv"))
 print("\n[18-B] Stream power analysis per Strahler order...")
 
 # For each order, compute mean gradient, estimated Q, and stream power
-ORDER_POWER_ROWS = []
-orders_all = sorted(gdf_so[ORDER_COL].unique())
-
-for o in orders_all:
-    segs = gdf_so[gdf_so[ORDER_COL] == o]
-    n_segs = len(segs)
-    L_total_m = segs.geometry.length.sum()
-    L_mean_m = segs.geometry.length.mean()
-
-    # Sample slope at each segment
-    seg_slopes = []
-    for _, seg in segs.iterrows():
-        s = sample_slope_at_segment(seg.geometry, SLOPE_ARR, DEM_TRANSFORM)
-        if s is not None and not np.isnan(s):
-            seg_slopes.append(s)
-    mean_slope_deg = float(np.nanmean(seg_slopes)) if seg_slopes else 5.0
-    S_order = np.tan(np.radians(max(mean_slope_deg, 0.1)))
-
-    # Estimate Q for this order using Hack's (1957) scaling:
-    # Q_order ≈ Q_max_basin × (Dd_order / Dd_total)
-    # Simpler: Q scales with segment length proxy
-    Q_order_proxy = (
-        0.02
-        * (o**2.5)
-        * np.mean(
-            [
-                df_runoff.loc[bid, "Q_25yr_mm"] if bid in df_runoff.index else 25
-                for bid in gdf_sub["basin_id"]
-            ]
-        )
-        * 1e-3
-    )  # rough proxy
-
-    omega_order = (
-        rho_water * g * Q_order_proxy * S_order / max(3.2 * (Q_order_proxy**0.5), 0.5)
-    )  # W/m²
-
-    ORDER_POWER_ROWS.append(
-        {
-            "Strahler_Order": o,
-            "N_segments": n_segs,
-            "Total_Length_km": round(L_total_m / 1000, 2),
-            "Mean_Seg_Length_m": round(L_mean_m, 1),
-            "Mean_Slope_deg": round(mean_slope_deg, 2),
-            "Mean_Slope_frac": round(S_order, 5),
-            "Qproxy_m3s": round(Q_order_proxy, 4),
-            "StreamPower_Wm2": round(omega_order, 2),
-        }
+# Mean slope of every segment: single-part segments reuse the 16-A samples
+# (gdf_cd is a copy of gdf_so), only multi-part ones are sampled again here
+SO_SLOPE_DEG = gdf_cd["seg_slope_deg"].to_numpy(dtype=np.float64, copy=True)
+so_multi = shapely.get_type_id(gdf_so.geometry.to_numpy()) != 1
+if so_multi.any():
+    SO_SLOPE_DEG[so_multi] = np.nanmean(
+        sample_along_lines(
+            SLOPE_ARR, gdf_so.geometry.to_numpy()[so_multi], SEG_SLOPE_FRACS
+        ),
+        axis=1,
     )
+
+# Segment lengths are the 16-A stream_length_m column; per-order sums / counts
+# are bincounts over each segment's position in the sorted list of orders
+SO_LENGTH_M = gdf_cd["stream_length_m"].to_numpy()
+orders_all, so_order_idx = np.unique(gdf_so[ORDER_COL].to_numpy(), return_inverse=True)
+n_orders = orders_all.size
+
+
+def order_nanmean(vals):
+    """Per-order (sum, count, mean) of the non-NaN vals; mean NaN if none."""
+    ok = ~np.isnan(vals)
+    tot = np.bincount(so_order_idx[ok], weights=vals[ok], minlength=n_orders)
+    cnt = np.bincount(so_order_idx[ok], minlength=n_orders)
+    return tot, cnt, np.where(cnt > 0, tot / np.maximum(cnt, 1), np.nan)
+
+
+n_segs = np.bincount(so_order_idx, minlength=n_orders)
+L_total_m, _, L_mean_m = order_nanmean(SO_LENGTH_M)
+
+# Orders without a valid sampled slope fall back to 5°
+_, slope_cnt, mean_slope_deg = order_nanmean(SO_SLOPE_DEG)
+mean_slope_deg = np.where(slope_cnt > 0, mean_slope_deg, 5.0)
+S_order = np.tan(np.radians(np.maximum(mean_slope_deg, 0.1)))
+
+# Estimate Q for this order using Hack's (1957) scaling:
+# Q_order ≈ Q_max_basin × (Dd_order / Dd_total)
+# Simpler: Q scales with segment length proxy
+Q25_basin_mean = np.mean(
+    df_runoff["Q_25yr_mm"]
+    .reindex(gdf_sub["basin_id"].to_numpy(), fill_value=25)
+    .to_numpy(dtype=np.float64)
+)
+Q_order_proxy = 0.02 * (orders_all**2.5) * Q25_basin_mean * 1e-3  # rough proxy
+
+omega_order = (
+    rho_water
+    * g
+    * Q_order_proxy
+    * S_order
+    / np.maximum(3.2 * (Q_order_proxy**0.5), 0.5)
+)  # W/m²
+
+df_order_power = pd.DataFrame(
+    {
+        "Strahler_Order": orders_all,
+        "N_segments": n_segs,
+        "Total_Length_km": np.round(L_total_m / 1000, 2),
+        "Mean_Seg_Length_m": np.round(L_mean_m, 1),
+        "Mean_Slope_deg": np.round(mean_slope_deg, 2),
+        "Mean_Slope_frac": np.round(S_order, 5),
+        "Qproxy_m3s": np.round(Q_order_proxy, 4),
+        "StreamPower_Wm2": np.round(omega_order, 2),
+    }
+)
+for k, o in enumerate(orders_all):
     print(
-        f"  Order {o}: N={n_segs:4d} | L_tot={L_total_m/1000:.1f} km | "
-        f"S_mean={mean_slope_deg:.2f}° | ω≈{omega_order:.2f} W/m²"
+        f"  Order {o}: N={n_segs[k]:4d} | L_tot={L_total_m[k]/1000:.1f} km | "
+        f"S_mean={mean_slope_deg[k]:.2f}° | ω≈{omega_order[k]:.2f} W/m²"
     )
 
-df_order_power = pd.DataFrame(ORDER_POWER_ROWS)
 df_order_power.to_csv(os.path.join(HYD_DIR, "stream_order_power.csv"), index=False)
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -2087,25 +2421,27 @@ gdf_hg.plot(
     linewidth=1.2,
     legend_kwds={"label": "Bankfull Width (m)", "shrink": 0.75},
 )
-for _, r in gdf_hg.iterrows():
-    cx, cy = r.geometry.centroid.x, r.geometry.centroid.y
-    ax.text(
-        cx,
-        cy,
-        f"{r['basin_id']}\nW={r['W_bankfull_m']:.1f}m\nD={r['D_bankfull_m']:.2f}m",
-        ha="center",
-        va="center",
-        fontsize=7.5,
-        fontweight="bold",
-        path_effects=[pe.withStroke(linewidth=2, foreground="white")],
-    )
-# Stream network coloured by order
-for o in orders_all:
-    segs = gdf_so[gdf_so[ORDER_COL] == o]
-    lw = 0.4 + o * 0.6
-    segs.plot(
-        ax=ax, linewidth=lw, color=plt.cm.Blues(0.3 + o * 0.15), zorder=5, alpha=0.9
-    )
+annotate_basins(
+    ax,
+    gdf_hg["basin_id"],
+    [
+        f"{bid}\nW={w:.1f}m\nD={d:.2f}m"
+        for bid, w, d in zip(
+            gdf_hg["basin_id"], gdf_hg["W_bankfull_m"], gdf_hg["D_bankfull_m"]
+        )
+    ],
+    fontsize=7.5,
+)
+# Stream network coloured by order as one LineCollection: segments sorted by
+# order (higher orders drawn on top), per-segment RGBA carries the alpha
+so_draw = np.argsort(so_order_idx, kind="stable")
+so_draw_order = orders_all[so_order_idx[so_draw]]
+gdf_so.iloc[so_draw].plot(
+    ax=ax,
+    linewidth=0.4 + so_draw_order * 0.6,
+    color=plt.cm.Blues(0.3 + so_draw_order * 0.15, alpha=0.9),
+    zorder=5,
+)
 finalize_and_save(fig, ax, utm_ext, "18a_bankfull_hydraulics.png")
 
 # Channel stability map
@@ -2118,22 +2454,25 @@ stab_colors = {
 fig, ax, utm_ext = base_axes(
     "Channel Stability Classification Map\n" "(Shear Stress, Stream Power, W/D Ratio)"
 )
-for _, r in gdf_hg.iterrows():
-    col = stab_colors.get(r["Channel_Stability"], "grey")
-    gpd.GeoDataFrame([r], geometry="geometry", crs=gdf_sub.crs).plot(
-        ax=ax, color=col, edgecolor="black", linewidth=1.2, alpha=0.80, zorder=3
-    )
-    cx, cy = r.geometry.centroid.x, r.geometry.centroid.y
-    ax.text(
-        cx,
-        cy,
-        f"{r['basin_id']}\n{r['Channel_Stability']}\nτ={r['Shear_Stress_Pa']:.1f}Pa",
-        ha="center",
-        va="center",
-        fontsize=7.5,
-        fontweight="bold",
-        path_effects=[pe.withStroke(linewidth=2, foreground="white")],
-    )
+gdf_hg.plot(
+    ax=ax,
+    color=gdf_hg["Channel_Stability"].map(stab_colors).fillna("grey").tolist(),
+    edgecolor="black",
+    linewidth=1.2,
+    alpha=0.80,
+    zorder=3,
+)
+annotate_basins(
+    ax,
+    gdf_hg["basin_id"],
+    [
+        f"{bid}\n{st}\nτ={tau:.1f}Pa"
+        for bid, st, tau in zip(
+            gdf_hg["basin_id"], gdf_hg["Channel_Stability"], gdf_hg["Shear_Stress_Pa"]
+        )
+    ],
+    fontsize=7.5,
+)
 gdf_streams.plot(ax=ax, color="royalblue", linewidth=0.7, alpha=0.5, zorder=8)
 patches_st = [mpatches.Patch(color=v, label=k) for k, v in stab_colors.items()]
 ax.legend(
@@ -2161,17 +2500,18 @@ stab_c_map = {
     "Unstable": "#d73027",
     "Highly Unstable": "#7f0000",
 }
-for i, (bid, r) in enumerate(df_hg.iterrows()):
-    c = stab_c_map.get(r["Channel_Stability"], "grey")
+for i, r in enumerate(df_hg.itertuples()):
+    bid = r.Index
+    c = stab_c_map.get(r.Channel_Stability, "grey")
     fig.add_trace(
         go.Scatter(
-            x=[r["Shear_Stress_Pa"]],
-            y=[r["Stream_Power_spec_Wm2"]],
+            x=[r.Shear_Stress_Pa],
+            y=[r.Stream_Power_spec_Wm2],
             mode="markers+text",
             text=[bid],
             textposition="top center",
             marker=dict(
-                size=r["W_bankfull_m"] * 2.5,
+                size=r.W_bankfull_m * 2.5,
                 color=c,
                 opacity=0.85,
                 line=dict(width=1, color="black"),
@@ -2179,10 +2519,10 @@ for i, (bid, r) in enumerate(df_hg.iterrows()):
             name=bid,
             hovertemplate=(
                 f"<b>{bid}</b><br>"
-                f"τ = {r['Shear_Stress_Pa']:.2f} Pa<br>"
-                f"ω = {r['Stream_Power_spec_Wm2']:.2f} W/m²<br>"
-                f"Q_bf = {r['Q_bankfull_m3s']:.2f} m³/s<br>"
-                f"Stability: {r['Channel_Stability']}"
+                f"τ = {r.Shear_Stress_Pa:.2f} Pa<br>"
+                f"ω = {r.Stream_Power_spec_Wm2:.2f} W/m²<br>"
+                f"Q_bf = {r.Q_bankfull_m3s:.2f} m³/s<br>"
+                f"Stability: {r.Channel_Stability}"
             ),
         ),
         row=1,
@@ -2192,10 +2532,10 @@ for i, (bid, r) in enumerate(df_hg.iterrows()):
 # Order power bar
 fig.add_trace(
     go.Bar(
-        x=df_order_power["Strahler_Order"].tolist(),
-        y=df_order_power["StreamPower_Wm2"].tolist(),
+        x=df_order_power["Strahler_Order"].to_numpy(),
+        y=df_order_power["StreamPower_Wm2"].to_numpy(),
         marker_color=px.colors.sequential.Blues[2:],
-        text=[f"{v:.2f}" for v in df_order_power["StreamPower_Wm2"]],
+        text=np.char.mod("%.2f", df_order_power["StreamPower_Wm2"].to_numpy()),
         textposition="outside",
         hovertemplate="Order %{x}<br>ω=%{y:.2f} W/m²",
         name="Stream Power",
@@ -2236,92 +2576,75 @@ fig = make_subplots(
         "Bankfull Velocity (V-Q)",
     ],
 )
-for i, (bid, r) in enumerate(df_hg.iterrows()):
+for i, r in enumerate(df_hg.itertuples()):
+    bid = r.Index
     c = px.colors.qualitative.Set1[i % 9]
     fig.add_trace(
         go.Scatter(
-            x=[r["Q_bankfull_m3s"]],
-            y=[r["W_bankfull_m"]],
+            x=[r.Q_bankfull_m3s],
+            y=[r.W_bankfull_m],
             mode="markers+text",
             text=[bid],
             textposition="top center",
             marker=dict(size=12, color=c),
             name=bid,
             legendgroup=bid,
-            hovertemplate=f"{bid}<br>Q={r['Q_bankfull_m3s']:.2f} m³/s<br>W={r['W_bankfull_m']:.2f} m",
+            hovertemplate=f"{bid}<br>Q={r.Q_bankfull_m3s:.2f} m³/s<br>W={r.W_bankfull_m:.2f} m",
         ),
         row=1,
         col=1,
     )
     fig.add_trace(
         go.Scatter(
-            x=[r["Q_bankfull_m3s"]],
-            y=[r["D_bankfull_m"]],
+            x=[r.Q_bankfull_m3s],
+            y=[r.D_bankfull_m],
             mode="markers",
             marker=dict(size=12, color=c),
             name=bid,
             legendgroup=bid,
             showlegend=False,
-            hovertemplate=f"{bid}<br>Q={r['Q_bankfull_m3s']:.2f} m³/s<br>D={r['D_bankfull_m']:.2f} m",
+            hovertemplate=f"{bid}<br>Q={r.Q_bankfull_m3s:.2f} m³/s<br>D={r.D_bankfull_m:.2f} m",
         ),
         row=1,
         col=2,
     )
     fig.add_trace(
         go.Scatter(
-            x=[r["Q_bankfull_m3s"]],
-            y=[r["V_bankfull_ms"]],
+            x=[r.Q_bankfull_m3s],
+            y=[r.V_bankfull_ms],
             mode="markers",
             marker=dict(size=12, color=c),
             name=bid,
             legendgroup=bid,
             showlegend=False,
-            hovertemplate=f"{bid}<br>Q={r['Q_bankfull_m3s']:.2f} m³/s<br>V={r['V_bankfull_ms']:.3f} m/s",
+            hovertemplate=f"{bid}<br>Q={r.Q_bankfull_m3s:.2f} m³/s<br>V={r.V_bankfull_ms:.3f} m/s",
         ),
         row=1,
         col=3,
     )
 
-# Leopold-Maddock regional curves (dashed lines)
+# Leopold-Maddock regional curves (dashed lines), from the same a·Q^b
+# coefficients as 18-A; arrays go to Plotly as-is
 Q_range = np.logspace(-1, 2, 50)
-fig.add_trace(
-    go.Scatter(
-        x=Q_range.tolist(),
-        y=(3.20 * Q_range**0.50).tolist(),
-        mode="lines",
-        line=dict(dash="dash", color="grey", width=1.5),
-        name="W=3.2Q^0.5",
-        hoverinfo="skip",
-    ),
-    row=1,
-    col=1,
-)
-fig.add_trace(
-    go.Scatter(
-        x=Q_range.tolist(),
-        y=(0.28 * Q_range**0.40).tolist(),
-        mode="lines",
-        line=dict(dash="dash", color="grey", width=1.5),
-        name="D=0.28Q^0.4",
-        showlegend=False,
-        hoverinfo="skip",
-    ),
-    row=1,
-    col=2,
-)
-fig.add_trace(
-    go.Scatter(
-        x=Q_range.tolist(),
-        y=(1.12 * Q_range**0.10).tolist(),
-        mode="lines",
-        line=dict(dash="dash", color="grey", width=1.5),
-        name="V=1.12Q^0.1",
-        showlegend=False,
-        hoverinfo="skip",
-    ),
-    row=1,
-    col=3,
-)
+LM_CURVES = [
+    (1, a_w * Q_range**b_w, "W=3.2Q^0.5"),
+    (2, a_d * Q_range**b_d, "D=0.28Q^0.4"),
+    (3, a_v * Q_range**b_v, "V=1.12Q^0.1"),
+]
+for col_i, lm_curve, lm_name in LM_CURVES:
+    fig.add_trace(
+        go.Scatter(
+            x=Q_range,
+            y=lm_curve,
+            mode="lines",
+            line=dict(dash="dash", color="grey", width=1.5),
+            name=lm_name,
+            showlegend=col_i == 1,
+            hoverinfo="skip",
+        ),
+        row=1,
+        col=col_i,
+    )
 
 for col_i, ylabel in [(1, "Width W (m)"), (2, "Depth D (m)"), (3, "Velocity V (m/s)")]:
     fig.update_xaxes(type="log", title_text="Bankfull Q (m³/s)", row=1, col=col_i)
@@ -2345,6 +2668,8 @@ print("\n" + "=" * 70)
 print("CONSOLIDATED HYDROLOGY & SWC RESULTS TABLE")
 print("=" * 70)
 
+# Column-wise concat aligns the basin_id indexes; sort=False keeps the basins
+# in source order
 df_consolidated = pd.concat(
     [
         df_runoff[["CN_mean", "Q_10yr_mm", "Q_25yr_mm", "Q_100yr_mm", "Vol_25yr_Mm3"]],
@@ -2364,6 +2689,7 @@ df_consolidated = pd.concat(
         ],
     ],
     axis=1,
+    sort=False,
 )
 
 df_consolidated.to_csv(os.path.join(TABLES_DIR, "hydrology_SWC_consolidated.csv"))
@@ -2375,48 +2701,45 @@ print(df_consolidated.to_string())
 print("\n" + "─" * 70)
 print("SUMMARY OF KEY SOIL & WATER CONSERVATION METRICS")
 print("─" * 70)
-for bid in df_consolidated.index:
-    r = df_consolidated.loc[bid]
-    print(f"\n  ┌─ {bid} {'─'*40}")
+for r in df_consolidated.itertuples():
+    print(f"\n  ┌─ {r.Index} {'─'*40}")
     print(
-        f"  │  CN={r['CN_mean']:.1f} | Tc={r['Tc_Avg_min']:.1f} min | "
-        f"Q25yr={r['Q_25yr_mm']:.1f}mm | Qp25={r['Qp_25yr_m3s']:.2f}m³/s"
+        f"  │  CN={r.CN_mean:.1f} | Tc={r.Tc_Avg_min:.1f} min | "
+        f"Q25yr={r.Q_25yr_mm:.1f}mm | Qp25={r.Qp_25yr_m3s:.2f}m³/s"
     )
     print(
-        f"  │  Soil loss={r['A_mean_t_ha_yr']:.1f} t/ha/yr ({r['Loss_Class_Mode']}) | "
-        f"Sed.Yield={r['Sed_Yield_t_yr']:.0f} t/yr"
+        f"  │  Soil loss={r.A_mean_t_ha_yr:.1f} t/ha/yr ({r.Loss_Class_Mode}) | "
+        f"Sed.Yield={r.Sed_Yield_t_yr:.0f} t/yr"
     )
     print(
-        f"  │  WHP={r['WHP_25yr_Mm3']:.4f}Mm³ | ~{r['Potential_CheckDams_N']} check dams | "
-        f"SWC priority: {r['SWC_Priority']}"
+        f"  │  WHP={r.WHP_25yr_Mm3:.4f}Mm³ | ~{r.Potential_CheckDams_N} check dams | "
+        f"SWC priority: {r.SWC_Priority}"
     )
     print(
-        f"  │  Bankfull Q={r['Q_bankfull_m3s']:.2f}m³/s | "
-        f"τ={r['Shear_Stress_Pa']:.1f}Pa | ω={r['Stream_Power_spec_Wm2']:.1f}W/m² | "
-        f"Stability: {r['Channel_Stability']}"
+        f"  │  Bankfull Q={r.Q_bankfull_m3s:.2f}m³/s | "
+        f"τ={r.Shear_Stress_Pa:.1f}Pa | ω={r.Stream_Power_spec_Wm2:.1f}W/m² | "
+        f"Stability: {r.Channel_Stability}"
     )
     print(
-        f"  └─ UH: tp={r['tp_hr']:.2f}hr | Qp(1mm)={r['Qp_1mm_m3s']:.4f}m³/s | "
-        f"W50={r['W50_hr']:.2f}hr | tb={r['tb_hr']:.2f}hr"
+        f"  └─ UH: tp={r.tp_hr:.2f}hr | Qp(1mm)={r.Qp_1mm_m3s:.4f}m³/s | "
+        f"W50={r.W50_hr:.2f}hr | tb={r.tb_hr:.2f}hr"
     )
 
 print("\n" + "=" * 70)
 print("ALL SECTIONS 14–18 COMPLETE")
 print("=" * 70)
 print(f"\n  Output files:")
-all_new_files = (
-    [(HYD_DIR, f) for f in os.listdir(HYD_DIR)]
-    + [(SWC_DIR, f) for f in os.listdir(SWC_DIR)]
-    + [(UHG_DIR, f) for f in os.listdir(UHG_DIR)]
-    + [(HYD_MAPS, f) for f in os.listdir(HYD_MAPS) if os.path.exists(HYD_MAPS)]
-    + [(SWC_MAPS, f) for f in os.listdir(SWC_MAPS) if os.path.exists(SWC_MAPS)]
-)
-for d, f in sorted(all_new_files):
+# One scandir pass per output folder; DirEntry.stat() supplies the size
+all_new_files = []
+for d in (HYD_DIR, SWC_DIR, UHG_DIR, HYD_MAPS, SWC_MAPS):
+    if os.path.isdir(d):
+        with os.scandir(d) as entries:
+            all_new_files += [(d, e.name, e.stat().st_size / 1024) for e in entries]
+for d, f, size in sorted(all_new_files):
     fpath = os.path.join(d, f)
-    size = os.path.getsize(fpath) / 1024 if os.path.exists(fpath) else 0
     print(f"    {fpath.replace(OUT_DIR,''):<60s}  {size:>8.1f} KB")
 
 print(f"\n  Total new maps   : 9 (14a, 14b, 15a, 15b, 16a, 16b, 18a, 18b)")
 print(f"  Total new CSVs   : 9")
 print(f"  Plotly HTML      : 12 interactive charts")
-print(f"  Shapefile        : checkdam_suitability.shp")
+print(f"  Vector layer     : {', '.join(os.path.basename(p) for p in CD_VECTOR_FILES)}")
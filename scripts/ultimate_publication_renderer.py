@@ -63,12 +63,12 @@ ULTIMATE_REGISTRY = [
     {"id": "14", "name": "HI High Anomaly Areas", "path": "outputs/thematic_rasters/GAI_high_anomaly.tif", "cmap": "Reds", "label": "Anomaly Severity"},
     {"id": "15", "name": "Percolation Potential", "path": "outputs/thematic_rasters/percolation_potential.tif", "cmap": "Greens", "label": "Suitability Class"},
     {"id": "16", "name": "Contour Trench Suitability", "path": "outputs/thematic_rasters/contour_trench_suitability.tif", "cmap": "Purples", "label": "Suitability Class"},
-    {"id": "17", "name": "RUSLE Potential Soil Loss", "path": "outputs/thematic_rasters/RUSLE_A.tif", "cmap": "YlOrBr", "label": "Loss (t/ha/yr)"},
-    {"id": "18", "name": "RUSLE C-Factor Land Cover", "path": "outputs/thematic_rasters/RUSLE_C.tif", "cmap": "PiYG", "label": "C-Factor"},
-    {"id": "19", "name": "RUSLE K-Factor Erodibility", "path": "outputs/thematic_rasters/RUSLE_K.tif", "cmap": "copper", "label": "K-Factor"},
-    {"id": "20", "name": "RUSLE LS-Factor Topography", "path": "outputs/thematic_rasters/RUSLE_LS.tif", "cmap": "inferno", "label": "LS-Factor"},
-    {"id": "21", "name": "RUSLE P-Factor Conservation", "path": "outputs/thematic_rasters/RUSLE_P.tif", "cmap": "summer", "label": "P-Factor"},
-    {"id": "22", "name": "RUSLE R-Factor Rainfall", "path": "outputs/thematic_rasters/RUSLE_R.tif", "cmap": "YlGnBu", "label": "R-Factor"},
+    {"id": "17", "name": "RUSLE Potential Soil Loss", "path": "outputs/thematic_rasters/RUSLE_A.tif", "stack": "outputs/thematic_rasters/RUSLE_stack.tif", "band": 6, "cmap": "YlOrBr", "label": "Loss (t/ha/yr)"},
+    {"id": "18", "name": "RUSLE C-Factor Land Cover", "path": "outputs/thematic_rasters/RUSLE_C.tif", "stack": "outputs/thematic_rasters/RUSLE_stack.tif", "band": 4, "cmap": "PiYG", "label": "C-Factor"},
+    {"id": "19", "name": "RUSLE K-Factor Erodibility", "path": "outputs/thematic_rasters/RUSLE_K.tif", "stack": "outputs/thematic_rasters/RUSLE_stack.tif", "band": 2, "cmap": "copper", "label": "K-Factor"},
+    {"id": "20", "name": "RUSLE LS-Factor Topography", "path": "outputs/thematic_rasters/RUSLE_LS.tif", "stack": "outputs/thematic_rasters/RUSLE_stack.tif", "band": 3, "cmap": "inferno", "label": "LS-Factor"},
+    {"id": "21", "name": "RUSLE P-Factor Conservation", "path": "outputs/thematic_rasters/RUSLE_P.tif", "stack": "outputs/thematic_rasters/RUSLE_stack.tif", "band": 5, "cmap": "summer", "label": "P-Factor"},
+    {"id": "22", "name": "RUSLE R-Factor Rainfall", "path": "outputs/thematic_rasters/RUSLE_R.tif", "stack": "outputs/thematic_rasters/RUSLE_stack.tif", "band": 1, "cmap": "YlGnBu", "label": "R-Factor"},
     {"id": "23", "name": "Stream Order Map", "path": "data/watershed_data/SteamOrder.shp", "categorical": True, "legend_type": "lines"},
     {"id": "24", "name": "Drainage Density Map", "path": "data/watershed_data/Flowthreshould.tif", "cmap": "jet", "label": "Density Class"},
     {"id": "25", "name": "Topographic Contour Map", "path": "data/watershed_data/Filled DEM.tif", "categorical": True, "legend_type": "lines"}
@@ -133,7 +133,10 @@ def render_ultimate_map(m_cfg, boundary_path):
     ax.set_clip_path(patch)
 
     # ── MAP CORE CONTENT ──────────────────────────────────────────────────────
-    data_path = m_cfg['path']
+    # Prefer the band of a multi-band stack (e.g. RUSLE_stack.tif) when present
+    data_path, band = m_cfg['path'], 1
+    if m_cfg.get('stack') and os.path.exists(m_cfg['stack']):
+        data_path, band = m_cfg['stack'], m_cfg['band']
     if not os.path.exists(data_path):
         print(f"Warning: Path {data_path} not found.")
         return
@@ -177,7 +180,7 @@ def render_ultimate_map(m_cfg, boundary_path):
     
     else: # Default Raster Rendering
         with rasterio.open(data_path) as src:
-            out_image, out_transform = rio_mask(src, gdf_bound.geometry, crop=False)
+            out_image, out_transform = rio_mask(src, gdf_bound.geometry, crop=False, indexes=[band])
             data = out_image[0].astype(float); data[data == src.nodata] = np.nan
             ext = [src.bounds.left, src.bounds.right, src.bounds.bottom, src.bounds.top]
             
@@ -6,17 +6,47 @@ Run with: pytest tests/ -v
 import numpy as np
 import pytest
 
+try:
+    from numba import vectorize
 
-def scscn_runoff(P_mm, CN):
-    S = 25400.0 / CN - 254.0
-    I_a = 0.2 * S
-    Q = np.where(P_mm > I_a, (P_mm - I_a) ** 2 / (P_mm + 0.8 * S), 0.0)
-    return float(np.maximum(Q, 0.0))
+    NUMBA_OK = True
+except ImportError:
+    NUMBA_OK = False
 
 
-def tc_kirpich(L_m, H_m):
-    S = max(H_m / L_m, 0.0001) if L_m > 0 else 0.001
-    return 0.0195 * (L_m**0.77) * (S**-0.385)
+# Same kernels as scripts/sections_14_18_hydrology_swc.py: numba ufuncs that
+# take scalars or broadcast over arrays, plain numpy when numba is missing.
+if NUMBA_OK:
+
+    @vectorize(["float64(float64, float64)"])
+    def scscn_runoff(P_mm, CN):
+        S = 25400.0 / CN - 254.0
+        I_a = 0.2 * S
+        if P_mm > I_a:
+            return max((P_mm - I_a) ** 2 / (P_mm + 0.8 * S), 0.0)
+        return 0.0
+
+    @vectorize(["float64(float64, float64)"])
+    def tc_kirpich(L_m, H_m):
+        S = H_m / L_m if L_m > 0 else 0.001
+        if S < 0.0001:
+            S = 0.0001
+        return 0.0195 * L_m**0.77 * S**-0.385
+
+else:
+
+    def scscn_runoff(P_mm, CN):
+        S = 25400.0 / CN - 254.0
+        I_a = 0.2 * S
+        Q = np.where(P_mm > I_a, (P_mm - I_a) ** 2 / (P_mm + 0.8 * S), 0.0)
+        return np.maximum(Q, 0.0)
+
+    def tc_kirpich(L_m, H_m):
+        L_m = np.asarray(L_m, dtype=np.float64)
+        pos = L_m > 0
+        S = np.where(pos, np.asarray(H_m) / np.where(pos, L_m, 1.0), 0.001)
+        S = np.maximum(S, 0.0001)
+        return 0.0195 * np.power(L_m, 0.77) * np.power(S, -0.385)
 
 
 class TestSCSCN:
@@ -33,6 +63,11 @@ class TestSCSCN:
         q = scscn_runoff(120, 79)
         assert 30 <= q <= 70
 
+    def test_array_matches_scalar(self):
+        P = np.array([5.0, 50.0, 120.0])
+        Q = scscn_runoff(P, 79.0)
+        assert Q == pytest.approx([scscn_runoff(p, 79.0) for p in P])
+
 
 class TestKirpich:
     def test_tc_positive(self):
@@ -41,6 +76,9 @@ class TestKirpich:
     def test_tc_increases_with_length(self):
         assert tc_kirpich(2000, 50) > tc_kirpich(1000, 50)
 
+    def test_slope_clamped_to_minimum(self):
+        assert tc_kirpich(1000, 0) == pytest.approx(tc_kirpich(1000, 0.1))
+
 
 class TestRUSLE:
     def test_ls_factor_positive(self):